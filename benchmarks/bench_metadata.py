@@ -0,0 +1,296 @@
+"""Benchmarks for the metadata extraction hot path.
+
+Times MetadataMapping end to end and each special property class against the MODS fixtures in tests/fixtures and a
+synthetic corpus built from them by generate_corpus.py. Resource Index calls are replaced with canned answers, or with
+the corpus's own stand-in data, so only local work is measured.
+Results are written as JSON so runs can be compared across commits:
+
+    python benchmarks/bench_metadata.py --output before.json
+    python benchmarks/bench_metadata.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_path = Path(__file__).parent.parent
+sys.path.insert(0, str(project_path))
+sys.path.insert(0, str(Path(__file__).parent))
+fixtures_path = project_path / "tests" / "fixtures"
+config_path = project_path / "utk_exodus" / "config"
+
+NAMESPACES = {
+    "mods": "http://www.loc.gov/mods/v3",
+    "xlink": "http://www.w3.org/1999/xlink",
+}
+
+
+def stub_resource_index():
+    """Replace the Resource Index lookups MetadataMapping makes with canned answers."""
+    from utk_exodus.risearch import ResourceIndexSearch
+
+    ResourceIndexSearch.get_parent_collections = lambda self, pid: [
+        "collections:benchmark"
+    ]
+    ResourceIndexSearch.get_islandora_work_type = (
+        lambda self, pid: "info:fedora/islandora:sp_large_image_cmodel"
+    )
+    ResourceIndexSearch.find_pages_in_book = lambda self, book: []
+    ResourceIndexSearch.get_compound_object_parts = lambda self, compound: []
+    return
+
+
+def fixture_files():
+    return sorted(
+        path
+        for path in fixtures_path.glob("*.xml")
+        if not path.name.endswith("_POLICY.xml")
+    )
+
+
+def build_synthetic_corpus(directory, count, seed=0):
+    """Generate `count` synthetic works with generate_corpus.py."""
+    from generate_corpus import CorpusGenerator
+
+    CorpusGenerator(seed=seed).write(str(directory), count)
+    return
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes everywhere else.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def special_properties():
+    from utk_exodus.metadata import (
+        DataProvider,
+        ExtentProperty,
+        GeoNamesProperty,
+        KeywordProperty,
+        LanguageURIProperty,
+        LocalTypesProperties,
+        MachineDate,
+        NameProperty,
+        PhysicalLocationsProperties,
+        PublicationPlaceProperty,
+        PublisherProperty,
+        RightsOrLicenseProperties,
+        RoleAndNameProperty,
+        SubjectProperty,
+        TitleProperty,
+        TypesProperties,
+    )
+
+    return {
+        "TitleProperty": lambda path: TitleProperty(path, NAMESPACES).find(),
+        "NameProperty": lambda path: NameProperty(path).find(),
+        "RoleAndNameProperty": lambda path: RoleAndNameProperty(path).find(),
+        "GeoNamesProperty": lambda path: GeoNamesProperty(path, NAMESPACES).find(
+            "spatial"
+        ),
+        "DataProvider": lambda path: DataProvider(path, NAMESPACES).find(),
+        "PhysicalLocationsProperties": lambda path: PhysicalLocationsProperties(
+            path, NAMESPACES
+        ).find(),
+        "SubjectProperty": lambda path: SubjectProperty(path, NAMESPACES).find_topic(),
+        "KeywordProperty": lambda path: KeywordProperty(path, NAMESPACES).find_topic(),
+        "TypesProperties": lambda path: TypesProperties(path, NAMESPACES).find(),
+        "LocalTypesProperties": lambda path: LocalTypesProperties(
+            path, NAMESPACES
+        ).find(),
+        "LanguageURIProperty": lambda path: LanguageURIProperty(
+            path, NAMESPACES
+        ).find_term(),
+        "PublisherProperty": lambda path: PublisherProperty(path, NAMESPACES).find(),
+        "PublicationPlaceProperty": lambda path: PublicationPlaceProperty(
+            path, NAMESPACES
+        ).find(),
+        "RightsOrLicenseProperties": lambda path: RightsOrLicenseProperties(
+            path, NAMESPACES
+        ).find(),
+        "ExtentProperty": lambda path: ExtentProperty(path, NAMESPACES).find(),
+        "MachineDate": lambda path: MachineDate(path, NAMESPACES).find(),
+    }
+
+
+def bench_mapping(directory, config, risearch=None):
+    """Run MetadataMapping over a directory and report throughput and peak memory."""
+    if risearch:
+        from standin import install
+
+        install(risearch)
+    else:
+        stub_resource_index()
+    from utk_exodus.metadata import MetadataMapping
+
+    start = time.perf_counter()
+    mapping = MetadataMapping(str(config_path / config), str(directory))
+    seconds = time.perf_counter() - start
+    records = len(mapping.output_data)
+    return {
+        "records": records,
+        "seconds": seconds,
+        "records_per_second": records / seconds if seconds else 0.0,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def bench_properties(repeat):
+    """Time each special property class over every fixture it can handle."""
+    results = {}
+    all_files = [str(path) for path in fixture_files()]
+    for name, find in special_properties().items():
+        files = []
+        for path in all_files:
+            try:
+                find(path)
+                files.append(path)
+            except Exception:
+                pass
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for path in files:
+                find(path)
+        seconds = time.perf_counter() - start
+        calls = repeat * len(files)
+        results[name] = {
+            "calls": calls,
+            "skipped_fixtures": len(all_files) - len(files),
+            "seconds": seconds,
+            "records_per_second": calls / seconds if seconds else 0.0,
+        }
+    results["_peak_rss_kb"] = peak_rss_kb()
+    return results
+
+
+def bench_import():
+    """Time importing the CLI in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import utk_exodus.exodus"], cwd=project_path, check=True
+    )
+    return {"seconds": time.perf_counter() - start}
+
+
+def in_child(function, *args):
+    """Run a benchmark in a fresh process so its peak RSS isn't shared with the others."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def run(count, repeat, config):
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "count": count,
+        "config": config,
+        "import": bench_import(),
+    }
+    with tempfile.TemporaryDirectory() as fixtures_copy:
+        for path in fixture_files():
+            shutil.copy(path, fixtures_copy)
+        results["mapping_fixtures"] = in_child(bench_mapping, fixtures_copy, config)
+    with tempfile.TemporaryDirectory() as corpus:
+        build_synthetic_corpus(corpus, count)
+        results["mapping_synthetic"] = in_child(
+            bench_mapping,
+            str(Path(corpus) / "mods"),
+            config,
+            str(Path(corpus) / "risearch.jsonl"),
+        )
+    results["properties"] = in_child(bench_properties, repeat)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(current, baseline):
+    """Print how each timing changed relative to an earlier run."""
+    rows = [
+        ("import", current["import"]["seconds"], baseline["import"]["seconds"]),
+        (
+            "mapping_fixtures",
+            current["mapping_fixtures"]["seconds"],
+            baseline["mapping_fixtures"]["seconds"],
+        ),
+    ]
+    if "mapping_synthetic" in current and "mapping_synthetic" in baseline:
+        rows.append(
+            (
+                "mapping_synthetic",
+                current["mapping_synthetic"]["seconds"],
+                baseline["mapping_synthetic"]["seconds"],
+            )
+        )
+    for name, values in current["properties"].items():
+        if not name.startswith("_") and name in baseline["properties"]:
+            rows.append(
+                (name, values["seconds"], baseline["properties"][name]["seconds"])
+            )
+    print(f"{'benchmark':<30}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, now, before in rows:
+        change = (now - before) / before * 100 if before else 0.0
+        print(f"{name:<30}{before:>12.4f}{now:>12.4f}{change:>9.1f}%")
+    return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark metadata extraction.")
+    parser.add_argument(
+        "-o", "--output", dest="output", help="Where to write the JSON results."
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        dest="count",
+        type=int,
+        default=1000,
+        help="How many works to put in the synthetic corpus.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        dest="repeat",
+        type=int,
+        default=20,
+        help="How many times to run each special property over the fixtures.",
+    )
+    parser.add_argument(
+        "-c", "--config", dest="config", default="utk_dc.yml", help="Mapping config."
+    )
+    parser.add_argument(
+        "--compare", dest="compare", help="A previous JSON result to compare against."
+    )
+    args = parser.parse_args()
+    os.environ.setdefault("TQDM_DISABLE", "1")
+    results = run(args.count, args.repeat, args.config)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
@@ -0,0 +1,353 @@
+"""Generate a synthetic corpus for load testing.
+
+Builds MODS records by recombining and mutating the elements found in the MODS fixtures in tests/fixtures: names pick
+up extra roles, subjects get new valueURIs, dates become EDTF ranges, and titles switch between plain, supplied and
+alternative forms. For every record it also writes a RELS-EXT, a POLICY based on one of the POLICY fixtures, and a line
+of Resource Index stand-in data so `standin.py` can answer risearch queries offline:
+
+    output/
+        mods/{pid}_MODS.xml
+        rels_ext/{pid}_RELS-EXT.xml
+        policies/{pid}_POLICY.xml
+        risearch.jsonl
+
+Usage:
+
+    python benchmarks/generate_corpus.py --count 10000 --output /tmp/corpus
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+from collections import defaultdict
+from pathlib import Path
+from lxml import etree
+from tqdm import tqdm
+
+fixtures_path = Path(__file__).parent.parent / "tests" / "fixtures"
+
+MODS = "http://www.loc.gov/mods/v3"
+XLINK = "http://www.w3.org/1999/xlink"
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RELS_EXT = "info:fedora/fedora-system:def/relations-external#"
+FEDORA_MODEL = "info:fedora/fedora-system:def/model#"
+ISLANDORA = "http://islandora.ca/ontology/relsext#"
+
+# Work type, content model, and relative weight in the corpus.
+MODELS = {
+    "large_image": ("info:fedora/islandora:sp_large_image_cmodel", 35),
+    "image": ("info:fedora/islandora:sp_basic_image", 15),
+    "book": ("info:fedora/islandora:bookCModel", 15),
+    "pdf": ("info:fedora/islandora:sp_pdf", 10),
+    "audio": ("info:fedora/islandora:sp-audioCModel", 10),
+    "video": ("info:fedora/islandora:sp_videoCModel", 5),
+    "compound": ("info:fedora/islandora:compoundCModel", 10),
+}
+
+DATASTREAMS = {
+    "large_image": ["DC", "RELS-EXT", "MODS", "POLICY", "OBJ", "JP2", "TN", "JPG", "TECHMD"],
+    "image": ["DC", "RELS-EXT", "MODS", "POLICY", "OBJ", "TN", "MEDIUM_SIZE", "TECHMD"],
+    "book": ["DC", "RELS-EXT", "MODS", "POLICY", "TN", "PDF"],
+    "page": ["DC", "RELS-EXT", "POLICY", "OBJ", "JP2", "TN", "JPG", "OCR", "HOCR", "TECHMD"],
+    "pdf": ["DC", "RELS-EXT", "MODS", "POLICY", "OBJ", "PDFA", "TN", "PREVIEW", "FULL_TEXT"],
+    "audio": ["DC", "RELS-EXT", "MODS", "POLICY", "OBJ", "PROXY_MP3", "TN", "TRANSCRIPT"],
+    "video": ["DC", "RELS-EXT", "MODS", "POLICY", "OBJ", "MP4", "TN", "TRANSCRIPT"],
+    "compound": ["DC", "RELS-EXT", "MODS", "POLICY", "TN"],
+}
+
+# Which POLICY fixture to base a record's policy on, and its relative weight.
+POLICIES = {
+    "rfta_8_POLICY.xml": 80,
+    "voloh_10_POLICY.xml": 10,
+    "bass_10900_POLICY.xml": 10,
+}
+
+
+class CorpusGenerator:
+    """Generate synthetic MODS, RELS-EXT, POLICY and Resource Index data from the fixtures.
+
+    Args:
+        fixtures (str): The directory of MODS and POLICY fixtures to recombine.
+        seed (int): The random seed, so the same arguments always produce the same corpus.
+        namespace (str): The pid namespace of generated objects.
+        collection (str): The collection every generated work belongs to.
+    """
+
+    def __init__(
+        self,
+        fixtures=fixtures_path,
+        seed=0,
+        namespace="synthetic",
+        collection="collections:synthetic",
+    ):
+        self.random = random.Random(seed)
+        self.namespace = namespace
+        self.collection = collection
+        self.pools, self.counts = self.__build_pools(Path(fixtures))
+        self.roles = [
+            role
+            for name in self.pools.get("name", [])
+            for role in name.iterfind(f"{{{MODS}}}role")
+        ]
+        self.policies = {
+            policy: (Path(fixtures) / policy).read_bytes() for policy in POLICIES
+        }
+        self.next_pid = 1
+
+    @staticmethod
+    def __build_pools(fixtures):
+        pools = defaultdict(list)
+        counts = defaultdict(list)
+        for path in sorted(fixtures.glob("*.xml")):
+            if path.name.endswith("_POLICY.xml"):
+                continue
+            root = etree.parse(str(path)).getroot()
+            seen = defaultdict(int)
+            for child in root:
+                if not isinstance(child.tag, str):
+                    continue
+                tag = etree.QName(child).localname
+                pools[tag].append(child)
+                seen[tag] += 1
+            for tag in pools:
+                counts[tag].append(seen.get(tag, 0))
+        return pools, counts
+
+    def __pid(self):
+        pid = f"{self.namespace}:{self.next_pid}"
+        self.next_pid += 1
+        return pid
+
+    def __choose(self, weights):
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def __uri(self, uri):
+        # Keep the authority but give the record its own identifier at the end of the URI.
+        base = uri.rstrip("/").rsplit("/", 1)[0]
+        return f"{base}/sh{self.random.randint(10000000, 99999999)}"
+
+    def __mutate_title(self, title_info):
+        variant = self.random.random()
+        if variant < 0.15:
+            title_info.set("supplied", "yes")
+        elif variant < 0.25:
+            title_info.set("type", "alternative")
+        elif variant < 0.35:
+            part_name = etree.SubElement(title_info, f"{{{MODS}}}partName")
+            part_name.text = f"Part {self.random.randint(1, 12)}"
+        return [title_info]
+
+    def __mutate_name(self, name):
+        if self.roles and self.random.random() < 0.3:
+            name.append(copy.deepcopy(self.random.choice(self.roles)))
+        if name.get("valueURI") and self.random.random() < 0.5:
+            name.set("valueURI", self.__uri(name.get("valueURI")))
+        return [name]
+
+    def __mutate_subject(self, subject):
+        for element in [subject] + list(subject.iter(f"{{{MODS}}}topic")):
+            if element.get("valueURI"):
+                element.set("valueURI", self.__uri(element.get("valueURI")))
+        return [subject]
+
+    def __mutate_origin_info(self, origin_info):
+        if self.random.random() < 0.4:
+            for date in origin_info.findall(f"{{{MODS}}}dateCreated[@encoding='edtf']"):
+                origin_info.remove(date)
+            start = self.random.randint(1780, 1990)
+            end = start + self.random.randint(1, 30)
+            if self.random.random() < 0.5:
+                for point, year in (("start", start), ("end", end)):
+                    date = etree.SubElement(
+                        origin_info,
+                        f"{{{MODS}}}dateCreated",
+                        encoding="edtf",
+                        point=point,
+                    )
+                    date.text = str(year)
+            else:
+                date = etree.SubElement(
+                    origin_info, f"{{{MODS}}}dateCreated", encoding="edtf"
+                )
+                date.text = f"{start}-{self.random.randint(1, 12):02d}/{end}"
+        return [origin_info]
+
+    def __mutate(self, tag, element):
+        mutations = {
+            "titleInfo": self.__mutate_title,
+            "name": self.__mutate_name,
+            "subject": self.__mutate_subject,
+            "originInfo": self.__mutate_origin_info,
+        }
+        if tag in mutations:
+            return mutations[tag](element)
+        return [element]
+
+    def mods(self, pid):
+        """Build one MODS record.
+
+        Args:
+            pid (str): The pid of the record, used for its local identifier.
+
+        Returns:
+            lxml.etree._Element: The MODS record.
+        """
+        root = etree.Element(f"{{{MODS}}}mods", nsmap={None: MODS, "xlink": XLINK})
+        for tag, pool in self.pools.items():
+            if tag == "identifier":
+                continue
+            count = self.random.choice(self.counts[tag])
+            if tag == "titleInfo":
+                count = max(count, 1)
+            for element in self.random.sample(pool, min(count, len(pool))):
+                for mutated in self.__mutate(tag, copy.deepcopy(element)):
+                    root.append(mutated)
+        identifier = etree.SubElement(root, f"{{{MODS}}}identifier", type="local")
+        identifier.text = pid.replace(":", "_")
+        return root
+
+    @staticmethod
+    def rels_ext(pid, relationships):
+        """Build a RELS-EXT for a pid from a list of (namespace, predicate, object, is_literal)."""
+        root = etree.Element(
+            f"{{{RDF}}}RDF",
+            nsmap={
+                "rdf": RDF,
+                "fedora": RELS_EXT,
+                "fedora-model": FEDORA_MODEL,
+                "islandora": ISLANDORA,
+            },
+        )
+        description = etree.SubElement(
+            root, f"{{{RDF}}}Description", {f"{{{RDF}}}about": f"info:fedora/{pid}"}
+        )
+        for namespace, predicate, value, is_literal in relationships:
+            element = etree.SubElement(description, f"{{{namespace}}}{predicate}")
+            if is_literal:
+                element.text = value
+            else:
+                element.set(f"{{{RDF}}}resource", value)
+        return root
+
+    def records(self, count):
+        """Yield the files and Resource Index stand-in data for `count` works and their pages and parts."""
+        for _ in range(count):
+            work_type = self.__choose({k: v[1] for k, v in MODELS.items()})
+            content_model = MODELS[work_type][0]
+            pid = self.__pid()
+            policy = self.policies[self.__choose(POLICIES)]
+            children = []
+            if work_type == "book":
+                for sequence in range(1, self.random.randint(2, 20) + 1):
+                    children.append((self.__pid(), "page", sequence))
+            elif work_type == "compound":
+                for sequence in range(1, self.random.randint(2, 6) + 1):
+                    children.append((self.__pid(), "large_image", sequence))
+            yield {
+                "pid": pid,
+                "mods": self.mods(pid),
+                "rels_ext": self.rels_ext(
+                    pid,
+                    [
+                        (FEDORA_MODEL, "hasModel", content_model, False),
+                        (RELS_EXT, "isMemberOfCollection", f"info:fedora/{self.collection}", False),
+                    ],
+                ),
+                "policy": policy,
+                "risearch": {
+                    "pid": pid,
+                    "model": content_model,
+                    "work_type": work_type,
+                    "parents": [self.collection],
+                    "datastreams": DATASTREAMS[work_type],
+                    "pages": [
+                        {"pid": f"info:fedora/{child}", "page": str(sequence), "title": f"Page {sequence}"}
+                        for child, child_type, sequence in children
+                        if child_type == "page"
+                    ],
+                    "parts": [
+                        {
+                            "pid": f"info:fedora/{child}",
+                            "sequence": str(sequence),
+                            "model": MODELS[child_type][0],
+                        }
+                        for child, child_type, sequence in children
+                        if child_type != "page"
+                    ],
+                },
+            }
+            for child, child_type, sequence in children:
+                if child_type == "page":
+                    relationships = [
+                        (FEDORA_MODEL, "hasModel", "info:fedora/islandora:pageCModel", False),
+                        (RELS_EXT, "isMemberOf", f"info:fedora/{pid}", False),
+                        (ISLANDORA, "isPageOf", f"info:fedora/{pid}", False),
+                        (ISLANDORA, "isSequenceNumber", str(sequence), True),
+                        (ISLANDORA, "isPageNumber", str(sequence), True),
+                        (ISLANDORA, "isSection", "1", True),
+                    ]
+                    model = "info:fedora/islandora:pageCModel"
+                else:
+                    relationships = [
+                        (FEDORA_MODEL, "hasModel", MODELS[child_type][0], False),
+                        (RELS_EXT, "isConstituentOf", f"info:fedora/{pid}", False),
+                        (ISLANDORA, f"isSequenceNumberOf{pid.replace(':', '_')}", str(sequence), True),
+                    ]
+                    model = MODELS[child_type][0]
+                yield {
+                    "pid": child,
+                    "mods": None,
+                    "rels_ext": self.rels_ext(child, relationships),
+                    "policy": policy,
+                    "risearch": {
+                        "pid": child,
+                        "model": model,
+                        "work_type": child_type,
+                        "parents": [pid],
+                        "datastreams": DATASTREAMS[child_type],
+                        "pages": [],
+                        "parts": [],
+                    },
+                }
+
+    def write(self, output, count):
+        """Write a corpus of `count` works (plus their pages and parts) to a directory.
+
+        Args:
+            output (str): The directory to write to.
+            count (int): The number of works to generate.
+        """
+        for directory in ("mods", "rels_ext", "policies"):
+            os.makedirs(os.path.join(output, directory), exist_ok=True)
+        with open(os.path.join(output, "risearch.jsonl"), "w") as risearch:
+            for record in tqdm(self.records(count), desc="Generating"):
+                pid = record["pid"]
+                if record["mods"] is not None:
+                    with open(os.path.join(output, "mods", f"{pid}_MODS.xml"), "wb") as f:
+                        f.write(etree.tostring(record["mods"], xml_declaration=True, encoding="UTF-8", pretty_print=True))
+                with open(os.path.join(output, "rels_ext", f"{pid}_RELS-EXT.xml"), "wb") as f:
+                    f.write(etree.tostring(record["rels_ext"], xml_declaration=True, encoding="UTF-8", pretty_print=True))
+                with open(os.path.join(output, "policies", f"{pid}_POLICY.xml"), "wb") as f:
+                    f.write(record["policy"])
+                risearch.write(json.dumps(record["risearch"]) + "\n")
+        return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic MODS corpus.")
+    parser.add_argument(
+        "-n", "--count", dest="count", type=int, default=1000, help="Number of works to generate."
+    )
+    parser.add_argument(
+        "-o", "--output", dest="output", required=True, help="Directory to write the corpus to."
+    )
+    parser.add_argument(
+        "-s", "--seed", dest="seed", type=int, default=0, help="Random seed."
+    )
+    parser.add_argument(
+        "--namespace", dest="namespace", default="synthetic", help="Pid namespace."
+    )
+    args = parser.parse_args()
+    CorpusGenerator(seed=args.seed, namespace=args.namespace).write(args.output, args.count)
@@ -0,0 +1,83 @@
+"""Answer Resource Index queries from a corpus written by generate_corpus.py instead of risearch.
+
+    from benchmarks.standin import install
+    install("/tmp/corpus/risearch.jsonl")
+"""
+
+import json
+from utk_exodus.risearch import ResourceIndexSearch
+
+
+class ResourceIndexStandIn:
+    """Resource Index answers loaded from the risearch.jsonl of a synthetic corpus.
+
+    Args:
+        path (str): The path to risearch.jsonl.
+    """
+
+    def __init__(self, path):
+        self.objects = {}
+        with open(path) as lines:
+            for line in lines:
+                record = json.loads(line)
+                self.objects[record["pid"]] = record
+
+    def __get(self, pid):
+        return self.objects.get(pid.replace("info:fedora/", ""), {})
+
+    def get_islandora_work_type(self, pid):
+        return self.__get(pid).get("model", "")
+
+    def get_parent_collections(self, pid):
+        return list(self.__get(pid).get("parents", []))
+
+    def find_pages_in_book(self, book):
+        return list(self.__get(book).get("pages", []))
+
+    def get_compound_object_parts(self, compound_object):
+        return list(self.__get(compound_object).get("parts", []))
+
+    def get_files(self, pid):
+        return list(self.__get(pid).get("datastreams", []))
+
+    def get_works_based_on_type_and_collection(self, work_type, collection):
+        return [
+            f"info:fedora/{pid}"
+            for pid, record in self.objects.items()
+            if record["work_type"] == work_type and collection in record["parents"]
+        ]
+
+    def get_policies_based_on_type_and_collection(self, work_type, collection):
+        policies = []
+        for pid in self.get_works_based_on_type_and_collection(work_type, collection):
+            policies.append(pid)
+            if work_type == "book":
+                policies.extend(page["pid"] for page in self.find_pages_in_book(pid))
+        return policies
+
+
+def install(path):
+    """Patch ResourceIndexSearch so every instance answers from the stand-in.
+
+    Args:
+        path (str): The path to risearch.jsonl.
+
+    Returns:
+        ResourceIndexStandIn: The stand-in now answering queries.
+    """
+    standin = ResourceIndexStandIn(path)
+    for method in (
+        "get_islandora_work_type",
+        "get_parent_collections",
+        "find_pages_in_book",
+        "get_compound_object_parts",
+        "get_files",
+        "get_works_based_on_type_and_collection",
+        "get_policies_based_on_type_and_collection",
+    ):
+        setattr(
+            ResourceIndexSearch,
+            method,
+            lambda self, *args, _method=getattr(standin, method): _method(*args),
+        )
+    return standin
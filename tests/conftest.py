@@ -0,0 +1,24 @@
+import pytest
+import threading
+from http.server import ThreadingHTTPServer
+
+
+@pytest.fixture
+def http_server():
+    """Start a local HTTP server for a request handler class and return its base URL.
+
+    Every server started in a test is shut down when the test ends.
+    """
+    servers = []
+
+    def start(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,111 @@
+import csv
+import hashlib
+import pytest
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from utk_exodus.checksum import HashSheet
+
+CONTENT = b"II*\x00 not really a tiff"
+
+CHECKSUMS = {
+    "harp:1": ("SHA-1", hashlib.sha1(CONTENT).hexdigest()),
+    "harp:2": ("MD5", hashlib.md5(CONTENT).hexdigest()),
+    "harp:3": ("DISABLED", "none"),
+    "harp:4": ("MD5", "0" * 32),
+    "harp:5": ("MD5", "0" * 32),
+}
+
+MISSING = {"harp:5"}
+
+PROFILE = """<datastreamProfile xmlns="http://www.fedora.info/definitions/1/0/management/" pid="{pid}" dsID="OBJ">
+<dsLabel>OBJ</dsLabel><dsMIME>image/tiff</dsMIME><dsSize>{size}</dsSize>
+<dsChecksumType>{checksum_type}</dsChecksumType><dsChecksum>{checksum}</dsChecksum>
+</datastreamProfile>"""
+
+
+class Fedora(BaseHTTPRequestHandler):
+    """Serves OBJ profiles under /objects and OBJ content under /islandora/object, and records content requests.
+
+    Content for pids in MISSING is a 404.
+    """
+
+    downloads = []
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.split("/")
+        if parts[1] == "objects":
+            checksum_type, checksum = CHECKSUMS[parts[2]]
+            body = PROFILE.format(
+                pid=parts[2], size=len(CONTENT), checksum_type=checksum_type, checksum=checksum
+            ).encode("utf-8")
+        else:
+            Fedora.downloads.append(parts[3])
+            if parts[3] in MISSING:
+                self.send_error(404)
+                return
+            body = CONTENT
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(
+    params=[
+        {
+            "expected_results": {
+                "rows": {
+                    "harp:1": ("fedora", "", False),
+                    "harp:2": ("download", "match", False),
+                    "harp:3": ("download", "", False),
+                    "harp:4": ("download", "mismatch", False),
+                    "harp:5": ("error", "", True),
+                },
+                "downloads": ["harp:2", "harp:3", "harp:4", "harp:5"],
+            },
+        },
+    ]
+)
+def fixture(request, tmp_path, http_server):
+    request.param["fedora_uri"] = http_server(Fedora)
+    sheets = tmp_path / "bad_imports"
+    sheets.mkdir()
+    with open(sheets / "errored_entries.csv", "w", newline="") as sheet:
+        writer = csv.DictWriter(sheet, fieldnames=["source_identifier", "model", "remote_files"])
+        writer.writeheader()
+        for pid in CHECKSUMS:
+            writer.writerow(
+                {
+                    "source_identifier": f"{pid}_OBJ_fileset",
+                    "model": "FileSet",
+                    "remote_files": f"{request.param['fedora_uri']}/islandora/object/{pid}/datastream/OBJ",
+                }
+            )
+    request.param["path"] = str(sheets)
+    Fedora.downloads = []
+    return request.param
+
+
+def test_verify_uses_stored_checksums(fixture, tmp_path):
+    output = tmp_path / "checksums.csv"
+    HashSheet(
+        fixture["path"],
+        str(output),
+        verify=True,
+        auth=("user", "pass"),
+        fedora_uri=fixture["fedora_uri"],
+        workers=4,
+    ).write()
+    with open(output, newline="") as sheet:
+        rows = {row["pid"]: row for row in csv.DictReader(sheet)}
+    assert {
+        pid: (row["source"], row["verified"], bool(row["message"])) for pid, row in rows.items()
+    } == fixture["expected_results"]["rows"]
+    assert {row["checksum"] for pid, row in rows.items() if pid not in MISSING} == {
+        hashlib.sha1(CONTENT).hexdigest()
+    }
+    assert {rows[pid]["checksum"] for pid in MISSING} == {""}
+    assert sorted(Fedora.downloads) == fixture["expected_results"]["downloads"]
@@ -0,0 +1,41 @@
+import pytest
+from lxml import etree
+from utk_exodus.collection import RoleMatcher
+from pathlib import Path
+
+# Set path to fixtures
+fixtures_path = Path(__file__).parent / "fixtures"
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "harp_1.xml",
+            "expected_results": {
+                "utk_contributor": "",
+                "utk_creator": "Swan, W. H. (William H.) | Swan, Marcus Lafayette | Swan, W. H. (William H.) | Swan, Marcus Lafayette",
+            }
+        },
+        {
+            "filename": "playbills1052.xml",
+            "expected_results": {
+                "utk_contributor": "Krasna, Norman",
+                "utk_creator": "",
+            }
+        },
+        {
+            "filename": "utsmc725.xml",
+            "expected_results": {
+                "utk_contributor": "",
+                "utk_creator": "Thomas, Ambroise, 1811-1896 | Chapman, Henry Grafton",
+            }
+        }
+    ]
+)
+def fixture(request):
+    request.param["fixtures_path"] = fixtures_path / request.param.get("filename")
+    return request.param
+
+def test_role_matcher(fixture):
+    matcher = RoleMatcher()
+    results = matcher.find(etree.parse(str(fixture.get("fixtures_path"))))
+    assert results == fixture["expected_results"]
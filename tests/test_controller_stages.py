@@ -0,0 +1,96 @@
+import csv
+import pytest
+from utk_exodus.controller import InterfaceController
+
+
+@pytest.fixture(
+    params=[
+        {
+            "run": "collections:harp book utk_dc.yml",
+            "expected_results": {
+                "first": ["metadata", "file_info"],
+                "first_manifest": {"metadata": "success", "file_info": "failure"},
+                "resumed": ["file_info", "validate"],
+                "resumed_manifest": {"metadata": "success", "file_info": "success", "validate": "success"},
+            },
+        },
+    ]
+)
+def fixture(request, tmp_path):
+    request.param["output"] = str(tmp_path / "harp")
+    return request.param
+
+
+def stages(output, calls, fail):
+    works = f"{output}/tmp/works.csv"
+
+    def metadata():
+        calls.append("metadata")
+        with open(works, "w") as sheet:
+            sheet.write("source_identifier\nharp_1\n")
+        return {"artifacts": [works]}
+
+    def file_info():
+        calls.append("file_info")
+        if fail:
+            raise ConnectionError("m3 profile unavailable")
+        with open(works) as sheet:
+            assert sheet.read() == "source_identifier\nharp_1\n"
+        return {"artifacts": [works]}
+
+    def validate():
+        calls.append("validate")
+
+    return [("metadata", metadata), ("file_info", file_info), ("validate", validate)]
+
+
+def run(fixture, calls, fail, resume, **options):
+    controller = InterfaceController(
+        "utk_dc", fixture["output"], "https://example.edu/", 800, resume=resume, **options
+    )
+    controller.run_stages(fixture["run"], stages(fixture["output"], calls, fail))
+
+
+def statuses(output):
+    with open(f"{output}/run_manifest.csv", newline="") as manifest:
+        return {row["stage"]: row["status"] for row in csv.DictReader(manifest)}
+
+
+def test_resume_starts_at_first_unfinished_stage(fixture, tmp_path):
+    (tmp_path / "harp" / "tmp").mkdir(parents=True)
+    calls = []
+    with pytest.raises(ConnectionError):
+        run(fixture, calls, fail=True, resume=False)
+    assert calls == fixture["expected_results"]["first"]
+    assert statuses(fixture["output"]) == fixture["expected_results"]["first_manifest"]
+    calls = []
+    run(fixture, calls, fail=False, resume=True)
+    assert calls == fixture["expected_results"]["resumed"]
+    assert statuses(fixture["output"]) == fixture["expected_results"]["resumed_manifest"]
+
+
+def test_resume_reruns_stage_whose_artifact_is_gone(fixture, tmp_path):
+    (tmp_path / "harp" / "tmp").mkdir(parents=True)
+    with pytest.raises(ConnectionError):
+        run(fixture, [], fail=True, resume=False)
+    (tmp_path / "harp" / "tmp" / "works.csv").unlink()
+    calls = []
+    run(fixture, calls, fail=False, resume=True)
+    assert calls == ["metadata", "file_info", "validate"]
+
+
+def test_run_without_resume_starts_over(fixture, tmp_path):
+    (tmp_path / "harp" / "tmp").mkdir(parents=True)
+    run(fixture, [], fail=False, resume=False)
+    calls = []
+    run(fixture, calls, fail=False, resume=False)
+    assert calls == ["metadata", "file_info", "validate"]
+
+
+def test_resume_with_other_options_starts_over(fixture, tmp_path):
+    (tmp_path / "harp" / "tmp").mkdir(parents=True)
+    with pytest.raises(ConnectionError):
+        run(fixture, [], fail=True, resume=False)
+    calls = []
+    run(fixture, calls, fail=False, resume=True, dedupe=True)
+    assert calls == ["metadata", "file_info", "validate"]
@@ -0,0 +1,103 @@
+import csv
+import pytest
+from pathlib import Path
+from utk_exodus.curate import FileCurator
+
+fixtures_path = Path(__file__).parent / "fixtures" / "sheets"
+
+
+def read(path):
+    with open(path, newline="") as sheet:
+        return [row["source_identifier"] for row in csv.DictReader(sheet)]
+
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "harp_import.csv",
+            "curation_type": "both",
+            "expected_results": {
+                "counts": {"works_and_collections": 4, "files_and_attachments": 6, "sheets": 2},
+                "works": ["collections_harp", "harp_1", "harp_2", "harp_3"],
+                "files": [
+                    ["harp_1_OBJ", "harp_1_MODS", "harp_2_OBJ", "harp_2_MODS"],
+                    ["harp_3_OBJ", "harp_3_MODS"],
+                ],
+            },
+        },
+        {
+            "filename": "harp_import.csv",
+            "curation_type": "filesets",
+            "expected_results": {
+                "counts": {"works_and_collections": 4, "files_and_attachments": 3, "sheets": 1},
+                "works": ["collections_harp", "harp_1", "harp_2", "harp_3"],
+                "files": [["harp_1_OBJ", "harp_2_OBJ", "harp_3_OBJ"]],
+            },
+        },
+    ]
+)
+def fixture(request):
+    request.param["filename"] = fixtures_path / request.param["filename"]
+    return request.param
+
+
+def test_split_in_one_pass(fixture, tmp_path):
+    curator = FileCurator(fixture["filename"], curation_type=fixture["curation_type"])
+    counts = curator.split(
+        str(tmp_path / "files.csv"),
+        str(tmp_path / "works.csv"),
+        multi_sheets=True,
+        attachments_per_sheet=4,
+    )
+    assert counts == fixture["expected_results"]["counts"]
+    assert read(tmp_path / "works.csv") == fixture["expected_results"]["works"]
+    assert [
+        read(tmp_path / f"files_{i}.csv") for i in range(counts["sheets"])
+    ] == fixture["expected_results"]["files"]
+    assert not (tmp_path / f"files_{counts['sheets']}.csv").exists()
+
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "harp_book_import.csv",
+            "sizes": {
+                ("harp:1", "OBJ"): 100,
+                ("harp:1", "PRESERVE"): 900,
+                ("harp:2", "OBJ"): 100,
+                ("harp:2", "PRESERVE"): 900,
+                ("harp:3", "OBJ"): 500,
+                ("harp:4", "OBJ"): 500,
+                ("harp:5", "PDF"): 200,
+                ("harp:6", "OBJ"): 300,
+                ("harp:6", "OCR"): 50,
+                ("harp:7", "OBJ"): 300,
+                ("harp:7", "OCR"): 50,
+            },
+            "expected_results": {
+                "bytes": [1500, 1500, 900],
+                "works": [["harp_1", "harp_3"], ["harp_2", "harp_4"], ["harp_5", "harp_6", "harp_7"]],
+            },
+        },
+    ]
+)
+def bundle_fixture(request):
+    request.param["filename"] = fixtures_path / request.param["filename"]
+    return request.param
+
+
+def test_bundle_keeps_works_together_and_balances_bytes(bundle_fixture, tmp_path):
+    curator = FileCurator(bundle_fixture["filename"])
+    counts = curator.bundle(
+        str(tmp_path / "files.csv"),
+        str(tmp_path / "works.csv"),
+        attachments_per_sheet=10,
+        sizes=bundle_fixture["sizes"],
+    )
+    assert counts["bytes"] == bundle_fixture["expected_results"]["bytes"]
+    assert counts["files_and_attachments"] == 22
+    works = [
+        sorted({row.split("_")[0] + "_" + row.split("_")[1] for row in read(tmp_path / f"files_{i}.csv")})
+        for i in range(counts["sheets"])
+    ]
+    assert works == bundle_fixture["expected_results"]["works"]
@@ -0,0 +1,39 @@
+import json
+import pytest
+import subprocess
+import sys
+from pathlib import Path
+
+# Set path to the project
+project_path = Path(__file__).parent.parent
+
+# Heavy dependencies that only some commands need.
+HEAVY_MODULES = ["lxml", "requestium", "requests", "selenium", "tqdm", "xmltodict", "yaml"]
+
+def import_in_subprocess(statement):
+    script = (
+        "import json, sys\n"
+        f"{statement}\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=project_path, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+@pytest.fixture(
+    params=[
+        {"statement": "import utk_exodus.exodus"},
+        {"statement": "import utk_exodus"},
+    ]
+)
+def fixture(request):
+    return request.param
+
+def test_no_heavy_imports_at_startup(fixture):
+    results = import_in_subprocess(fixture["statement"])
+    imported = [
+        module for module in HEAVY_MODULES
+        if any(name == module or name.startswith(f"{module}.") for name in results)
+    ]
+    assert imported == []
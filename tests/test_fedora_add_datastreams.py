@@ -0,0 +1,45 @@
+import pytest
+from http.server import BaseHTTPRequestHandler
+from utk_exodus.fedora import DatastreamUploader
+
+
+class Fedora(BaseHTTPRequestHandler):
+    """Accepts every addDatastream except the ones for pids starting with `fail`."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(500 if self.path.startswith("/objects/fail") else 201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(
+    params=[
+        {
+            "files": ["harp:1_OBJ.tif", "harp:2_TRANSCRIPT.vtt", "fail:3_OBJ.tif"],
+            "expected_results": [
+                {"success": 2, "skipped": 0, "failure": 1},
+                {"success": 0, "skipped": 2, "failure": 1},
+            ],
+        },
+    ]
+)
+def fixture(request, tmp_path, http_server):
+    files = tmp_path / "files"
+    files.mkdir()
+    for name in request.param["files"]:
+        (files / name).write_bytes(b"content")
+    request.param["fedora_uri"] = http_server(Fedora)
+    request.param["path"] = str(files)
+    request.param["manifest"] = str(tmp_path / "manifest.csv")
+    return request.param
+
+def test_rerun_skips_added_datastreams(fixture):
+    for expected in fixture["expected_results"]:
+        uploader = DatastreamUploader(
+            fixture["path"], ("user", "pass"), fixture["fedora_uri"], fixture["manifest"], workers=2
+        )
+        assert uploader.run() == expected
@@ -0,0 +1,122 @@
+import pytest
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from utk_exodus.fedora import DatastreamIndex
+
+DATASTREAMS = {
+    "OBJ": ("image/tiff", 48213094, "SHA-1", "4a6f1c0c9b6d1e2f0a1b2c3d4e5f60718293a4b5"),
+    "MODS": ("application/xml", 5120, "DISABLED", "none"),
+}
+
+LISTING = """<objectDatastreams xmlns="http://www.fedora.info/definitions/1/0/access/" pid="{pid}">
+{datastreams}
+</objectDatastreams>"""
+
+PROFILE = """<datastreamProfile xmlns="http://www.fedora.info/definitions/1/0/management/" pid="{pid}" dsID="{dsid}">
+<dsLabel>{dsid}</dsLabel><dsCreateDate>2016-01-01T00:00:00.000Z</dsCreateDate><dsControlGroup>M</dsControlGroup>
+<dsMIME>{mime}</dsMIME><dsSize>{size}</dsSize><dsChecksumType>{checksum_type}</dsChecksumType>
+<dsChecksum>{checksum}</dsChecksum>
+</datastreamProfile>"""
+
+
+class Fedora(BaseHTTPRequestHandler):
+    """Serves listDatastreams for the datastreams in `dsids` and their profiles, and a 404 for pids starting with `fail`."""
+
+    requests = []
+    dsids = ["OBJ", "MODS"]
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.split("/")
+        pid = parts[2]
+        Fedora.requests.append(self.path)
+        if pid.startswith("fail"):
+            body, status = b"", 404
+        elif len(parts) == 4:
+            datastreams = "\n".join(
+                f'<datastream dsid="{dsid}" label="{dsid}" mimeType="{DATASTREAMS[dsid][0]}"/>' for dsid in Fedora.dsids
+            )
+            body, status = LISTING.format(pid=pid, datastreams=datastreams).encode("utf-8"), 200
+        else:
+            mime, size, checksum_type, checksum = DATASTREAMS[parts[4]]
+            body = PROFILE.format(
+                pid=pid,
+                dsid=parts[4],
+                mime=mime,
+                size=size,
+                checksum_type=checksum_type,
+                checksum=checksum,
+            ).encode("utf-8")
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(
+    params=[
+        {
+            "pids": ["info:fedora/harp:1", "harp:2", "fail:3"],
+            "expected_results": {
+                "runs": [
+                    {"indexed": 2, "skipped": 0, "failure": 1},
+                    {"indexed": 0, "skipped": 2, "failure": 1},
+                ],
+                "OBJ": {
+                    "pid": "harp:1",
+                    "dsid": "OBJ",
+                    "label": "OBJ",
+                    "control_group": "M",
+                    "created": "2016-01-01T00:00:00.000Z",
+                    "size": 48213094,
+                    "mime": "image/tiff",
+                    "checksum_type": "SHA-1",
+                    "checksum": "4a6f1c0c9b6d1e2f0a1b2c3d4e5f60718293a4b5",
+                },
+                "sizes": {
+                    ("harp:1", "OBJ"): 48213094,
+                    ("harp:1", "MODS"): 5120,
+                    ("harp:2", "OBJ"): 48213094,
+                    ("harp:2", "MODS"): 5120,
+                },
+            },
+        },
+    ]
+)
+def fixture(request, http_server):
+    request.param["fedora_uri"] = http_server(Fedora)
+    return request.param
+
+
+def test_harvest_indexes_profiles_and_resumes(fixture, tmp_path):
+    for expected in fixture["expected_results"]["runs"]:
+        with DatastreamIndex(str(tmp_path / "datastreams.db")) as index:
+            counts = index.harvest(
+                fixture["pids"], ("user", "pass"), fixture["fedora_uri"], workers=4
+            )
+            assert counts == expected
+    with DatastreamIndex(str(tmp_path / "datastreams.db")) as index:
+        assert index.get("harp:1", "OBJ") == fixture["expected_results"]["OBJ"]
+        assert index.get("harp:1", "MODS")["checksum_type"] == "DISABLED"
+        assert index.sizes() == fixture["expected_results"]["sizes"]
+
+
+def test_filtered_harvest_does_not_cover_full_harvest(fixture, tmp_path):
+    with DatastreamIndex(str(tmp_path / "datastreams.db")) as index:
+        assert index.harvest(["harp:1"], ("user", "pass"), fixture["fedora_uri"], dsids=["OBJ"])["indexed"] == 1
+        assert index.harvest(["harp:1"], ("user", "pass"), fixture["fedora_uri"], dsids=["OBJ"])["skipped"] == 1
+        assert index.harvest(["harp:1"], ("user", "pass"), fixture["fedora_uri"])["indexed"] == 1
+        assert index.harvest(["harp:1"], ("user", "pass"), fixture["fedora_uri"], dsids=["MODS"])["skipped"] == 1
+        assert set(index.sizes()) == {("harp:1", "OBJ"), ("harp:1", "MODS")}
+
+
+def test_refresh_drops_deleted_datastreams(fixture, tmp_path, monkeypatch):
+    with DatastreamIndex(str(tmp_path / "datastreams.db")) as index:
+        index.harvest(["harp:1"], ("user", "pass"), fixture["fedora_uri"])
+        monkeypatch.setattr(Fedora, "dsids", ["OBJ"])
+        index.harvest(["harp:1"], ("user", "pass"), fixture["fedora_uri"], refresh=True)
+        assert set(index.sizes()) == {("harp:1", "OBJ")}
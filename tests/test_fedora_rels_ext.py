@@ -0,0 +1,77 @@
+import pytest
+from lxml import etree
+from utk_exodus.fedora import FedoraObject, RelsExt
+from pathlib import Path
+
+# Set path to fixtures
+fixtures_path = Path(__file__).parent / "fixtures"
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+
+
+class Response:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+class Session:
+    """Answers the RELS-EXT read and keeps every write."""
+
+    def __init__(self, rels_ext):
+        self.rels_ext = rels_ext
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(("GET", url))
+        return Response(200, self.rels_ext)
+
+    def put(self, url, data=None, **kwargs):
+        self.requests.append(("PUT", url))
+        self.rels_ext = data
+        return Response(200)
+
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "rels_ext/beacon_35815_RELS-EXT.xml",
+            "pid": "beacon:35815",
+            "book": "beacon:35825",
+            "sequence": "12",
+            "expected_results": {
+                "http://islandora.ca/ontology/relsext#isPageOf": ["info:fedora/beacon:35825"],
+                "info:fedora/fedora-system:def/relations-external#isMemberOf": ["info:fedora/beacon:35825"],
+                "http://islandora.ca/ontology/relsext#isSequenceNumber": ["12"],
+                "http://islandora.ca/ontology/relsext#isPageNumber": ["12"],
+                "http://islandora.ca/ontology/relsext#isSection": ["12"],
+                "info:fedora/fedora-system:def/model#hasModel": ["info:fedora/islandora:pageCModel"],
+                "http://islandora.ca/ontology/relsext#generate_ocr": ["TRUE"],
+            }
+        },
+    ]
+)
+def fixture(request):
+    request.param["rels_ext"] = (fixtures_path / request.param["filename"]).read_bytes()
+    return request.param
+
+def test_move_page_writes_once(fixture):
+    session = Session(fixture["rels_ext"])
+    page = FedoraObject(("user", "pass"), "http://fedora", fixture["pid"], session)
+    page.move_page(fixture["book"], fixture["sequence"])
+    assert [method for method, _ in session.requests] == ["GET", "PUT"]
+    rels_ext = RelsExt(session.rels_ext)
+    for predicate, objects in fixture["expected_results"].items():
+        assert rels_ext.objects(predicate) == objects
+
+def test_resources_and_literals(fixture):
+    rels_ext = RelsExt(fixture["rels_ext"])
+    rels_ext.add("http://islandora.ca/ontology/relsext#isSequenceNumber", "11")
+    rels_ext.remove("http://islandora.ca/ontology/relsext#isSequenceNumber", "10")
+    rels_ext.add("info:fedora/fedora-system:def/relations-external#isMemberOf", "info:fedora/beacon:1", is_literal=False)
+    description = etree.fromstring(rels_ext.serialize()).find(f"{{{RDF}}}Description")
+    assert description.find("{http://islandora.ca/ontology/relsext#}isSequenceNumber").text == "11"
+    assert [
+        element.get(f"{{{RDF}}}resource")
+        for element in description.findall("{info:fedora/fedora-system:def/relations-external#}isMemberOf")
+    ] == ["info:fedora/beacon:35814", "info:fedora/beacon:1"]
@@ -0,0 +1,78 @@
+import os
+import pytest
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from utk_exodus.fedora import VersionHarvester
+
+VERSIONS = {
+    "2016-01-01T00:00:00.000Z": b"<mods>first</mods>",
+    "2020-06-01T00:00:00.000Z": b"<mods>second version</mods>",
+}
+
+HISTORY = """<datastreamHistory xmlns="http://www.fedora.info/definitions/1/0/management/" pid="{pid}" dsID="MODS">
+{profiles}
+</datastreamHistory>"""
+
+PROFILE = """<datastreamProfile pid="{pid}" dsID="MODS">
+<dsCreateDate>{created}</dsCreateDate><dsMIME>application/xml</dsMIME><dsSize>{size}</dsSize>
+</datastreamProfile>"""
+
+
+class Fedora(BaseHTTPRequestHandler):
+    """Serves MODS histories and versions, and no history at all for pids starting with `fail`."""
+
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        pid = url.path.split("/")[2]
+        Fedora.requests.append(self.path)
+        if pid.startswith("fail"):
+            body, status = b"", 404
+        elif url.path.endswith("/history"):
+            profiles = "".join(
+                PROFILE.format(pid=pid, created=created, size=len(content))
+                for created, content in VERSIONS.items()
+            )
+            body, status = HISTORY.format(pid=pid, profiles=profiles).encode("utf-8"), 200
+        else:
+            body, status = VERSIONS[parse_qs(url.query)["asOfDateTime"][0]], 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(
+    params=[
+        {
+            "pids": ["harp:1", "harp:2", "fail:3"],
+            "expected_results": [
+                {"success": 4, "skipped": 0, "failure": 1},
+                {"success": 0, "skipped": 4, "failure": 1},
+            ],
+        },
+    ]
+)
+def fixture(request, tmp_path, http_server):
+    request.param["fedora_uri"] = http_server(Fedora)
+    request.param["directory"] = str(tmp_path / "versions")
+    return request.param
+
+def test_rerun_skips_versions_on_disk(fixture):
+    for expected in fixture["expected_results"]:
+        harvester = VersionHarvester(
+            fixture["pids"], "MODS", fixture["directory"], ("user", "pass"), fixture["fedora_uri"], workers=4
+        )
+        assert harvester.run() == expected
+    assert sorted(os.listdir(fixture["directory"])) == [
+        "MODS_versions_manifest.csv",
+        "harp:1_MODS_2016-01-01T00:00:00.000Z.xml",
+        "harp:1_MODS_2020-06-01T00:00:00.000Z.xml",
+        "harp:2_MODS_2016-01-01T00:00:00.000Z.xml",
+        "harp:2_MODS_2020-06-01T00:00:00.000Z.xml",
+    ]
@@ -0,0 +1,39 @@
+import pytest
+from utk_exodus.finder import RDFTypeRules
+
+
+@pytest.fixture(
+    params=[
+        {
+            "query": ("Image", "OBJ", False),
+            "expected_results": "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile",
+        },
+        {
+            "query": ("Image", "OBJ", True),
+            "expected_results": "http://pcdm.org/use#IntermediateFile",
+        },
+        {
+            "query": ("Page", "OBJ", True),
+            "expected_results": "http://pcdm.org/use#IntermediateFile | http://pcdm.org/use#OriginalFile",
+        },
+        {
+            "query": ("Book", "ORIGINAL_EDITED", False),
+            "expected_results": "http://pcdm.org/file-format-types#Document | http://pcdm.org/use#ServiceFile",
+        },
+        {
+            "query": ("CompoundObject", "OBJ", True),
+            "expected_results": "http://pcdm.org/use#OriginalFile",
+        },
+    ]
+)
+def fixture(request):
+    return request.param
+
+
+def test_rdf_types(fixture):
+    assert RDFTypeRules().find(*fixture["query"]) == fixture["expected_results"]
+
+
+def test_unknown_model():
+    with pytest.raises(Exception, match="Parent type unknown: Collection"):
+        RDFTypeRules().find("Collection", "OBJ", False)
@@ -0,0 +1,52 @@
+import pytest
+from utk_exodus.manifest import RunManifest
+
+@pytest.fixture(
+    params=[
+        {
+            "run": "collections:harp book utk_dc.yml",
+            "stages": [
+                ("download_mods", "success", ["MODS"]),
+                ("metadata", "success", ["works.csv"]),
+                ("file_info", "failure", []),
+            ],
+            "expected_results": {
+                "download_mods": True,
+                "metadata": True,
+                "file_info": False,
+                "validate": False,
+            }
+        },
+    ]
+)
+def fixture(request, tmp_path):
+    (tmp_path / "MODS").mkdir()
+    (tmp_path / "works.csv").write_text("source_identifier\n")
+    with RunManifest(tmp_path / "run_manifest.csv") as manifest:
+        for stage, status, artifacts in request.param["stages"]:
+            manifest.record_stage(
+                stage, request.param["run"], [tmp_path / artifact for artifact in artifacts], status=status
+            )
+    request.param["directory"] = tmp_path
+    return request.param
+
+def test_completed_stages_are_read_back(fixture):
+    with RunManifest(fixture["directory"] / "run_manifest.csv") as manifest:
+        completed = {stage: manifest.completed(stage, fixture["run"]) for stage in fixture["expected_results"]}
+    assert completed == fixture["expected_results"]
+
+def test_stage_of_another_run_is_not_completed(fixture):
+    with RunManifest(fixture["directory"] / "run_manifest.csv") as manifest:
+        assert not manifest.completed("metadata", "collections:volvoices image utk_dc.yml")
+
+def test_stage_with_missing_artifact_is_not_completed(fixture):
+    (fixture["directory"] / "works.csv").unlink()
+    with RunManifest(fixture["directory"] / "run_manifest.csv") as manifest:
+        assert manifest.completed("download_mods", fixture["run"])
+        assert not manifest.completed("metadata", fixture["run"])
+
+def test_last_row_for_a_stage_wins(fixture):
+    with RunManifest(fixture["directory"] / "run_manifest.csv") as manifest:
+        manifest.record_stage("file_info", fixture["run"], [fixture["directory"] / "works.csv"])
+    with RunManifest(fixture["directory"] / "run_manifest.csv") as manifest:
+        assert manifest.completed("file_info", fixture["run"])
@@ -0,0 +1,65 @@
+import pytest
+from http.server import BaseHTTPRequestHandler
+from utk_exodus.metadata import MetadataMapping
+from utk_exodus.risearch import ResourceIndexSearch
+from pathlib import Path
+
+# Set path to fixtures and configs
+fixtures_path = Path(__file__).parent / "fixtures"
+config_path = Path(__file__).parent.parent / "utk_exodus" / "config"
+
+
+class UnknownPids(BaseHTTPRequestHandler):
+    """A Resource Index that knows none of the pids it is asked about, so every answer is just the CSV header."""
+
+    requests = []
+
+    def do_GET(self):
+        UnknownPids.requests.append(self.path)
+        body = b'"work_type"\n'
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "collections/modsCollection.xml",
+            "model": None,
+            "expected_results": {
+                "record_1": "Pdf",
+                "egypt_224": "Image",
+                "record_0038_000050_000240_0001": "Image",
+            },
+        },
+        {
+            "filename": "collections/oai_list_records.xml",
+            "model": "book",
+            "expected_results": {
+                "harp_1": "Book",
+                "egypt_224": "Book",
+                "volvoices_2495": "Book",
+            },
+        },
+    ]
+)
+def fixture(request, monkeypatch, http_server):
+    defaults = list(ResourceIndexSearch.__init__.__defaults__)
+    defaults[-1] = f"{http_server(UnknownPids)}/fedora/risearch"
+    monkeypatch.setattr(ResourceIndexSearch.__init__, "__defaults__", tuple(defaults))
+    UnknownPids.requests = []
+    request.param["fixture_path"] = str(fixtures_path / request.param["filename"])
+    return request.param
+
+def test_collection_records_skip_resource_index(fixture):
+    metadata = MetadataMapping(config_path / "utk_dc.yml", fixture["fixture_path"], model=fixture["model"])
+    models = {row["source_identifier"]: row["model"] for row in metadata.output_data}
+    assert models == fixture["expected_results"]
+    assert all(row["parents"] == "" for row in metadata.output_data)
+    assert UnknownPids.requests == []
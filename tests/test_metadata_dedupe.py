@@ -0,0 +1,62 @@
+import pytest
+from lxml import etree
+from utk_exodus.metadata import MetadataMapping
+from utk_exodus.metadata.cache import hash_masked_record
+from utk_exodus.risearch import ResourceIndexSearch
+from pathlib import Path
+
+# Set path to fixtures and configs
+fixtures_path = Path(__file__).parent / "fixtures"
+config_path = Path(__file__).parent.parent / "utk_exodus" / "config"
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "egypt_224.xml",
+            "copy": "egypt_225.xml",
+            "replacements": [
+                (">0123_00050_000224<", ">0123_00050_000225<"),
+                (">egypt:224<", ">egypt:225<"),
+                (">1934.1.31.68<", ">1934.1.31.69<"),
+            ],
+            "expected_results": {
+                "egypt_224": {"local_identifier": "0123_00050_000224 | egypt808 | egypt:224", "acquisition_identifier": "1934.1.31.68"},
+                "egypt_225": {"local_identifier": "0123_00050_000225 | egypt808 | egypt:225", "acquisition_identifier": "1934.1.31.69"},
+            }
+        },
+    ]
+)
+def fixture(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(ResourceIndexSearch, "get_islandora_work_type", lambda self, pid: "info:fedora/islandora:sp_basic_image")
+    monkeypatch.setattr(ResourceIndexSearch, "get_parent_collections", lambda self, pid: ["info:fedora/collections:egypt"])
+    original = (fixtures_path / request.param["filename"]).read_text()
+    copy = original
+    for old, new in request.param["replacements"]:
+        copy = copy.replace(old, new)
+    (tmp_path / request.param["filename"]).write_text(original)
+    (tmp_path / request.param["copy"]).write_text(copy)
+    request.param["directory"] = tmp_path
+    return request.param
+
+def test_masked_hash_ignores_identifiers(fixture):
+    directory = fixture["directory"]
+    assert hash_masked_record(etree.parse(str(directory / fixture["filename"]))) == hash_masked_record(
+        etree.parse(str(directory / fixture["copy"]))
+    )
+
+def test_masked_hash_sees_other_changes(fixture):
+    document = etree.parse(str(fixture["directory"] / fixture["filename"]))
+    changed = etree.parse(str(fixture["directory"] / fixture["filename"]))
+    changed.find(".//{http://www.loc.gov/mods/v3}title").text = "Another title"
+    assert hash_masked_record(document) != hash_masked_record(changed)
+
+def test_dedupe_reuses_values_but_not_identifiers(fixture):
+    extracted = MetadataMapping(config_path / "utk_dc.yml", str(fixture["directory"])).output_data
+    deduped = MetadataMapping(config_path / "utk_dc.yml", str(fixture["directory"]), dedupe=True)
+    assert deduped.duplicates == 1
+    assert sorted(deduped.output_data, key=lambda row: row["source_identifier"]) == sorted(
+        extracted, key=lambda row: row["source_identifier"]
+    )
+    for row in deduped.output_data:
+        expected = fixture["expected_results"][row["source_identifier"]]
+        assert {key: row[key] for key in expected} == expected
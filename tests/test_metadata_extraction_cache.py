@@ -0,0 +1,45 @@
+import pytest
+from utk_exodus.metadata.cache import ExtractionCache, hash_file
+from pathlib import Path
+
+# Set path to fixtures and configs
+fixtures_path = Path(__file__).parent / "fixtures"
+config_path = Path(__file__).parent.parent / "utk_exodus" / "config"
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "harp_1.xml",
+            "record": {
+                "row": {"source_identifier": "harp_1", "model": "Book"},
+                "pages": [{"pid": "info:fedora/harp:2", "page": "1", "title": "Page 1"}],
+                "parts": [],
+            }
+        },
+    ]
+)
+def fixture(request, tmp_path):
+    request.param["cache_path"] = tmp_path / "cache.db"
+    request.param["fixture_path"] = fixtures_path / request.param.get("filename")
+    return request.param
+
+def test_cached_record_is_reused(fixture):
+    content_hash = hash_file(fixture["fixture_path"])
+    cache = ExtractionCache(fixture["cache_path"], config_path / "utk_dc.yml")
+    cache.put("harp_1", content_hash, fixture["record"])
+    cache.close()
+    cache = ExtractionCache(fixture["cache_path"], config_path / "utk_dc.yml")
+    assert cache.get("harp_1", content_hash) == fixture["record"]
+
+def test_changed_content_is_not_reused(fixture):
+    cache = ExtractionCache(fixture["cache_path"], config_path / "utk_dc.yml")
+    cache.put("harp_1", hash_file(fixture["fixture_path"]), fixture["record"])
+    assert cache.get("harp_1", "a different hash") is None
+
+def test_changed_config_is_not_reused(fixture):
+    content_hash = hash_file(fixture["fixture_path"])
+    cache = ExtractionCache(fixture["cache_path"], config_path / "utk_dc.yml")
+    cache.put("harp_1", content_hash, fixture["record"])
+    cache.close()
+    cache = ExtractionCache(fixture["cache_path"], config_path / "samvera_default.yml")
+    assert cache.get("harp_1", content_hash) is None
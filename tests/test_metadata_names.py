@@ -47,6 +47,14 @@ fixtures_path = Path(__file__).parent / "fixtures"
                     'Poersch, Oxendine'
                 ]
             }
+        },
+        {
+            "filename": "playbills1052.xml",
+            "expected_results": {
+                'contributor': ['http://id.loc.gov/authorities/names/n86856560'],
+                'stage_director': ['http://id.loc.gov/authorities/names/no2017157269'],
+                'utk_production_company': ['Carousel Theatre']
+            }
         }
     ]
 )
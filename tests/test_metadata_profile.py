@@ -0,0 +1,44 @@
+import csv
+import pytest
+from utk_exodus.metadata.profile import NullProfiler, PropertyProfiler
+
+@pytest.fixture(
+    params=[
+        {
+            "measurements": [
+                (("mapping", "title"), 0.5, 1),
+                (("special", "TitleProperty"), 0.5, 1),
+                (("risearch", "get_parent_collections"), 2.0, 1),
+                (("extract", "records"), 3.0, 0),
+                (("mapping", "title"), 0.25, 2),
+            ],
+            "expected_results": [
+                ("extract", "records", 1, 3.0, 0),
+                ("risearch", "get_parent_collections", 1, 2.0, 1),
+                ("mapping", "title", 2, 0.75, 3),
+                ("special", "TitleProperty", 1, 0.5, 1),
+            ]
+        },
+    ]
+)
+def fixture(request):
+    return request.param
+
+def test_report_is_sorted_by_time(fixture, tmp_path):
+    profiler = PropertyProfiler()
+    for key, seconds, size in fixture["measurements"]:
+        profiler.record(key, seconds, size)
+    profiler.report(tmp_path / "profile.csv")
+    with open(tmp_path / "profile.csv") as report:
+        rows = [
+            (row["category"], row["name"], int(row["calls"]), float(row["seconds"]), int(row["values"]))
+            for row in csv.DictReader(report)
+        ]
+    assert rows == fixture["expected_results"]
+
+def test_null_profiler_records_nothing(tmp_path):
+    profiler = NullProfiler()
+    with profiler.measure(("mapping", "title")) as measurement:
+        measurement.size = 1
+    profiler.report(tmp_path / "profile.csv")
+    assert not (tmp_path / "profile.csv").exists()
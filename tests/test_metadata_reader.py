@@ -0,0 +1,123 @@
+import pytest
+import tarfile
+import zipfile
+from utk_exodus.metadata.reader import is_archive, iter_archive, iter_mods_collection, scan_directory
+from pathlib import Path
+
+# Set path to fixtures
+fixtures_path = Path(__file__).parent / "fixtures"
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "collections/modsCollection.xml",
+            "expected_results": ["record_1", "egypt_224", "record_0038_000050_000240_0001"],
+        },
+        {
+            "filename": "collections/oai_list_records.xml",
+            "expected_results": ["harp_1", "egypt_224", "volvoices_2495"],
+        },
+        {
+            "filename": "harp_1.xml",
+            "default_identifier": "harp_1",
+            "expected_results": ["harp_1"],
+        },
+    ]
+)
+def fixture(request):
+    request.param["fixture_path"] = fixtures_path / request.param.get("filename")
+    return request.param
+
+def test_source_identifiers(fixture):
+    records = iter_mods_collection(
+        str(fixture["fixture_path"]), default_identifier=fixture.get("default_identifier")
+    )
+    assert [source_identifier for source_identifier, _ in records] == fixture["expected_results"]
+
+def test_records_are_standalone(fixture):
+    for _, record in iter_mods_collection(str(fixture["fixture_path"])):
+        assert record.xpath("/mods:mods/mods:titleInfo", namespaces={"mods": "http://www.loc.gov/mods/v3"})
+
+@pytest.fixture(
+    params=[
+        {
+            "archive": "batch.tar.gz",
+            "members": ["batch/harp_1_MODS.xml", "batch/egypt_224.xml", "batch/notes.txt", "collections/modsCollection.xml"],
+            "expected_results": ["harp_1", "egypt_224", "record_1", "egypt_224", "record_0038_000050_000240_0001"],
+        },
+        {
+            "archive": "batch.zip",
+            "members": ["harp_1_MODS.xml", "__MACOSX/._harp_1_MODS.xml", "nested/volvoices_2495.xml"],
+            "expected_results": ["harp_1", "volvoices_2495"],
+        },
+    ]
+)
+def archive_fixture(request, tmp_path):
+    sources = {
+        "batch/harp_1_MODS.xml": "harp_1.xml",
+        "batch/egypt_224.xml": "egypt_224.xml",
+        "batch/notes.txt": "harp_1.xml",
+        "collections/modsCollection.xml": "collections/modsCollection.xml",
+        "harp_1_MODS.xml": "harp_1.xml",
+        "__MACOSX/._harp_1_MODS.xml": "harp_1.xml",
+        "nested/volvoices_2495.xml": "volvoices_2495.xml",
+    }
+    path = tmp_path / request.param["archive"]
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path, "w") as archive:
+            for member in request.param["members"]:
+                archive.write(fixtures_path / sources[member], member)
+    else:
+        with tarfile.open(path, "w:gz") as archive:
+            for member in request.param["members"]:
+                archive.add(fixtures_path / sources[member], member)
+    request.param["archive_path"] = str(path)
+    return request.param
+
+def test_archive_source_identifiers(archive_fixture):
+    assert is_archive(archive_fixture["archive_path"])
+    records = iter_archive(archive_fixture["archive_path"])
+    assert [source_identifier for source_identifier, _ in records] == archive_fixture["expected_results"]
+
+@pytest.fixture(
+    params=[
+        {
+            "files": [
+                "b_MODS.xml",
+                "a.xml",
+                "notes.txt",
+                "._a.xml",
+                "sub/c_MODS.xml",
+                "sub/deeper/d.xml",
+                "__MACOSX/e.xml",
+                "z_MODS.xml",
+            ],
+            "expected_results": {
+                "default": ["a.xml", "b_MODS.xml", "sub/c_MODS.xml", "sub/deeper/d.xml", "z_MODS.xml"],
+                "include": ["b_MODS.xml", "sub/c_MODS.xml", "z_MODS.xml"],
+                "exclude": ["a.xml", "b_MODS.xml", "z_MODS.xml"],
+                "manifest": ["z_MODS.xml", "a.xml"],
+            },
+        },
+    ]
+)
+def scan_fixture(request, tmp_path):
+    for name in request.param["files"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("<mods/>")
+    (tmp_path / "manifest.txt").write_text("# picked by hand\nz_MODS.xml\n\na.xml\n")
+    request.param["directory"] = tmp_path
+    return request.param
+
+def test_scan_directory(scan_fixture):
+    directory = scan_fixture["directory"]
+    scans = {
+        "default": scan_directory(str(directory)),
+        "include": scan_directory(str(directory), include=("*_MODS.xml",)),
+        "exclude": scan_directory(str(directory), exclude=("sub", "._*", "__MACOSX")),
+        "manifest": scan_directory(str(directory), manifest=str(directory / "manifest.txt")),
+    }
+    assert {
+        name: [str(Path(file).relative_to(directory)) for file in files]
+        for name, files in scans.items()
+    } == scan_fixture["expected_results"]
@@ -30,6 +30,12 @@ NAMESPACES = {'mods': 'http://www.loc.gov/mods/v3', 'xlink': 'http://www.w3.org/
             "expected_results": {
                 'utk_photographer': ['Brugsch-Bey, Emil, 1842-']
             }
+        },
+        {
+            "filename": "cdf_13238.xml",
+            "expected_results": {
+                'utk_author': ['Finlay, Belva', 'Blank, Helen', 'Poersch, Oxendine']
+            }
         }
     ]
 )
@@ -0,0 +1,100 @@
+import csv
+import pytest
+from http.server import BaseHTTPRequestHandler
+from utk_exodus.precheck import RemoteFileCheck
+
+CONTENT = b"%PDF-1.4 not really a pdf"
+
+
+class Islandora(BaseHTTPRequestHandler):
+    """Serves a file at /ok, nothing at /missing, an empty file at /empty, and a file at /no_head that refuses HEAD."""
+
+    def do_HEAD(self):
+        if self.path == "/no_head":
+            self.send_response(405)
+            self.end_headers()
+        elif self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Length", "0" if self.path == "/empty" else str(len(CONTENT)))
+            self.end_headers()
+
+    def do_GET(self):
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes 0-0/{len(CONTENT)}")
+        self.send_header("Content-Length", "1")
+        self.end_headers()
+        self.wfile.write(CONTENT[:1])
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(
+    params=[
+        {
+            "rows": [
+                {"source_identifier": "harp_1_OBJ_fileset", "model": "FileSet", "remote_files": "/ok"},
+                {"source_identifier": "harp_2_OBJ_fileset", "model": "FileSet", "remote_files": "/missing"},
+                {"source_identifier": "harp_3_OBJ_fileset", "model": "FileSet", "remote_files": "/empty"},
+                {"source_identifier": "harp_4_OBJ_fileset", "model": "FileSet", "remote_files": "/no_head"},
+                {"source_identifier": "harp_4", "model": "Image", "remote_files": ""},
+            ],
+            "expected_results": {
+                "report": {
+                    "/ok": ("200", str(len(CONTENT)), "HEAD", "True"),
+                    "/missing": ("404", "", "HEAD", "False"),
+                    "/empty": ("200", "0", "HEAD", "False"),
+                    "/no_head": ("206", str(len(CONTENT)), "GET", "True"),
+                },
+                "failed": ["harp_2_OBJ_fileset", "harp_3_OBJ_fileset"],
+            },
+        },
+    ]
+)
+def fixture(request, tmp_path, http_server):
+    request.param["base"] = http_server(Islandora)
+    sheet = tmp_path / "import.csv"
+    with open(sheet, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=["source_identifier", "model", "remote_files"])
+        writer.writeheader()
+        for row in request.param["rows"]:
+            if row["remote_files"]:
+                row = {**row, "remote_files": request.param["base"] + row["remote_files"]}
+            writer.writerow(row)
+    request.param["sheet"] = str(sheet)
+    return request.param
+
+
+def test_precheck_reports_and_writes_failure_sheet(fixture, tmp_path):
+    output = tmp_path / "precheck"
+    results = RemoteFileCheck(fixture["sheet"], str(output), workers=4).run()
+    assert results["checked"] == 4
+    assert results["failure_sheets"] == [str(output / "import_failed.csv")]
+    with open(output / "remote_files_report.csv", newline="") as report:
+        rows = {
+            row["url"].replace(fixture["base"], ""): (
+                row["status"], row["content_length"], row["method"], row["ok"]
+            )
+            for row in csv.DictReader(report)
+        }
+    assert rows == fixture["expected_results"]["report"]
+    with open(output / "import_failed.csv", newline="") as failures:
+        reader = csv.DictReader(failures)
+        assert reader.fieldnames == ["source_identifier", "model", "remote_files"]
+        assert [row["source_identifier"] for row in reader] == fixture["expected_results"]["failed"]
+
+
+def test_failure_sheets_with_the_same_name_are_kept_apart(fixture, tmp_path):
+    sheets = tmp_path / "sheets"
+    for batch in ("batch_1", "batch_2"):
+        (sheets / batch).mkdir(parents=True)
+        (sheets / batch / "errored_entries.csv").write_bytes(open(fixture["sheet"], "rb").read())
+    output = tmp_path / "precheck"
+    results = RemoteFileCheck(str(sheets), str(output), workers=4).run()
+    assert results["failure_sheets"] == [
+        str(output / "batch_1" / "errored_entries_failed.csv"),
+        str(output / "batch_2" / "errored_entries_failed.csv"),
+    ]
@@ -0,0 +1,128 @@
+import pytest
+import requests
+import gzip
+import time
+import zipfile
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+from utk_exodus.precheck import RemoteFileCheck
+from utk_exodus.replay import Recorder, Replayer
+from pathlib import Path
+
+# Set path to fixtures
+fixtures_path = Path(__file__).parent / "fixtures"
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "harp_1.xml",
+        },
+        {
+            "filename": "voloh_10_POLICY.xml",
+        },
+    ]
+)
+def fixture(request, tmp_path, http_server):
+    handler = partial(SimpleHTTPRequestHandler, directory=str(fixtures_path))
+    handler.log_message = lambda *args: None
+    request.param["url"] = f"{http_server(handler)}/{request.param['filename']}"
+    request.param["archive"] = str(tmp_path / "run.zip")
+    request.param["expected_results"] = (fixtures_path / request.param["filename"]).read_bytes()
+    with Recorder(request.param["archive"]):
+        requests.get(request.param["url"])
+        requests.get(request.param["url"])
+    return request.param
+
+def test_replay_serves_recorded_response(fixture):
+    with Replayer(fixture["archive"]):
+        response = requests.get(fixture["url"])
+    assert response.status_code == 200
+    assert response.content == fixture["expected_results"]
+
+def test_replay_adds_latency(fixture):
+    with Replayer(fixture["archive"], latency=0.2):
+        start = time.perf_counter()
+        requests.get(fixture["url"])
+        assert time.perf_counter() - start >= 0.2
+
+def test_unrecorded_request_is_missing(fixture):
+    with Replayer(fixture["archive"]):
+        response = requests.get(fixture["url"] + "?unrecorded")
+    assert response.status_code == 404
+
+
+class Islandora(BaseHTTPRequestHandler):
+    """Serves a file at /file and redirects /moved to it."""
+
+    def do_HEAD(self):
+        if self.path == "/moved":
+            self.send_response(302)
+            self.send_header("Location", "/file")
+            self.send_header("Set-Cookie", "session=secret")
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(CONTENT)))
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/gzipped":
+            body = gzip.compress(CONTENT)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.do_HEAD()
+        if self.path != "/moved":
+            self.wfile.write(CONTENT)
+
+    def log_message(self, format, *args):
+        return
+
+
+CONTENT = b"%PDF-1.4 " * 10000
+
+
+def without_latency(results):
+    return [{key: value for key, value in result.items() if key != "latency_ms"} for result in results]
+
+@pytest.fixture
+def recorded_check(tmp_path, http_server):
+    base = http_server(Islandora)
+    sheet = tmp_path / "import.csv"
+    sheet.write_text("source_identifier,remote_files\n")
+    urls = [f"{base}/file", f"{base}/moved"]
+    archive = str(tmp_path / "run.zip")
+    with Recorder(archive):
+        live = [RemoteFileCheck(str(sheet), str(tmp_path / "precheck")).check_url(url) for url in urls]
+        with requests.get(urls[0], stream=True) as response:
+            streamed = b"".join(response.iter_content(chunk_size=4096))
+        with requests.get(f"{base}/gzipped", stream=True) as response:
+            compressed = response.raw.read()
+    return {"sheet": sheet, "urls": urls, "archive": archive, "live": live, "streamed": streamed, "compressed": compressed, "tmp_path": tmp_path}
+
+def test_replay_reproduces_headers_and_redirects(recorded_check):
+    with Replayer(recorded_check["archive"]):
+        replayed = [
+            RemoteFileCheck(str(recorded_check["sheet"]), str(recorded_check["tmp_path"] / "precheck")).check_url(url)
+            for url in recorded_check["urls"]
+        ]
+        etag = requests.head(recorded_check["urls"][0]).headers.get("ETag")
+    assert without_latency(replayed) == without_latency(recorded_check["live"])
+    assert all(result["ok"] for result in replayed)
+    assert etag == '"v1"'
+
+def test_streamed_body_is_recorded_without_credentials(recorded_check):
+    assert recorded_check["streamed"] == CONTENT
+    with Replayer(recorded_check["archive"]):
+        assert requests.get(recorded_check["urls"][0]).content == CONTENT
+    with zipfile.ZipFile(recorded_check["archive"]) as archive:
+        assert b"secret" not in archive.read("index.jsonl")
+
+def test_compressed_body_keeps_its_content_encoding(recorded_check):
+    assert gzip.decompress(recorded_check["compressed"]) == CONTENT
+    with Replayer(recorded_check["archive"]):
+        assert requests.get(recorded_check["urls"][0].replace("/file", "/gzipped")).content == CONTENT
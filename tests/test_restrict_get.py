@@ -1,5 +1,5 @@
 import pytest
-from utk_exodus.restrict import Restrictions
+from utk_exodus.restrict import Restrictions, evaluate_policies
 from pathlib import Path
 
 # Set path to fixtures
@@ -37,4 +37,15 @@ def fixture(request):
 def test_find_restricted_datastreams(fixture):
     restrictions = Restrictions(fixture.get("fixtures_path"))
     results = restrictions.get()
-    assert results == fixture["expected_results"]
\ No newline at end of file
+    assert results == fixture["expected_results"]
+
+def test_get_from_bytes(fixture):
+    with open(fixture.get("fixtures_path"), "rb") as policy:
+        restrictions = Restrictions(policy.read())
+    assert restrictions.get() == fixture["expected_results"]
+
+
+def test_evaluate_policies(fixture):
+    with open(fixture.get("fixtures_path"), "rb") as policy:
+        results = evaluate_policies({fixture["filename"]: policy.read()})
+    assert results == {fixture["filename"]: fixture["expected_results"]}
@@ -0,0 +1,51 @@
+import pytest
+import shutil
+from utk_exodus.restrict import PolicyIndex
+from pathlib import Path
+
+# Set path to fixtures
+fixtures_path = Path(__file__).parent / "fixtures"
+
+@pytest.fixture(
+    params=[
+        {
+            "filename": "bass_10900_POLICY.xml",
+            "pid": "bass:10900",
+            "expected_results": {
+                "work_restricted": True,
+                "restricted_datastreams": [],
+            }
+        },
+        {
+            "filename": "voloh_10_POLICY.xml",
+            "pid": "voloh:10",
+            "expected_results": {
+                "work_restricted": False,
+                "restricted_datastreams": ['DEED_OF_GIFT', 'CONSENT_FORM'],
+            }
+        },
+        {
+            "filename": "rfta_8_POLICY.xml",
+            "pid": "rfta:8",
+            "expected_results": {
+                "work_restricted": False,
+                "restricted_datastreams": [],
+            }
+        }
+    ]
+)
+def fixture(request, tmp_path):
+    for policy in ("bass_10900_POLICY.xml", "voloh_10_POLICY.xml", "rfta_8_POLICY.xml"):
+        pid = policy.replace("_POLICY.xml", "").replace("_", ":")
+        shutil.copy(fixtures_path / policy, tmp_path / f"{pid}_POLICY.xml")
+    request.param["policies_location"] = str(tmp_path)
+    return request.param
+
+def test_policy_index_get(fixture):
+    index = PolicyIndex(fixture.get("policies_location"), workers=2).build()
+    assert index.get(fixture["pid"]) == fixture["expected_results"]
+
+def test_policy_index_is_reused(fixture):
+    PolicyIndex(fixture.get("policies_location")).build()
+    index = PolicyIndex(fixture.get("policies_location"))
+    assert index.get(fixture["pid"]) == fixture["expected_results"]
@@ -1,17 +1,29 @@
-from .metadata import MetadataMapping
-from .risearch import ResourceIndexSearch
-from .finder import FileOrganizer
-from .curate import FileCurator
-from .validate import ValidateMigration
-from .fedora import FedoraObject
-from.checksum import HashSheet
-from .controller import InterfaceController
-from .combine import ImportRefactor
-from .template import ImportTemplate
-from .restrict import Restrictions, RestrictionsSheet
-from .collection import CollectionMetadata, CollectionImporter
-from .banish import BanishFiles
-from .review import ExistingImport
+from importlib import import_module
+
+# Subsystems are imported on first use so that `import utk_exodus` (and every `exodus` command) doesn't pay for
+# heavy dependencies like selenium, lxml, or xmltodict that only some commands need.
+_exports = {
+    "BanishFiles": ".banish",
+    "CollectionMetadata": ".collection",
+    "CollectionImporter": ".collection",
+    "ExistingImport": ".review",
+    "FedoraObject": ".fedora",
+    "FileCurator": ".curate",
+    "FileOrganizer": ".finder",
+    "HashSheet": ".checksum",
+    "ImportRefactor": ".combine",
+    "ImportTemplate": ".template",
+    "InterfaceController": ".controller",
+    "MetadataMapping": ".metadata",
+    "PolicyIndex": ".restrict",
+    "Recorder": ".replay",
+    "RemoteFileCheck": ".precheck",
+    "Replayer": ".replay",
+    "ResourceIndexSearch": ".risearch",
+    "Restrictions": ".restrict",
+    "RestrictionsSheet": ".restrict",
+    "ValidateMigration": ".validate",
+}
 
 __all__ = [
     "BanishFiles",
@@ -26,8 +38,24 @@ __all__ = [
     "ImportTemplate",
     "InterfaceController",
     "MetadataMapping",
+    "PolicyIndex",
+    "Recorder",
+    "RemoteFileCheck",
+    "Replayer",
     "ResourceIndexSearch",
     "Restrictions",
     "RestrictionsSheet",
     "ValidateMigration",
 ]
+
+
+def __getattr__(name):
+    if name in _exports:
+        value = getattr(import_module(_exports[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
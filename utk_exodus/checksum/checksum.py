@@ -1,14 +1,103 @@
 import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
 from csv import DictWriter, DictReader
 import os
 import requests
 from tqdm import tqdm
+from xml.parsers.expat import ExpatError
+from utk_exodus.fedora import DatastreamIndex, FedoraObject, pooled_session
+
+# remote_files point at Fedora itself (.../object/{pid}/datastream/{dsid}) or at the
+# migration copy of a datastream (.../{namespace}/{pid}_{dsid}.{extension}).
+DATASTREAM_URL = re.compile(r"/object/(?P<pid>[^/]+)/datastream/(?P<dsid>[^/?]+)")
+MIGRATION_URL = re.compile(r"/(?P<pid>[^/:]+:[^/_]+)_(?P<dsid>[^/.]+)\.[^/]+$")
+
+
+def datastream_for_url(url):
+    """Work out the pid and dsid a remote_files URL points to.
+
+    Args:
+        url (str): The remote_files URL.
+
+    Returns:
+        tuple: The pid and dsid, or None if the URL isn't for a Fedora datastream.
+
+    Examples:
+        >>> datastream_for_url("https://digital.lib.utk.edu/migration/mpaekefauver/mpaekefauver:248_MODS.xml")
+        ('mpaekefauver:248', 'MODS')
+        >>> datastream_for_url("https://esb.lib.utk.edu/islandora/object/harp:1/datastream/PROXY_MP3")
+        ('harp:1', 'PROXY_MP3')
+
+    """
+    for pattern in (DATASTREAM_URL, MIGRATION_URL):
+        found = pattern.search(url)
+        if found:
+            return found.group("pid"), found.group("dsid")
+    return None
+
+
+def hash_algorithm(checksum_type):
+    """Get the hashlib name for a Fedora dsChecksumType, or None if hashlib hasn't one.
+
+    Examples:
+        >>> hash_algorithm("SHA-256"), hash_algorithm("DISABLED")
+        ('sha256', None)
+
+    """
+    algorithm = (checksum_type or "").lower().replace("-", "")
+    return algorithm if algorithm in hashlib.algorithms_guaranteed else None
 
 
 class HashSheet:
-    def __init__(self, path, output):
+    """Write the SHA-1 of every remote file listed in a directory of errored sheets.
+
+    By default every file is downloaded and hashed. With `verify`, each URL is mapped
+    back to its Fedora pid and dsid and the checksum Fedora already stores in the
+    datastream profile is used instead. Content is only streamed when Fedora doesn't
+    store a checksum or stores one made with another algorithm, in which case the
+    stored checksum is checked against the content in the same pass.
+
+    Args:
+        path (str): The directory of errored import sheets.
+        output (str): Where to write the checksum sheet.
+        verify (bool): Use checksums stored in Fedora where possible.
+        auth (tuple): The Fedora username and password, for `verify`.
+        fedora_uri (str): The Fedora base URI, for `verify`.
+        index (str): Optional: a DatastreamIndex to read profiles from before asking
+            Fedora.
+        workers (int): The maximum number of files to check at once when verifying.
+    """
+
+    verify_fieldnames = [
+        "url",
+        "checksum",
+        "pid",
+        "dsid",
+        "source",
+        "stored_checksum_type",
+        "stored_checksum",
+        "verified",
+        "message",
+    ]
+
+    def __init__(
+        self,
+        path,
+        output,
+        verify=False,
+        auth=None,
+        fedora_uri=None,
+        index=None,
+        workers=8,
+    ):
         self.path = path
         self.output = output
+        self.verify = verify
+        self.auth = auth
+        self.fedora_uri = fedora_uri
+        self.index = index
+        self.workers = workers
         self.all_files = self.walk_sheets(path)
 
     @staticmethod
@@ -68,19 +157,124 @@ class HashSheet:
             {'url': 'https://raw.githubusercontent.com/utkdigitalinitiatives/utk-exodus/main/tests/fixtures/colloquy_202.xml', 'checksum': '081a51fae0200f266d2933756d48441c4ea77b1e'}
 
         """
-        response = requests.get(file, stream=True)
-        response.raise_for_status()
-        sha1 = hashlib.sha1()
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                sha1.update(chunk)
-        return {"url": file, "checksum": sha1.hexdigest()}
+        return {"url": file, "checksum": HashSheet.hash_url(file)["sha1"]}
+
+    @staticmethod
+    def hash_url(url, algorithms=("sha1",), session=None):
+        """Stream a URL once and hash its content with one or more algorithms.
+
+        Returns:
+            dict: The hex digest for each algorithm.
+        """
+        hashes = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        with (session or requests).get(url, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=65536):
+                if chunk:
+                    for digest in hashes.values():
+                        digest.update(chunk)
+        return {algorithm: digest.hexdigest() for algorithm, digest in hashes.items()}
+
+    def __verify_file(self, url, profiles, session):
+        datastream = datastream_for_url(url)
+        row = {
+            "url": url,
+            "pid": "",
+            "dsid": "",
+            "stored_checksum_type": "",
+            "stored_checksum": "",
+        }
+        profile = None
+        if datastream is not None:
+            row["pid"], row["dsid"] = datastream
+            profile = profiles.get(datastream)
+            if profile is None and self.fedora_uri:
+                try:
+                    profile = FedoraObject(
+                        self.auth, self.fedora_uri, row["pid"], session
+                    ).get_datastream_profile(row["dsid"])
+                except (ExpatError, KeyError, ValueError, requests.RequestException):
+                    profile = None
+        algorithm = None
+        if profile is not None and profile["checksum"] not in ("", "none"):
+            row["stored_checksum_type"] = profile["checksum_type"]
+            row["stored_checksum"] = profile["checksum"]
+            algorithm = hash_algorithm(profile["checksum_type"])
+        if algorithm == "sha1":
+            return {
+                **row,
+                "checksum": profile["checksum"],
+                "source": "fedora",
+                "verified": "",
+                "message": "",
+            }
+        algorithms = ("sha1", algorithm) if algorithm else ("sha1",)
+        try:
+            digests = self.hash_url(url, algorithms, session)
+        except requests.RequestException as e:
+            return {
+                **row,
+                "checksum": "",
+                "source": "error",
+                "verified": "",
+                "message": str(e),
+            }
+        verified = ""
+        if algorithm:
+            verified = (
+                "match"
+                if digests[algorithm] == profile["checksum"].lower()
+                else "mismatch"
+            )
+        return {
+            **row,
+            "checksum": digests["sha1"],
+            "source": "download",
+            "verified": verified,
+            "message": "",
+        }
+
+    def verify_checksums(self):
+        """Get the SHA-1 of every file, from Fedora's stored checksums where possible.
+
+        Returns:
+            list: A row for each file with its checksum, where it came from, and
+                whether any stored checksum that needed the content downloaded matched
+                it. Files that couldn't be downloaded have an empty checksum and say why
+                in `message`.
+        """
+        profiles = {}
+        if self.index:
+            with DatastreamIndex(self.index) as index:
+                for url in self.all_files:
+                    datastream = datastream_for_url(url)
+                    if datastream is not None and datastream not in profiles:
+                        profile = index.get(*datastream)
+                        if profile is not None:
+                            profiles[datastream] = profile
+        session = pooled_session(self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(
+                tqdm(
+                    executor.map(
+                        lambda url: self.__verify_file(url, profiles, session),
+                        self.all_files,
+                    ),
+                    total=len(self.all_files),
+                )
+            )
 
     def write(self):
+        if self.verify:
+            rows = self.verify_checksums()
+            fieldnames = self.verify_fieldnames
+        else:
+            rows = self.checksum()
+            fieldnames = ["url", "checksum"]
         with open(self.output, "w") as csvfile:
-            writer = DictWriter(csvfile, fieldnames=["url", "checksum"])
+            writer = DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
-            writer.writerows(self.checksum())
+            writer.writerows(rows)
         return
 
 
@@ -1,3 +1,3 @@
-from .collection import CollectionMetadata, CollectionImporter
+from .collection import CollectionMetadata, CollectionImporter, RoleMatcher
 
-__all__ = ["CollectionMetadata", "CollectionImporter"]
+__all__ = ["CollectionMetadata", "CollectionImporter", "RoleMatcher"]
@@ -1,23 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 from io import BytesIO
 import csv
-from utk_exodus.fedora import FedoraObject
+from utk_exodus.fedora import FedoraObject, pooled_session
 from utk_exodus.restrict import Restrictions
+from pathlib import Path
 import os
+import yaml
 from tqdm import tqdm
 
 
+class RoleMatcher:
+    """Sort the mods:name elements of a record into fields by role in a single pass.
+
+    Roles come from a yml file like `config/collection_roles.yml`. A name belongs to a field once for every
+    configured role that appears in one of its roleTerms, which matches the old
+    `mods:name[mods:role/mods:roleTerm[contains(., "Role")]]/mods:namePart` queries one per role. The roles a
+    roleTerm matches are worked out the first time that roleTerm is seen and then looked up.
+
+    Args:
+        path_to_roles (str): The path to the yml file of fields and roles.
+    """
+
+    namespaces = {
+        "mods": "http://www.loc.gov/mods/v3",
+        "xlink": "http://www.w3.org/1999/xlink",
+    }
+    names = etree.XPath("mods:name", namespaces=namespaces)
+    role_terms = etree.XPath("mods:role/mods:roleTerm", namespaces=namespaces)
+    name_parts = etree.XPath("mods:namePart", namespaces=namespaces)
+
+    def __init__(
+        self, path_to_roles=Path(__file__).parent / "../config/collection_roles.yml"
+    ):
+        with open(path_to_roles, "r") as roles_file:
+            self.fields = yaml.safe_load(roles_file)["fields"]
+        self.roles = [
+            (field["name"], position, role)
+            for field in self.fields
+            for position, role in enumerate(field["roles"])
+        ]
+        self.lookup = {}
+
+    def __match(self, role_term):
+        if role_term not in self.lookup:
+            self.lookup[role_term] = [
+                (field, position)
+                for field, position, role in self.roles
+                if role in role_term
+            ]
+        return self.lookup[role_term]
+
+    def find(self, mods):
+        """Find the names for each configured field.
+
+        Args:
+            mods (lxml.etree._ElementTree): The MODS record.
+
+        Returns:
+            dict: The names for each field joined with ` | `.
+
+        Examples:
+            >>> from lxml import etree
+            >>> matcher = RoleMatcher()
+            >>> matcher.find(etree.parse("tests/fixtures/harp_1.xml"))
+            {'utk_contributor': '', 'utk_creator': 'Swan, W. H. (William H.) | Swan, Marcus Lafayette | Swan, W. H. (William H.) | Swan, Marcus Lafayette'}
+        """
+        matches = {
+            field["name"]: [[] for role in field["roles"]] for field in self.fields
+        }
+        for name in self.names(mods):
+            matched = set()
+            for role_term in self.role_terms(name):
+                matched.update(self.__match("".join(role_term.itertext())))
+            if len(matched) == 0:
+                continue
+            values = [
+                part.text for part in self.name_parts(name) if part.text is not None
+            ]
+            for field, position in matched:
+                matches[field][position].extend(values)
+        return {
+            field: " | ".join(value for values in by_role for value in values)
+            for field, by_role in matches.items()
+        }
+
+
 class CollectionMetadata:
     """Grabs All Metadata for a Collection Object in Fedora."""
 
-    def __init__(self, pid):
+    def __init__(self, pid, policy_index=None, session=None, role_matcher=None):
         self.pid = pid
+        self.policy_index = policy_index
+        self.session = session
+        self.role_matcher = role_matcher or RoleMatcher()
         self.namespaces = {
             "mods": "http://www.loc.gov/mods/v3",
             "xlink": "http://www.w3.org/1999/xlink",
         }
-        self.mods = self.get_metadata(pid)
+        self.mods = self.get_metadata(pid, session)
 
     def simplify_xpath(self, xpath):
         try:
@@ -39,6 +121,7 @@ class CollectionMetadata:
         return " | ".join(all_matches)
 
     def grab_all_metadata(self):
+        names = self.role_matcher.find(self.mods)
         return {
             "source_identifier": self.pid,
             "model": "Collection",
@@ -46,77 +129,9 @@ class CollectionMetadata:
             "title": self.simplify_xpath("mods:titleInfo/mods:title"),
             "abstract": self.simplify_xpath("mods:abstract"),
             "contributor": "",
-            "utk_contributor": self.get_text_from_multiple_xpaths(
-                [
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Contributor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Addressee")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Arranger")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Associated Name")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Autographer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Censor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Choreographer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Client")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Contractor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Copyright Holder")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Dedicatee")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Depicted")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Distributor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Donor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Editor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Editor of Compilation")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Former Owner")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Honoree")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Host Institution")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Instrumentalist")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Interviewer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Issuing Body")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Music Copyist")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Musical Director")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Organizer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Originator")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Owner")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Performer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Printer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Printer of Plates")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Producer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Production Company")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Publisher")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Restorationist")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Set Designer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Signer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Speaker")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Stage Director")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Stage Manager")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Standards Body")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Surveyor")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Translator")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Videographer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Witness")]]/mods:namePart',
-                ]
-            ),
+            "utk_contributor": names.get("utk_contributor", ""),
             "creator": "",
-            "utk_creator": self.get_text_from_multiple_xpaths(
-                [
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Creator")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Architect")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Artist")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Attributed Name")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Author")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Binding Designer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Cartographer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Compiler")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Composer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Correspondent")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Costume Designer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Designer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Engraver")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Illustrator")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Interviewee")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Lithographer")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Lyricist")]]/mods:namePart',
-                    'mods:name[mods:role/mods:roleTerm[contains(.,"Photographer")]]/mods:namePart',
-                ]
-            ),
+            "utk_creator": names.get("utk_creator", ""),
             "date_created": self.simplify_xpath(
                 "mods:originInfo/mods:dateCreated[not(@encoding)]"
             ),
@@ -145,11 +160,11 @@ class CollectionMetadata:
             "resource_type": "",
             "note": self.simplify_xpath("mods:note"),
             "repository": "",
-            "visibility": self.get_policy(self.pid),
+            "visibility": self.get_policy(self.pid, self.policy_index, self.session),
         }
 
     @staticmethod
-    def get_metadata(pid):
+    def get_metadata(pid, session=None):
         fedora = FedoraObject(
             auth=(
                 os.environ.get("FEDORA_USERNAME"),
@@ -157,6 +172,7 @@ class CollectionMetadata:
             ),
             fedora_uri=os.environ.get("FEDORA_URI"),
             pid=f"{pid.replace('info:fedora/', '').strip()}",
+            session=session,
         )
         r = fedora.streamDatastream("MODS")
         try:
@@ -173,7 +189,11 @@ class CollectionMetadata:
             )
 
     @staticmethod
-    def get_policy(pid):
+    def get_policy(pid, policy_index=None, session=None):
+        if policy_index is not None:
+            restrictions = policy_index.get(pid)
+            if restrictions is not None:
+                return "restricted" if restrictions["work_restricted"] else "open"
         fedora = FedoraObject(
             auth=(
                 os.environ.get("FEDORA_USERNAME"),
@@ -181,34 +201,55 @@ class CollectionMetadata:
             ),
             fedora_uri=os.environ.get("FEDORA_URI"),
             pid=f"{pid.replace('info:fedora/', '').strip()}",
+            session=session,
         )
         r = fedora.streamDatastream("POLICY")
         if r.status_code == 200:
-            with open("tmp/POLICY.xml", "wb") as f:
-                f.write(r.content)
-            restrictions = Restrictions("tmp/POLICY.xml").get()
+            restrictions = Restrictions(r.content).get()
             if restrictions.get("work_restricted", "open"):
                 return "restricted"
-        else:
-            return "open"
+        return "open"
 
 
 class CollectionImporter:
-    def __init__(self, collections):
+    """Harvest metadata for many collections concurrently.
+
+    Collections are fetched by a bounded pool of threads that share one pooled `requests.Session`, and rows are
+    written to the sheet as soon as they are ready, in the order the collections were given.
+
+    Args:
+        collections (list): The pids of the collections to harvest.
+        policy_index (PolicyIndex): Optional index to read collection visibility from.
+        workers (int): The maximum number of collections to fetch at once.
+    """
+
+    def __init__(self, collections, policy_index=None, workers=8):
         self.collections = collections
-        self.collection_metadata = self.__build_collections()
-        self.headers = [k for k, v in self.collection_metadata[0].items()]
+        self.policy_index = policy_index
+        self.workers = workers
+        self.session = pooled_session(workers)
+        self.role_matcher = RoleMatcher()
 
-    def __build_collections(self):
-        return [
-            CollectionMetadata(collection).grab_all_metadata()
-            for collection in tqdm(self.collections)
-        ]
+    def __build_collection(self, collection):
+        return CollectionMetadata(
+            collection, self.policy_index, self.session, self.role_matcher
+        ).grab_all_metadata()
+
+    def build_collections(self):
+        """Yield the metadata for each collection in order as it becomes available."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            yield from tqdm(
+                executor.map(self.__build_collection, self.collections),
+                total=len(self.collections),
+            )
 
     def write_csv(self, filename):
         with open(filename, "w", newline="") as bulkrax_sheet:
-            writer = csv.DictWriter(bulkrax_sheet, fieldnames=self.headers)
-            writer.writeheader()
-            for data in self.collection_metadata:
+            writer = None
+            for data in self.build_collections():
+                if writer is None:
+                    writer = csv.DictWriter(bulkrax_sheet, fieldnames=list(data.keys()))
+                    writer.writeheader()
                 writer.writerow(data)
+                bulkrax_sheet.flush()
         return
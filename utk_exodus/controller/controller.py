@@ -3,9 +3,11 @@ import os
 import requests
 import shutil
 from utk_exodus.finder import FileOrganizer
-from utk_exodus.fedora import FedoraObject
+from utk_exodus.fedora import DatastreamIndex, FedoraObject, fetch_datastream_sizes
 from utk_exodus.curate import FileCurator
+from utk_exodus.manifest import RunManifest
 from utk_exodus.metadata import MetadataMapping
+from utk_exodus.metadata.reader import DEFAULT_EXCLUDE, DEFAULT_INCLUDE
 from utk_exodus.risearch import ResourceIndexSearch
 from utk_exodus.restrict import RestrictionsSheet
 from utk_exodus.validate import ValidateMigration
@@ -14,11 +16,37 @@ from tqdm import tqdm
 
 
 class InterfaceController:
-    def __init__(self, config, output, remote, total_size):
+    def __init__(
+        self,
+        config,
+        output,
+        remote,
+        total_size,
+        cache=None,
+        profile=None,
+        bytes_per_sheet=None,
+        datastream_index=None,
+        include=DEFAULT_INCLUDE,
+        exclude=DEFAULT_EXCLUDE,
+        manifest=None,
+        dedupe=False,
+        resume=False,
+        download_cache="tmp/downloads",
+    ):
         self.config = self.__load_config(config)
         self.output = output
         self.remote = remote
         self.total_size = total_size
+        self.cache = cache
+        self.profile = profile
+        self.bytes_per_sheet = bytes_per_sheet
+        self.datastream_index = datastream_index
+        self.include = include
+        self.exclude = exclude
+        self.manifest = manifest
+        self.dedupe = dedupe
+        self.resume = resume
+        self.download_cache = download_cache
 
     @staticmethod
     def __load_config(config):
@@ -38,23 +66,60 @@ class InterfaceController:
             )
         )
         curator = FileCurator(f"{csv_file}")
-        curator.write_files_and_attachments_only(
-            f"{self.output}/{self.output.split('/')[-1]}.csv_filesheets_and_attachments_only.csv",
+        sizes = None
+        if self.bytes_per_sheet:
+            sizes = {}
+            if self.datastream_index:
+                with DatastreamIndex(self.datastream_index) as index:
+                    sizes = index.sizes()
+            missing = [
+                datastream
+                for datastream in curator.datastreams()
+                if datastream not in sizes
+            ]
+            if missing:
+                sizes.update(
+                    fetch_datastream_sizes(
+                        missing,
+                        auth=(
+                            os.environ.get("FEDORA_USERNAME"),
+                            os.environ.get("FEDORA_PASSWORD"),
+                        ),
+                        fedora_uri=os.environ.get("FEDORA_URI"),
+                    )
+                )
+        name = self.output.split("/")[-1]
+        files_sheets = f"{self.output}/{name}_filesheets_and_attachments_only"
+        works_sheet = f"{self.output}/{name}_works_and_collections_only.csv"
+        counts = curator.bundle(
+            f"{files_sheets}.csv",
+            works_sheet,
             attachments_per_sheet=int(self.total_size),
-            multi_sheets="multi",
+            bytes_per_sheet=self.bytes_per_sheet,
+            sizes=sizes,
         )
-        curator.write_works_and_collections_only(
-            f"{self.output}/{self.output.split('/')[-1]}_works_and_collections_only.csv"
-        )
-        return
+        return {
+            "artifacts": [works_sheet]
+            + [f"{files_sheets}_{sheet}.csv" for sheet in range(counts["sheets"])]
+        }
 
-    def __generate_metadata_sheet(self, path):
+    def __generate_metadata_sheet(self, path, works, work_type=None):
         click.echo(click.style("Generating metadata sheet ...", fg="green", bold=True))
         os.makedirs(self.output, exist_ok=True)
-        metadata = MetadataMapping(self.config, path)
-        os.makedirs("tmp", exist_ok=True)
-        metadata.write_csv("tmp/works.csv")
-        return
+        metadata = MetadataMapping(
+            self.config,
+            path,
+            cache=self.cache,
+            profile=self.profile,
+            include=self.include,
+            exclude=self.exclude,
+            manifest=self.manifest,
+            dedupe=self.dedupe,
+            model=work_type,
+        )
+        os.makedirs(os.path.dirname(works), exist_ok=True)
+        metadata.write_csv(works)
+        return {"artifacts": [works]}
 
     @staticmethod
     def __get_mods(collection, work_type):
@@ -65,7 +130,7 @@ class InterfaceController:
         return risearch
 
     @staticmethod
-    def __get_m3():
+    def __get_m3(m3):
         # TODO changed this temporarily to get things to work
         #r = requests.get(
         #    "https://raw.githubusercontent.com/utkdigitalinitiatives/m3_profiles/main/maps/utk.yml"
@@ -73,36 +138,104 @@ class InterfaceController:
         r = requests.get(
             "http://hykuimports.lib.utk.edu/files/hyku-import/utk.yml"
         )
-        with open("tmp/m3.yml", "wb") as f:
+        with open(m3, "wb") as f:
             f.write(r.content)
         return
 
-    def __grab_file_info(self):
+    def __grab_file_info(self, works, m3):
         click.echo(click.style("Grabbing file info ...", fg="yellow", bold=True))
-        x = FileOrganizer("tmp/works.csv", ["filesets", "attachments"], self.remote)
+        x = FileOrganizer(works, ["filesets", "attachments"], self.remote)
         x.write_csv(f"{self.output}/{self.output.split('/')[-1]}.csv")
-        self.__get_m3()
-        return
+        self.__get_m3(m3)
+        return {"artifacts": [f"{self.output}/{self.output.split('/')[-1]}.csv", m3]}
 
-    def __validate_import(self):
+    def __validate_import(self, m3):
         click.echo(click.style("Validating import ...", fg="blue", bold=True))
         validator = ValidateMigration(
-            profile="tmp/m3.yml",
+            profile=m3,
             migration_sheet=f"{self.output}/{self.output.split('/')[-1]}.csv",
         )
         validator.iterate()
         return
 
-    def build_import_from_directory(self, path):
-        self.__generate_metadata_sheet(path)
-        self.__grab_file_info()
-        self.__validate_import()
-        self.__curate_filesets_and_attachments(
-            f"{self.output}/{self.output.split('/')[-1]}.csv"
+    def __intermediate_files(self):
+        # The works sheet and M3 profile are kept with the run manifest in the output
+        # directory, so a resumed run reads its own and not those of whatever ran in the
+        # meantime.
+        return f"{self.output}/tmp/works.csv", f"{self.output}/tmp/m3.yml"
+
+    def __options(self):
+        # Everything besides the source that changes what the stages write, so a resumed
+        # run with other options starts over instead of reusing files made with the old
+        # ones.
+        return (
+            f"remote={self.remote} total_size={self.total_size} "
+            f"bytes_per_sheet={self.bytes_per_sheet} "
+            f"include={','.join(self.include)} exclude={','.join(self.exclude)} "
+            f"manifest={self.manifest or ''} dedupe={self.dedupe}"
         )
+
+    def run_stages(self, run, stages):
+        """Run the stages of a migration in order, recording each in `run_manifest.csv`.
+
+        The manifest is kept in the output directory. Each stage returns the files it
+        produced, which are recorded as soon as it finishes. With resume, every stage up
+        to the first one that didn't finish in an earlier run of the same source and
+        options is skipped.
+
+        Args:
+            run (str): What is being migrated, e.g. the path or collection, work type
+                and config.
+            stages (list): (name, callable) pairs. Each callable returns a dict with the
+                `artifacts` it wrote, and optionally a `status` and `detail`, or None.
+        """
+        run = f"{run} {self.__options()}"
+        os.makedirs(self.output, exist_ok=True)
+        manifest_path = f"{self.output}/run_manifest.csv"
+        if not self.resume and os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        with RunManifest(manifest_path) as manifest:
+            resuming = self.resume
+            for stage, run_stage in stages:
+                if resuming and manifest.completed(stage, run):
+                    click.echo(f"Skipping {stage}, finished in an earlier run ...")
+                    continue
+                resuming = False
+                try:
+                    result = run_stage() or {}
+                except Exception as e:
+                    manifest.record_stage(
+                        stage,
+                        run,
+                        status="failure",
+                        detail=f"{type(e).__name__}: {e}".strip(),
+                    )
+                    raise
+                manifest.record_stage(stage, run, **result)
         click.echo(click.style("Done ...", fg="cyan", bold=True))
         return
 
+    def build_import_from_directory(self, path, work_type=None):
+        works, m3 = self.__intermediate_files()
+        self.run_stages(
+            " ".join(part for part in (path, work_type, self.config.name) if part),
+            [
+                (
+                    "metadata",
+                    lambda: self.__generate_metadata_sheet(path, works, work_type),
+                ),
+                ("file_info", lambda: self.__grab_file_info(works, m3)),
+                ("validate", lambda: self.__validate_import(m3)),
+                (
+                    "curate",
+                    lambda: self.__curate_filesets_and_attachments(
+                        f"{self.output}/{self.output.split('/')[-1]}.csv"
+                    ),
+                ),
+            ],
+        )
+        return
+
     @staticmethod
     def __get_policies(collection, work_type):
         click.echo(click.style("Finding Policy files ...", fg="red", bold=True))
@@ -111,57 +244,104 @@ class InterfaceController:
         )
         return risearch
 
+    def __download_path(self, collection, work_type, dsid):
+        return (
+            f"{self.download_cache}/{collection.replace(':', '_')}_{work_type}/{dsid}"
+        )
+
     @staticmethod
-    def __download(files, path, dsid):
-        for record in tqdm(files):
+    def __cached(path):
+        with os.scandir(path) as entries:
+            return {
+                entry.name.rsplit(".", 1)[0]
+                for entry in entries
+                if entry.is_file() and not entry.name.endswith(".part")
+            }
+
+    def __download(self, files, path, dsid):
+        # Downloads are kept in the cache after the run. A fresh run starts the cache
+        # over so objects that left the collection don't linger, while a resumed run
+        # only downloads what isn't there yet.
+        if not self.resume and os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+        pids = [record.replace("info:fedora/", "").strip() for record in files]
+        cached = self.__cached(path) if self.resume else set()
+        for pid in tqdm([pid for pid in pids if f"{pid}_{dsid}" not in cached]):
             fedora = FedoraObject(
                 auth=(
                     os.environ.get("FEDORA_USERNAME"),
                     os.environ.get("FEDORA_PASSWORD"),
                 ),
                 fedora_uri=os.environ.get("FEDORA_URI"),
-                pid=f"{record.replace('info:fedora/', '').strip()}",
+                pid=pid,
             )
             fedora.getDatastream(dsid=dsid, output=path)
-        return
+        cached = self.__cached(path)
+        missing = len([pid for pid in pids if f"{pid}_{dsid}" not in cached])
+        if missing:
+            # Later stages still run with what was downloaded, but a resumed run starts
+            # here again for the rest.
+            return {
+                "artifacts": [path],
+                "status": "incomplete",
+                "detail": f"{missing} of {len(pids)} {dsid} datastreams were missing.",
+            }
+        return {"artifacts": [path]}
 
     def __download_policies(self, collection, work_type):
         policies = self.__get_policies(collection, work_type)
-        os.makedirs("tmp/policy_downloads", exist_ok=True)
-        os.makedirs("tmp/policy_downloads/current_collection", exist_ok=True)
-        self.__download(policies, "tmp/policy_downloads/current_collection", "POLICY")
-        return
+        return self.__download(
+            policies, self.__download_path(collection, work_type, "POLICY"), "POLICY"
+        )
 
     def __download_mods(self, collection, work_type):
         mods = self.__get_mods(collection, work_type)
-        os.makedirs("tmp", exist_ok=True)
-        os.makedirs("tmp/mods_downloads", exist_ok=True)
-        os.makedirs("tmp/mods_downloads/current_collection", exist_ok=True)
-        self.__download(mods, "tmp/mods_downloads/current_collection", "MODS")
-        return
+        return self.__download(
+            mods, self.__download_path(collection, work_type, "MODS"), "MODS"
+        )
 
     def restrict_files_and_works(self, original_sheet, policies_location):
         click.echo(click.style("Restricting files and works ...", fg="red", bold=True))
         x = RestrictionsSheet(original_sheet, policies_location)
         x.write_csv(f"{self.output}/{self.output.split('/')[-1]}_visibility.csv")
-        return
+        return {
+            "artifacts": [f"{self.output}/{self.output.split('/')[-1]}_visibility.csv"]
+        }
 
     def download_mods(self, collection, work_type):
         # @TODO: Rename this
         # @TODO: Make sure this works elsewhere
-        self.__download_mods(collection, work_type)
-        self.__generate_metadata_sheet("tmp/mods_downloads/current_collection")
-        shutil.rmtree("tmp/mods_downloads/current_collection")
-        self.__download_policies(collection, work_type)
-        self.__grab_file_info()
-        self.restrict_files_and_works(
-            f"{self.output}/{self.output.split('/')[-1]}.csv",
-            "tmp/policy_downloads/current_collection",
-        )
-        shutil.rmtree("tmp/policy_downloads/current_collection")
-        self.__validate_import()
-        self.__curate_filesets_and_attachments(
-            f"{self.output}/{self.output.split('/')[-1]}_visibility.csv"
+        works, m3 = self.__intermediate_files()
+        self.run_stages(
+            f"{collection} {work_type} {self.config.name}",
+            [
+                ("download_mods", lambda: self.__download_mods(collection, work_type)),
+                (
+                    "metadata",
+                    lambda: self.__generate_metadata_sheet(
+                        self.__download_path(collection, work_type, "MODS"), works
+                    ),
+                ),
+                (
+                    "download_policies",
+                    lambda: self.__download_policies(collection, work_type),
+                ),
+                ("file_info", lambda: self.__grab_file_info(works, m3)),
+                (
+                    "restrict",
+                    lambda: self.restrict_files_and_works(
+                        f"{self.output}/{self.output.split('/')[-1]}.csv",
+                        self.__download_path(collection, work_type, "POLICY"),
+                    ),
+                ),
+                ("validate", lambda: self.__validate_import(m3)),
+                (
+                    "curate",
+                    lambda: self.__curate_filesets_and_attachments(
+                        f"{self.output}/{self.output.split('/')[-1]}_visibility.csv"
+                    ),
+                ),
+            ],
         )
-        click.echo(click.style("Done ...", fg="cyan", bold=True))
         return
@@ -1,65 +1,332 @@
 import csv
+import heapq
+import math
+import re
+from collections import OrderedDict
+
+REMOTE_FILE = re.compile(r"/object/([^/]+)/datastream/([^/?]+)")
+
+
+class _RotatingSheet:
+    """Write rows to `{base}_0.csv`, `{base}_1.csv`, ... starting a new sheet every `rows_per_sheet` rows.
+
+    A sheet is only opened once a row is written to it, so no empty sheets are left behind. With `rows_per_sheet` set
+    to None every row goes to `base_filename` itself, which is written even if it ends up with no rows.
+    """
+
+    def __init__(self, base_filename, headers, rows_per_sheet=None):
+        self.base_filename = base_filename
+        self.headers = headers
+        self.rows_per_sheet = rows_per_sheet
+        self.sheet = None
+        self.writer = None
+        self.rows = 0
+        self.sheets = 0
+        if rows_per_sheet is None:
+            self.__open(base_filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __open(self, filename, newline=''):
+        self.close()
+        self.sheet = open(filename, 'w', newline=newline)
+        self.writer = csv.DictWriter(self.sheet, fieldnames=self.headers)
+        self.writer.writeheader()
+        self.sheets += 1
+
+    def writerow(self, row):
+        if self.rows_per_sheet is not None and self.rows % self.rows_per_sheet == 0:
+            self.__open(f"{self.base_filename.replace('.csv', '')}_{self.sheets}.csv")
+        self.writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        if self.sheet is not None:
+            self.sheet.close()
+            self.sheet = None
+        return
+
+
+class _SheetPool:
+    """Write rows to many numbered sheets while keeping only a few of them open at once.
+
+    Sheets are reopened for appending when a row comes in for one that was closed to make room for another.
+    """
+
+    def __init__(self, base_filename, headers, open_sheets=64):
+        self.base_filename = base_filename
+        self.headers = headers
+        self.open_sheets = open_sheets
+        self.sheets = OrderedDict()
+        self.started = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def filename(self, index):
+        return f"{self.base_filename.replace('.csv', '')}_{index}.csv"
+
+    def writerow(self, index, row):
+        if index in self.sheets:
+            self.sheets.move_to_end(index)
+        else:
+            if len(self.sheets) >= self.open_sheets:
+                self.sheets.popitem(last=False)[1][0].close()
+            mode = 'a' if index in self.started else 'w'
+            sheet = open(self.filename(index), mode, newline='')
+            writer = csv.DictWriter(sheet, fieldnames=self.headers)
+            if index not in self.started:
+                writer.writeheader()
+                self.started.add(index)
+            self.sheets[index] = (sheet, writer)
+        self.sheets[index][1].writerow(row)
+
+    def close(self):
+        for sheet, writer in self.sheets.values():
+            sheet.close()
+        self.sheets.clear()
+        return
 
 
 class FileCurator:
+    """Split an import sheet into a works and collections sheet and one or more files and attachments sheets.
+
+    The sheet is streamed a row at a time, so memory use doesn't grow with its size. `split` writes every output in a
+    single read of it, cutting the files and attachments into fixed slices, while `bundle` keeps each work's files
+    together and balances the sheets by datastream size.
+
+    Args:
+        csv (str): The path to the import sheet.
+        curation_type (str): Which rows count as files: `filesets`, `attachments`, or `both`.
+
+    Examples:
+        >>> curator = FileCurator("import.csv")  # doctest: +SKIP
+        >>> curator.split("files.csv", "works.csv", multi_sheets=True, attachments_per_sheet=500)  # doctest: +SKIP
+        {'works_and_collections': 120, 'files_and_attachments': 1400, 'sheets': 3}
+
+    """
+
     def __init__(self, csv, curation_type="both"):
         self.original_csv = csv
         self.curation_type = curation_type
-        self.files_and_attachments = self.__get_files_and_attachments_only()
+        self.file_models = self.__get_file_models()
         self.headers = self.__get_headers()
 
+    def __get_file_models(self):
+        file_models = {
+            "both": ("Attachment", "FileSet"),
+            "filesets": ("FileSet",),
+            "attachments": ("Attachment",),
+        }
+        return file_models.get(self.curation_type, ())
+
     def __get_headers(self):
-        original_headers = [k for k, v in self.files_and_attachments[0].items()]
-        return original_headers
-
-    def __get_files_and_attachments_only(self):
-        csv_content = []
-        with open(self.original_csv, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if self.curation_type == "both":
-                    if row['model'] == "Attachment" or row['model'] == "FileSet":
-                        csv_content.append(row)
-                elif self.curation_type == "filesets":
-                    if row['model'] == "FileSet":
-                        csv_content.append(row)
-                elif self.curation_type == "attachments":
-                    if row['model'] == "Attachment":
-                        csv_content.append(row)
-        return csv_content
-
-    def __get_works_and_collections(self):
-        csv_content = []
-        with open(self.original_csv, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
+        with open(self.original_csv, 'r', newline='') as csvfile:
+            return csv.DictReader(csvfile).fieldnames or []
+
+    def __rows(self):
+        with open(self.original_csv, 'r', newline='') as csvfile:
+            yield from csv.DictReader(csvfile)
+
+    def split(self, files_filename=None, works_filename=None, multi_sheets=False, attachments_per_sheet=500):
+        """Write the files and attachments sheets and the works and collections sheet in one pass over the input.
+
+        Attachments and FileSets that don't match the curation type are left out of both. Either output can be skipped
+        by passing None for it.
+
+        Args:
+            files_filename (str): The files and attachments sheet, or its base name when writing multiple sheets.
+            works_filename (str): The works and collections sheet.
+            multi_sheets (bool): Whether to start a new files and attachments sheet every `attachments_per_sheet` rows.
+            attachments_per_sheet (int): The number of rows in each files and attachments sheet.
+
+        Returns:
+            dict: The number of rows written to each output and the number of files and attachments sheets.
+        """
+        counts = {"works_and_collections": 0, "files_and_attachments": 0, "sheets": 0}
+        files = None
+        works = None
+        try:
+            if files_filename is not None:
+                files = _RotatingSheet(
+                    files_filename,
+                    self.headers,
+                    rows_per_sheet=int(attachments_per_sheet) if multi_sheets else None,
+                )
+            if works_filename is not None:
+                works = _RotatingSheet(works_filename, self.headers)
+            for row in self.__rows():
                 if row['model'] != "Attachment" and row['model'] != "FileSet":
-                    csv_content.append(row)
-        return csv_content
+                    if works is not None:
+                        works.writerow(row)
+                        counts["works_and_collections"] += 1
+                elif row['model'] in self.file_models and files is not None:
+                    files.writerow(row)
+                    counts["files_and_attachments"] += 1
+        finally:
+            if files is not None:
+                files.close()
+                counts["sheets"] = files.sheets
+            if works is not None:
+                works.close()
+        return counts
 
+    @staticmethod
+    def datastream_of(row):
+        """Get the (pid, dsid) a row's remote_files points to, or None.
 
-    def __write_sheet(self, filename, values, newline=''):
-        with open(filename, 'w', newline=newline) as bulkrax_sheet:
-            writer = csv.DictWriter(bulkrax_sheet, fieldnames=self.headers)
-            writer.writeheader()
-            for data in values:
-                writer.writerow(data)
-        return
+        Examples:
+            >>> FileCurator.datastream_of({"remote_files": "https://esb.lib.utk.edu/islandora/object/harp:1/datastream/OBJ"})
+            ('harp:1', 'OBJ')
+
+        """
+        found = REMOTE_FILE.search(row.get('remote_files') or '')
+        return (found.group(1), found.group(2)) if found else None
+
+    def datastreams(self):
+        """Yield the (pid, dsid) of every file row that will be curated."""
+        for row in self.__rows():
+            if row['model'] in self.file_models:
+                datastream = self.datastream_of(row)
+                if datastream is not None:
+                    yield datastream
+
+    @staticmethod
+    def __group_of(row, attachments):
+        # Attachments belong to their work (a page's attachments to its book) and FileSets to their attachment's work.
+        if row['model'] == "Attachment":
+            attachments[row['source_identifier']] = row['parents']
+            return row['parents']
+        return attachments.get(row['parents'], row['parents'])
+
+    @staticmethod
+    def __assign(groups, count, rows_per_sheet, bytes_per_sheet=None):
+        # Hand out groups largest first to the sheet with the fewest bytes that still has room, opening a new sheet
+        # when none has.
+        sheets = [{"rows": 0, "bytes": 0} for _ in range(count)]
+        smallest = [(0, 0, index) for index in range(count)]
+        assignment = {}
+        for key, group in sorted(
+            groups.items(), key=lambda item: (item[1]["bytes"], item[1]["rows"]), reverse=True
+        ):
+            passed_over = []
+            index = None
+            while smallest:
+                candidate = heapq.heappop(smallest)
+                sheet = sheets[candidate[2]]
+                if sheet["rows"] == 0 or (
+                    sheet["rows"] + group["rows"] <= rows_per_sheet
+                    and (bytes_per_sheet is None or sheet["bytes"] + group["bytes"] <= bytes_per_sheet)
+                ):
+                    index = candidate[2]
+                    break
+                passed_over.append(candidate)
+            if index is None:
+                sheets.append({"rows": 0, "bytes": 0})
+                index = len(sheets) - 1
+            sheets[index]["rows"] += group["rows"]
+            sheets[index]["bytes"] += group["bytes"]
+            assignment[key] = index
+            for candidate in passed_over:
+                heapq.heappush(smallest, candidate)
+            heapq.heappush(smallest, (sheets[index]["bytes"], sheets[index]["rows"], index))
+        return assignment, sheets
+
+    def __pack(self, groups, rows_per_sheet, bytes_per_sheet=None):
+        rows = sum(group["rows"] for group in groups.values())
+        total = sum(group["bytes"] for group in groups.values())
+        count = max(
+            1,
+            math.ceil(rows / rows_per_sheet),
+            math.ceil(total / bytes_per_sheet) if bytes_per_sheet else 1,
+        )
+        assignment, sheets = self.__assign(groups, count, rows_per_sheet, bytes_per_sheet)
+        # Works rarely fill sheets exactly, so a few may not fit in the sheets the totals call for. Rather than leave
+        # them in small overflow sheets, balance everything again across the number of sheets actually needed.
+        while len(sheets) > count:
+            count = len(sheets)
+            assignment, sheets = self.__assign(groups, count, rows_per_sheet, bytes_per_sheet)
+        used = sorted({index for index in assignment.values()})
+        numbers = {index: number for number, index in enumerate(used)}
+        return (
+            {key: numbers[index] for key, index in assignment.items()},
+            [sheets[index]["bytes"] for index in used],
+        )
+
+    def bundle(self, files_filename, works_filename=None, attachments_per_sheet=500, bytes_per_sheet=None, sizes=None):
+        """Write files and attachments sheets that keep each work's rows together and carry similar numbers of bytes.
+
+        The rows of a work, or of a book and all of its pages, always go to the same sheet. Works are handed out
+        largest first to whichever sheet has the fewest bytes so far and still has room, so sheets of TIFF masters and
+        sheets of OCR text end up with similar payloads. A work too big for any sheet gets a sheet of its own. Rows keep
+        their original order within each sheet. The sheet is read twice: once to total up each work and write the
+        works and collections sheet, and once to write the files and attachments sheets.
+
+        Args:
+            files_filename (str): The base name of the files and attachments sheets.
+            works_filename (str): The works and collections sheet, or None to skip it.
+            attachments_per_sheet (int): The most rows a sheet may have unless a single work needs more.
+            bytes_per_sheet (int): The most datastream bytes a sheet may have unless a single work needs more.
+            sizes (dict): The size in bytes of each (pid, dsid), e.g. from `fetch_datastream_sizes`. Without it, sheets
+                are balanced by rows alone.
+
+        Returns:
+            dict: The number of rows written to each output, the number of files and attachments sheets, and the
+                bytes in each of them.
+        """
+        sizes = sizes or {}
+        attachments = {}
+        groups = {}
+        counts = {"works_and_collections": 0, "files_and_attachments": 0, "sheets": 0, "bytes": []}
+        works = _RotatingSheet(works_filename, self.headers) if works_filename else None
+        try:
+            for row in self.__rows():
+                if row['model'] != "Attachment" and row['model'] != "FileSet":
+                    if works is not None:
+                        works.writerow(row)
+                        counts["works_and_collections"] += 1
+                    continue
+                group = self.__group_of(row, attachments)
+                if row['model'] in self.file_models:
+                    stats = groups.setdefault(group, {"rows": 0, "bytes": 0})
+                    stats["rows"] += 1
+                    stats["bytes"] += sizes.get(self.datastream_of(row), 0)
+        finally:
+            if works is not None:
+                works.close()
+        if not groups:
+            return counts
+        assignment, counts["bytes"] = self.__pack(groups, int(attachments_per_sheet), bytes_per_sheet)
+        counts["sheets"] = len(counts["bytes"])
+        attachments = {}
+        with _SheetPool(files_filename, self.headers) as sheets:
+            for row in self.__rows():
+                if row['model'] == "Attachment" or row['model'] == "FileSet":
+                    group = self.__group_of(row, attachments)
+                    if row['model'] in self.file_models:
+                        sheets.writerow(assignment[group], row)
+                        counts["files_and_attachments"] += 1
+        return counts
 
     def write_files_and_attachments_only(self, base_filename, multi_sheets=False, attachments_per_sheet=500):
-        if multi_sheets:
-            bundles = [self.files_and_attachments[i:i + attachments_per_sheet] for i in range(0, len(self.files_and_attachments), attachments_per_sheet)]
-            i = 0
-            for bundle in bundles:
-                self.__write_sheet(f"{base_filename.replace('.csv', '')}_{i}.csv", values=bundle)
-                i += 1
-            return
-        else:
-            self.__write_sheet(base_filename, values=self.files_and_attachments)
-            return
+        self.split(
+            files_filename=base_filename,
+            multi_sheets=multi_sheets,
+            attachments_per_sheet=attachments_per_sheet,
+        )
+        return
 
     def write_works_and_collections_only(self, base_filename):
-        self.__write_sheet(base_filename, values=self.__get_works_and_collections())
+        self.split(works_filename=base_filename)
         return
 
 
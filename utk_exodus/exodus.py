@@ -1,28 +1,46 @@
 #!/usr/bin/env python3
 
-from utk_exodus.finder import FileOrganizer
-from utk_exodus.metadata import MetadataMapping
-from utk_exodus.validate import ValidateMigration
-from utk_exodus.controller import InterfaceController
-from utk_exodus.template import ImportTemplate
-from utk_exodus.combine import ImportRefactor
-from utk_exodus.checksum import HashSheet
-from utk_exodus.collection import CollectionImporter
-from utk_exodus.risearch import ResourceIndexSearch
-from utk_exodus.banish import BanishFiles
-from utk_exodus.fedora import FedoraObject
-from utk_exodus.review import ExistingImport
-from utk_exodus.fixes import FixMetadata
+# Subsystems are imported inside each command so that a command only pays for the dependencies it uses.
+# tests/test_exodus_import_time.py fails if a heavy dependency is imported at module level again.
 import click
-import requests
 import os
-from tqdm import tqdm
-from csv import DictReader
 
 
 @click.group()
-def cli() -> None:
-    pass
+@click.option(
+    "--record",
+    help="Optional: record every HTTP request and response made by the command to this archive.",
+)
+@click.option(
+    "--replay",
+    help="Optional: answer HTTP requests from an archive made with --record instead of the live services.",
+)
+@click.option(
+    "--latency",
+    default=0.0,
+    type=float,
+    help="Seconds to delay each replayed response.",
+)
+@click.option(
+    "--bandwidth",
+    default=None,
+    type=int,
+    help="Bytes per second to send replayed responses at.",
+)
+@click.pass_context
+def cli(ctx, record: str, replay: str, latency: float, bandwidth: int) -> None:
+    if record and replay:
+        raise click.UsageError("Use either --record or --replay, not both.")
+    if record:
+        from utk_exodus.replay import Recorder
+
+        ctx.call_on_close(Recorder(record).start().stop)
+    elif replay:
+        from utk_exodus.replay import Replayer
+
+        ctx.call_on_close(
+            Replayer(replay, latency=latency, bandwidth=bandwidth).start().stop
+        )
 
 
 @cli.command("works", help="Create import sheet for works with metadata.")
@@ -36,7 +54,7 @@ def cli() -> None:
     "--path",
     "-p",
     required=True,
-    help="Path to the directory containing the metadata files.",
+    help="Path to the directory containing the metadata files, a zip or tar archive of them, or a modsCollection or OAI-PMH file.",
 )
 @click.option(
     "--output",
@@ -44,8 +62,72 @@ def cli() -> None:
     default="delete/works.csv",
     help="Path to the output file you want to write to.",
 )
-def works(config: str, path: str, output: str) -> None:
-    metadata = MetadataMapping(config, path)
+@click.option(
+    "--cache",
+    help="Optional: path to an extraction cache so unchanged MODS files are not extracted again on reruns.",
+)
+@click.option(
+    "--profile",
+    help="Optional: path to write a CSV of time spent per mapping row, special property and Resource Index call.",
+)
+@click.option(
+    "--include",
+    multiple=True,
+    default=["*.xml"],
+    show_default=True,
+    help="When --path is a directory, only read files matching this glob. Can be given more than once.",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    default=["._*", "__MACOSX"],
+    show_default=True,
+    help="When --path is a directory, skip files and directories matching this glob. Can be given more than once.",
+)
+@click.option(
+    "--manifest",
+    help="Optional: a file listing the metadata files to read, one per line relative to --path, instead of scanning it.",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help="Reuse extracted values across MODS records that only differ in their identifiers.",
+)
+@click.option(
+    "--model",
+    "-m",
+    type=click.Choice(
+        ["book", "image", "large_image", "pdf", "audio", "video", "compound"], case_sensitive=False
+    ),
+    help="When --path is a modsCollection or OAI-PMH file, the model of its records. By default, it's worked out from typeOfResource and genre.",
+)
+def works(
+    config: str,
+    path: str,
+    output: str,
+    cache: str,
+    profile: str,
+    include: tuple,
+    exclude: tuple,
+    manifest: str,
+    dedupe: bool,
+    model: str,
+) -> None:
+    import requests
+    from utk_exodus.metadata import MetadataMapping
+    from utk_exodus.validate import ValidateMigration
+
+    metadata = MetadataMapping(
+        config,
+        path,
+        cache=cache,
+        profile=profile,
+        include=include,
+        exclude=exclude,
+        manifest=manifest,
+        dedupe=dedupe,
+        model=model,
+    )
     metadata.write_csv(output)
     # TODO changed this temporarily to get things to work
     #r = requests.get(
@@ -82,6 +164,8 @@ def works(config: str, path: str, output: str) -> None:
     default="https://esb.lib.utk.edu/islandora/object/",
 )
 def add_files(sheet: str, files_sheet: str, what_to_add: str, remote: str) -> None:
+    from utk_exodus.finder import FileOrganizer
+
     if not files_sheet:
         files_sheet = f"{sheet.replace('.csv', '')}_with_filesets_and_attachments.csv"
     if what_to_add == "everything":
@@ -113,12 +197,12 @@ def add_files(sheet: str, files_sheet: str, what_to_add: str, remote: str) -> No
     type=click.Choice(
         ["book", "image", "large_image", "pdf", "audio", "video", "compound"], case_sensitive=False
     ),
-    help="The model you want to download metadata for.",
+    help="The model you want to download metadata for, or with --path to a modsCollection or OAI-PMH file, the model of its records.",
 )
 @click.option(
     "--path",
     "-p",
-    help="Path to the directory containing the metadata files.",
+    help="Path to the directory containing the metadata files, a zip or tar archive of them, or a modsCollection or OAI-PMH file.",
 )
 @click.option(
     "--output",
@@ -139,6 +223,52 @@ def add_files(sheet: str, files_sheet: str, what_to_add: str, remote: str) -> No
     help="Specify maximum number of attachments and filesets per sheet.",
     default=800,
 )
+@click.option(
+    "--cache",
+    help="Optional: path to an extraction cache so unchanged MODS files are not extracted again on reruns.",
+)
+@click.option(
+    "--profile",
+    help="Optional: path to write a CSV of time spent per mapping row, special property and Resource Index call.",
+)
+@click.option(
+    "--bytes_per_sheet",
+    "-b",
+    type=int,
+    help="Optional: balance files sheets by datastream size from Fedora, with at most this many bytes per sheet.",
+)
+@click.option(
+    "--datastream_index",
+    help="Optional: a datastream index from index_datastreams to read sizes from before asking Fedora.",
+)
+@click.option(
+    "--include",
+    multiple=True,
+    default=["*.xml"],
+    show_default=True,
+    help="When --path is a directory, only read files matching this glob. Can be given more than once.",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    default=["._*", "__MACOSX"],
+    show_default=True,
+    help="When --path is a directory, skip files and directories matching this glob. Can be given more than once.",
+)
+@click.option(
+    "--manifest",
+    help="Optional: a file listing the metadata files to read, one per line relative to --path, instead of scanning it.",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help="Reuse extracted values across MODS records that only differ in their identifiers.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Pick up a failed run in --output from its first unfinished stage, reusing downloaded MODS and policies.",
+)
 def works_and_files(
     collection: str,
     config: str,
@@ -147,13 +277,52 @@ def works_and_files(
     output: str,
     remote: str,
     total_size: int,
+    cache: str,
+    profile: str,
+    bytes_per_sheet: int,
+    datastream_index: str,
+    include: tuple,
+    exclude: tuple,
+    manifest: str,
+    dedupe: bool,
+    resume: bool,
 ) -> None:
+    from utk_exodus.controller import InterfaceController
+
     if model and collection:
-        interface = InterfaceController(config, output, remote, total_size)
+        interface = InterfaceController(
+            config,
+            output,
+            remote,
+            total_size,
+            cache,
+            profile,
+            bytes_per_sheet,
+            datastream_index,
+            include=include,
+            exclude=exclude,
+            manifest=manifest,
+            dedupe=dedupe,
+            resume=resume,
+        )
         interface.download_mods(collection, model)
     elif path:
-        interface = InterfaceController(config, output, remote, total_size)
-        interface.build_import_from_directory(path)
+        interface = InterfaceController(
+            config,
+            output,
+            remote,
+            total_size,
+            cache,
+            profile,
+            bytes_per_sheet,
+            datastream_index,
+            include=include,
+            exclude=exclude,
+            manifest=manifest,
+            dedupe=dedupe,
+            resume=resume,
+        )
+        interface.build_import_from_directory(path, model)
     else:
         print(
             "You must specify either a path to a directory or both a collection and model."
@@ -191,6 +360,9 @@ def generate_sheet(
     model: str,
     output: str,
 ) -> None:
+    import requests
+    from utk_exodus.template import ImportTemplate
+
     # TODO changed this temporarily to get things to work, might want to change it back, maybe not
     #r = requests.get(
     #    "https://raw.githubusercontent.com/utkdigitalinitiatives/m3_profiles/main/maps/utk.yml"
@@ -230,6 +402,8 @@ def remove_old_values(
     old_sheet: str,
     new_sheet: str,
 ) -> None:
+    from utk_exodus.combine import ImportRefactor
+
     ir = ImportRefactor(sheet, old_sheet)
     ir.create_csv_with_fields_to_nuke(sheet, new_sheet)
     print(f"Refactored sheet written to {new_sheet}.")
@@ -251,16 +425,89 @@ def remove_old_values(
     required=True,
     help="Specify where you want to write your sheets.",
 )
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Use the checksums Fedora stores for each datastream and only download files it has no SHA-1 for.",
+)
+@click.option(
+    "--index",
+    "-i",
+    help="Optional: with --verify, a datastream index from index_datastreams to read stored checksums from.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=8,
+    type=int,
+    help="With --verify, how many files to check at once.",
+)
 def hash_errors(
     path: str,
     output: str,
+    verify: bool,
+    index: str,
+    workers: int,
 ) -> None:
+    from utk_exodus.checksum import HashSheet
+
     print(f"Generating checksums for bad files in csvs in {path}.")
-    hs = HashSheet(path, output)
+    hs = HashSheet(
+        path,
+        output,
+        verify=verify,
+        auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
+        fedora_uri=os.getenv("FEDORA_URI"),
+        index=index,
+        workers=workers,
+    )
     hs.write()
     print(f"Hash sheet written to {output}.")
 
 
+@cli.command(
+    "precheck_files",
+    help="Check that every remote_files URL in a sheet or directory of sheets can be fetched before importing.",
+)
+@click.option(
+    "--path",
+    "-p",
+    required=True,
+    help="The import sheet or directory of sheets to check.",
+)
+@click.option(
+    "--output",
+    "-o",
+    default="precheck",
+    help="The directory to write the report and failure sheets to.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=16,
+    type=int,
+    help="How many URLs to check at once.",
+)
+@click.option(
+    "--timeout",
+    default=30.0,
+    type=float,
+    help="Seconds to wait for each URL.",
+)
+def precheck_files(
+    path: str,
+    output: str,
+    workers: int,
+    timeout: float,
+) -> None:
+    from utk_exodus.precheck import RemoteFileCheck
+
+    results = RemoteFileCheck(path, output, workers=workers, timeout=timeout).run()
+    print(f"Checked {results['checked']} remote files and {results['failed']} failed.")
+    for sheet in results["failure_sheets"]:
+        print(f"Rows with failed files written to {sheet}.")
+
+
 @cli.command(
     "generate_collection_metadata",
     help="Generate metadata for a collection.",
@@ -278,19 +525,40 @@ def hash_errors(
     default="tmp/collections.csv",
     help="Specify where to write output.",
 )
+@click.option(
+    "--policies",
+    "-p",
+    required=False,
+    help="Optional: a directory of downloaded collection POLICY files to read visibility from.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    required=False,
+    default=8,
+    type=int,
+    help="Maximum number of collections to fetch from Fedora at once.",
+)
 def generate_collection_metadata(
     collection: str,
     output: str,
+    policies: str,
+    workers: int,
 ) -> None:
+    from utk_exodus.collection import CollectionImporter
+    from utk_exodus.restrict import PolicyIndex
+    from utk_exodus.risearch import ResourceIndexSearch
+
+    policy_index = PolicyIndex(policies).build() if policies else None
     if collection:
         print(f"Generating metadata for {collection}.")
-        x = CollectionImporter([collection])
+        x = CollectionImporter([collection], policy_index, workers)
     else:
         print("Generating metadata for all collections.")
         collections = ResourceIndexSearch().find_all_collections()
-        x = CollectionImporter(collections)
+        x = CollectionImporter(collections, policy_index, workers)
     x.write_csv(output)
-    print("Done. Metadata written to tmp/all_collections.csv.")
+    print(f"Done. Metadata written to {output}.")
 
 @cli.command(
     "banish",
@@ -305,6 +573,9 @@ def generate_collection_metadata(
 def banish(
     directory: str,
 ) -> None:
+    from tqdm import tqdm
+    from utk_exodus.banish import BanishFiles
+
     print(f"MODS and POLICIES From {directory}.")
     for path, directories, files in os.walk(directory):
         for file in tqdm(files):
@@ -340,20 +611,43 @@ def banish(
     required=True,
     help="The datastream you want to download versions of.",
 )
+@click.option(
+    "--manifest",
+    "-m",
+    help="Optional: where to record each download. Defaults to {dsid}_versions_manifest.csv in the directory.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=8,
+    type=int,
+    help="How many requests to make at once.",
+)
 def get_all_versions(
     directory: str,
     type: str,
     dsid: str,
+    manifest: str,
+    workers: int,
 ) -> None:
+    from utk_exodus.fedora import VersionHarvester
+    from utk_exodus.risearch import ResourceIndexSearch
+
     print(f"Downloading all versions of {dsid} to {directory}.")
-    for pid in tqdm(ResourceIndexSearch().get_works_of_a_type_with_dsid(type, dsid)):
-        fedora = FedoraObject(
-            auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
-            fedora_uri=os.getenv("FEDORA_URI"),
-            pid=pid,
-        )
-        fedora.write_all_versions(dsid, directory)
-    print("Done.")
+    harvester = VersionHarvester(
+        ResourceIndexSearch().get_works_of_a_type_with_dsid(type, dsid),
+        dsid,
+        directory,
+        auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
+        fedora_uri=os.getenv("FEDORA_URI"),
+        manifest=manifest,
+        workers=workers,
+    )
+    counts = harvester.run()
+    print(
+        f"Done. Downloaded {counts['success']}, skipped {counts['skipped']} already on disk, "
+        f"and {counts['failure']} failed. See {harvester.manifest_path}."
+    )
 
 @cli.command(
     "export_errors",
@@ -375,6 +669,9 @@ def export_errors(
     csv: str,
     directory: str,
 ) -> None:
+    from csv import DictReader
+    from utk_exodus.review import ExistingImport
+
     print(f"Exporting errors from {csv} to {directory}.")
     with open(csv, "r") as file:
         reader = DictReader(file)
@@ -393,20 +690,133 @@ def export_errors(
     required=True,
     help="Path to the Original Files",
 )
+@click.option(
+    "--manifest",
+    "-m",
+    default="add_datastreams_manifest.csv",
+    help="Where to record what was added. Datastreams it lists as added are skipped on reruns.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=8,
+    type=int,
+    help="How many datastreams to upload at once.",
+)
 def add_datastreams(
     path: str,
+    manifest: str,
+    workers: int,
 ) -> None:
+    from utk_exodus.fedora import DatastreamUploader
+
     print(f"Adding datastreams {path}.")
-    for path, directories, files in os.walk(path):
-        for file in tqdm(files):
-            pid = file.split('_')[0]
-            dsid = file.split('_')[1].split('.')[0]
-            fedora = FedoraObject(
-                auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
-                fedora_uri=os.getenv("FEDORA_URI"),
-                pid=pid,
-            )
-            fedora.add_datastream(dsid, os.path.join(path, file))
+    counts = DatastreamUploader(
+        path,
+        auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
+        fedora_uri=os.getenv("FEDORA_URI"),
+        manifest=manifest,
+        workers=workers,
+    ).run()
+    print(
+        f"Done. Added {counts['success']}, skipped {counts['skipped']} already added, "
+        f"and {counts['failure']} failed. See {manifest}."
+    )
+
+@cli.command(
+    "move_pages",
+    help="Move and resequence book pages from a CSV with page, new_book, and new_sequence columns.",
+)
+@click.option(
+    "--sheet",
+    "-s",
+    required=True,
+    help="The CSV of page moves.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=8,
+    type=int,
+    help="How many pages to move at once.",
+)
+def move_pages(
+    sheet: str,
+    workers: int,
+) -> None:
+    from utk_exodus.fedora import PageMover
+
+    mover = PageMover(
+        sheet,
+        auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
+        fedora_uri=os.getenv("FEDORA_URI"),
+        workers=workers,
+    )
+    failures = mover.run()
+    for page, status in failures:
+        print(f"{status} on {page}.")
+    print(f"Done. Moved {len(mover.moves) - len(failures)} of {len(mover.moves)} pages.")
+
+
+@cli.command(
+    "index_datastreams",
+    help="Index the size, MIME type and stored checksum of every datastream on a list of objects.",
+)
+@click.option(
+    "--pids",
+    "-p",
+    required=True,
+    help="A file with one pid per line.",
+)
+@click.option(
+    "--index",
+    "-i",
+    default="datastreams.db",
+    help="The sqlite index to write to. Objects already in it are skipped.",
+)
+@click.option(
+    "--dsid",
+    "-ds",
+    multiple=True,
+    help="Optional: only index this datastream. Can be given more than once.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default=8,
+    type=int,
+    help="How many objects to index at once.",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Index objects again even if they are already in the index.",
+)
+def index_datastreams(
+    pids: str,
+    index: str,
+    dsid: tuple,
+    workers: int,
+    refresh: bool,
+) -> None:
+    from utk_exodus.fedora import DatastreamIndex
+
+    with open(pids, "r") as pid_list:
+        objects = [line.strip() for line in pid_list if line.strip()]
+    with DatastreamIndex(index) as datastream_index:
+        counts = datastream_index.harvest(
+            objects,
+            auth=(os.getenv("FEDORA_USERNAME"), os.getenv("FEDORA_PASSWORD")),
+            fedora_uri=os.getenv("FEDORA_URI"),
+            workers=workers,
+            dsids=list(dsid) or None,
+            refresh=refresh,
+        )
+    print(
+        f"Done. Indexed {counts['indexed']} objects, skipped {counts['skipped']} already indexed, "
+        f"and {counts['failure']} failed. Index written to {index}."
+    )
+
 
 @cli.command(
     "fix_metadata_sheet",
@@ -437,6 +847,9 @@ def fix_metadata(
     titles: str,
     remove_columns: str
 ) -> None:
+    from tqdm import tqdm
+    from utk_exodus.fixes import FixMetadata
+
     rc = (remove_columns.lower() == "y" or remove_columns.lower() == "yes")
     print(f"Running metadata fixes on {csv} and restricting {titles} " + ("and removing all columns except 'source_identifier', 'title', 'model', 'visibility'" if rc else "and keeping all columns"))
     path = csv
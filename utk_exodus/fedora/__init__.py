@@ -1,2 +1,20 @@
-from .fedora import FedoraObject
-__all__ = [ "FedoraObject" ]
\ No newline at end of file
+from .fedora import (
+    DatastreamIndex,
+    DatastreamUploader,
+    FedoraObject,
+    PageMover,
+    RelsExt,
+    VersionHarvester,
+    fetch_datastream_sizes,
+    pooled_session,
+)
+__all__ = [
+    "DatastreamIndex",
+    "DatastreamUploader",
+    "FedoraObject",
+    "PageMover",
+    "RelsExt",
+    "VersionHarvester",
+    "fetch_datastream_sizes",
+    "pooled_session",
+]
@@ -1,13 +1,110 @@
+import csv
+import os
 import requests
+import sqlite3
 import xmltodict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from lxml import etree
+from tqdm import tqdm
 from urllib.parse import quote
+from xml.parsers.expat import ExpatError
+from utk_exodus.manifest import Manifest
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+IS_PAGE_OF = "http://islandora.ca/ontology/relsext#isPageOf"
+IS_MEMBER_OF = "info:fedora/fedora-system:def/relations-external#isMemberOf"
+SEQUENCE_PREDICATES = (
+    "http://islandora.ca/ontology/relsext#isSequenceNumber",
+    "http://islandora.ca/ontology/relsext#isPageNumber",
+    "http://islandora.ca/ontology/relsext#isSection",
+)
+
+
+def pooled_session(workers):
+    """Build a requests.Session whose connection pool is big enough for `workers` threads to share."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=workers, pool_maxsize=workers
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RelsExt:
+    """Edit the relationships in a RELS-EXT in memory so any number of changes can be written back in one request.
+
+    Predicates are full URIs, like the ones `FedoraObject.add_relationship` takes. Objects are literals unless
+    `is_literal` is False, in which case they are written as `rdf:resource`.
+
+    Args:
+        content (bytes): The RELS-EXT datastream.
+
+    Examples:
+        >>> rels_ext = RelsExt(open("tests/fixtures/rels_ext/beacon_35815_RELS-EXT.xml", "rb").read())
+        >>> rels_ext.objects("http://islandora.ca/ontology/relsext#isPageOf")
+        ['info:fedora/beacon:35814']
+        >>> rels_ext.replace("http://islandora.ca/ontology/relsext#isPageOf", "info:fedora/beacon:35825", is_literal=False)
+        >>> rels_ext.objects("http://islandora.ca/ontology/relsext#isPageOf")
+        ['info:fedora/beacon:35825']
+
+    """
+
+    def __init__(self, content):
+        self.root = etree.fromstring(content)
+        self.description = self.root.find(f"{{{RDF}}}Description")
+
+    @staticmethod
+    def __split(predicate):
+        separator = max(predicate.rfind("#"), predicate.rfind("/"))
+        return predicate[: separator + 1], predicate[separator + 1 :]
+
+    def __find(self, predicate):
+        namespace, name = self.__split(predicate)
+        return self.description.findall(f"{{{namespace}}}{name}")
+
+    @staticmethod
+    def __object(element):
+        return element.get(f"{{{RDF}}}resource", element.text)
+
+    def objects(self, predicate):
+        """Get the objects of every relationship with a predicate."""
+        return [self.__object(element) for element in self.__find(predicate)]
+
+    def remove(self, predicate, object=None):
+        """Remove relationships with a predicate, either all of them or only the ones with a particular object."""
+        for element in self.__find(predicate):
+            if object is None or self.__object(element) == object:
+                self.description.remove(element)
+        return
+
+    def add(self, predicate, object, is_literal=True):
+        """Add a relationship."""
+        namespace, name = self.__split(predicate)
+        element = etree.SubElement(self.description, f"{{{namespace}}}{name}")
+        if is_literal:
+            element.text = object
+        else:
+            element.set(f"{{{RDF}}}resource", object)
+        return
+
+    def replace(self, predicate, object, is_literal=True):
+        """Replace every relationship with a predicate with a single one."""
+        self.remove(predicate)
+        self.add(predicate, object, is_literal)
+        return
+
+    def serialize(self):
+        return etree.tostring(self.root, xml_declaration=True, encoding="UTF-8")
 
 
 class FedoraObject:
-    def __init__(self, auth, fedora_uri, pid):
+    def __init__(self, auth, fedora_uri, pid, session=None):
         self.auth = auth
         self.fedora_uri = fedora_uri
         self.pid = f"{pid.replace('info:fedora/','').strip()}"
+        # A shared requests.Session lets concurrent callers reuse pooled connections.
+        self.session = session if session is not None else requests
 
     @staticmethod
     def __guess_extension(content_type):
@@ -28,33 +125,30 @@ class FedoraObject:
 
     def getDatastream(self, dsid, output, as_of_date=None):
         if as_of_date:
-            r = requests.get(
+            r = self.session.get(
                 f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}/content?asOfDateTime={as_of_date}",
                 auth=self.auth,
                 allow_redirects=True,
             )
         else:
-            r = requests.get(
+            r = self.session.get(
                 f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}/content",
                 auth=self.auth,
                 allow_redirects=True,
             )
-        if r.status_code == 200 and as_of_date:
-            open(
-                f'{output}/{self.pid}_{dsid}_{as_of_date}.{self.__guess_extension(r.headers.get("Content-Type", "application/binary"))}',
-                "wb",
-            ).write(r.content)
-        elif r.status_code == 200:
-            open(
-                f'{output}/{self.pid}_{dsid}.{self.__guess_extension(r.headers.get("Content-Type", "application/binary"))}',
-                "wb",
-            ).write(r.content)
+        if r.status_code == 200:
+            name = f"{self.pid}_{dsid}_{as_of_date}" if as_of_date else f"{self.pid}_{dsid}"
+            path = f'{output}/{name}.{self.__guess_extension(r.headers.get("Content-Type", "application/binary"))}'
+            # Written under a temporary name first, so an interrupted download never leaves a partial file behind.
+            with open(f"{path}.part", "wb") as download:
+                download.write(r.content)
+            os.replace(f"{path}.part", path)
         else:
             print(f"{r.status_code} on {self.pid}.")
         return
 
     def streamDatastream(self, dsid):
-        r = requests.get(
+        r = self.session.get(
             f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}/content",
             auth=self.auth,
             allow_redirects=True,
@@ -63,13 +157,89 @@ class FedoraObject:
         return r
 
     def getDatastreamHistory(self, dsid):
-        r = requests.get(
+        r = self.session.get(
             f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}/history?format=xml",
             auth=self.auth,
             allow_redirects=True,
         )
         return xmltodict.parse(r.content.decode("utf-8"))
 
+    def get_versions(self, dsid):
+        """Get the creation date, size and MIME type of every version of a datastream."""
+        profiles = self.getDatastreamHistory(dsid)["datastreamHistory"]["datastreamProfile"]
+        if isinstance(profiles, dict):
+            profiles = [profiles]
+        return [
+            {
+                "created": profile["dsCreateDate"],
+                "size": int(profile.get("dsSize") or 0),
+                "mime": profile.get("dsMIME") or "application/binary",
+            }
+            for profile in profiles
+        ]
+
+    def list_datastreams(self):
+        """Get the id of every datastream on the object."""
+        r = self.session.get(
+            f"{self.fedora_uri}/objects/{self.pid}/datastreams?format=xml",
+            auth=self.auth,
+            allow_redirects=True,
+        )
+        r.raise_for_status()
+        return [
+            datastream.get("dsid")
+            for datastream in etree.fromstring(r.content).iterfind("{*}datastream")
+        ]
+
+    def get_datastream_profile(self, dsid):
+        """Get the size, MIME type, creation date and stored checksum of the current version of a datastream.
+
+        Nothing but the profile is fetched, so this is cheap even for very large datastreams. `checksum_type` is
+        `DISABLED` and `checksum` is `none` when Fedora isn't keeping a checksum for the datastream.
+        """
+        r = self.session.get(
+            f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}?format=xml",
+            auth=self.auth,
+            allow_redirects=True,
+        )
+        r.raise_for_status()
+        profile = xmltodict.parse(r.content.decode("utf-8"))["datastreamProfile"]
+        return {
+            "pid": self.pid,
+            "dsid": dsid,
+            "label": profile.get("dsLabel") or "",
+            "control_group": profile.get("dsControlGroup") or "",
+            "created": profile.get("dsCreateDate") or "",
+            "size": int(profile.get("dsSize") or 0),
+            "mime": profile.get("dsMIME") or "application/binary",
+            "checksum_type": profile.get("dsChecksumType") or "DISABLED",
+            "checksum": profile.get("dsChecksum") or "none",
+        }
+
+    def version_path(self, dsid, output, version):
+        """Get the path write_all_versions would save a version from get_versions to."""
+        return f"{output}/{self.pid}_{dsid}_{version['created']}.{self.__guess_extension(version['mime'])}"
+
+    def download_datastream(self, dsid, path, as_of_date=None):
+        """Stream a datastream to a path, only putting it in place once it is complete.
+
+        Returns:
+            tuple: The status code and the number of bytes written.
+        """
+        url = f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}/content"
+        if as_of_date:
+            url = f"{url}?asOfDateTime={as_of_date}"
+        written = 0
+        with self.session.get(url, auth=self.auth, allow_redirects=True, stream=True) as r:
+            if r.status_code != 200:
+                return r.status_code, written
+            with open(f"{path}.part", "wb") as output:
+                for chunk in r.iter_content(chunk_size=65536):
+                    output.write(chunk)
+                    written += len(chunk)
+        os.replace(f"{path}.part", path)
+        return r.status_code, written
+
     def write_all_versions(self, dsid, output):
         history = self.getDatastreamHistory(dsid)
         if isinstance(history["datastreamHistory"]["datastreamProfile"], dict):
@@ -82,25 +252,73 @@ class FedoraObject:
         return
 
     def add_datastream(self, dsid, file, mimetype="text/plain"):
-        r = requests.post(
-            f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}?controlGroup=M&dsLabel={dsid}&versionable=true"
-            f"&dsState=A&logMessage=Added+{dsid}+datastream+to+{self.pid}.",
+        # Passing the open file streams the body instead of reading it into memory, and the with closes it.
+        with open(file, "rb") as data:
+            r = self.session.post(
+                f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}?controlGroup=M&dsLabel={dsid}&versionable=true"
+                f"&dsState=A&logMessage=Added+{dsid}+datastream+to+{self.pid}.",
+                auth=self.auth,
+                headers={"Content-Type": mimetype},
+                data=data,
+            )
+        return r
+
+    def modify_datastream(self, dsid, content, mimetype="text/plain"):
+        r = self.session.put(
+            f"{self.fedora_uri}/objects/{self.pid}/datastreams/{dsid}?logMessage=Modified+{dsid}+on+{self.pid}.",
             auth=self.auth,
             headers={"Content-Type": mimetype},
-            data=open(file, "rb"),
+            data=content,
         )
         return r
 
+    def edit_rels_ext(self, edit):
+        """Read the RELS-EXT once, apply `edit` to it in memory, and write it back with one modifyDatastream call.
+
+        Args:
+            edit (callable): Called with a RelsExt to change.
+
+        Returns:
+            requests.Response: The response of the write, or of the read if it failed.
+        """
+        r = self.session.get(
+            f"{self.fedora_uri}/objects/{self.pid}/datastreams/RELS-EXT/content",
+            auth=self.auth,
+            allow_redirects=True,
+        )
+        if r.status_code != 200:
+            return r
+        rels_ext = RelsExt(r.content)
+        edit(rels_ext)
+        return self.modify_datastream(
+            "RELS-EXT", rels_ext.serialize(), "application/rdf+xml"
+        )
+
+    def move_page(self, book_pid, sequence_number):
+        """Make this page part of a book at a sequence number in a single RELS-EXT write.
+
+        This does what remove_membership_of_page, add_membership_of_page, remove_sequencing and add_sequencing do
+        together, but replaces whatever book and sequence the page had instead of needing to be told them.
+        """
+
+        def edit(rels_ext):
+            for predicate in (IS_PAGE_OF, IS_MEMBER_OF):
+                rels_ext.replace(predicate, f"info:fedora/{book_pid}", is_literal=False)
+            for predicate in SEQUENCE_PREDICATES:
+                rels_ext.replace(predicate, str(sequence_number))
+
+        return self.edit_rels_ext(edit)
+
     def purge_relationship(self, predicate, object, is_literal=True):
         body = f"/objects/{self.pid}/relationships?subject=info%3afedora/{self.pid}&predicate={quote(predicate)}&object={quote(object)}&isLiteral={is_literal}"
-        r = requests.delete(
+        r = self.session.delete(
             f"{self.fedora_uri}{body}",
             auth=self.auth,
         )
         return r
 
     def add_relationship(self, predicate, object, is_literal=True):
-        r = requests.post(
+        r = self.session.post(
             f"{self.fedora_uri}/objects/{self.pid}/relationships/new?subject=info%3afedora/{self.pid}&predicate={quote(predicate)}&object={quote(object)}&isLiteral={is_literal}",
             auth=self.auth,
         )
@@ -153,6 +371,493 @@ class FedoraObject:
         return
 
 
+class PageMover:
+    """Move and resequence pages from a CSV, several pages at a time.
+
+    The CSV needs `page`, `new_book`, and `new_sequence` columns. Each page's RELS-EXT is read and written once, and
+    pages are handled by a bounded pool of threads that share one pooled `requests.Session`.
+
+    Args:
+        sheet (str): The path to the CSV.
+        auth (tuple): The Fedora username and password.
+        fedora_uri (str): The Fedora base URI.
+        workers (int): The maximum number of pages to move at once.
+    """
+
+    def __init__(self, sheet, auth, fedora_uri, workers=8):
+        self.moves = self.__read_sheet(sheet)
+        self.auth = auth
+        self.fedora_uri = fedora_uri
+        self.workers = workers
+        self.session = pooled_session(workers)
+
+    @staticmethod
+    def __read_sheet(sheet):
+        with open(sheet, "r", newline="") as moves:
+            return [row for row in csv.DictReader(moves)]
+
+    def __move(self, move):
+        page = FedoraObject(self.auth, self.fedora_uri, move["page"], self.session)
+        try:
+            r = page.move_page(
+                move["new_book"].replace("info:fedora/", "").strip(),
+                move["new_sequence"].strip(),
+            )
+            return move["page"], r.status_code
+        except requests.RequestException as e:
+            return move["page"], str(e)
+
+    def run(self):
+        """Move every page in the sheet.
+
+        Returns:
+            list: The page and status code or error of every move that failed.
+        """
+        failures = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for page, status in tqdm(
+                executor.map(self.__move, self.moves), total=len(self.moves)
+            ):
+                if status not in (200, 201):
+                    failures.append((page, status))
+        return failures
+
+
+class DatastreamUploader:
+    """Add datastreams from a directory of files named `{pid}_{dsid}.{extension}`, several at a time.
+
+    Uploads are streamed from disk by a bounded pool of threads that share one pooled `requests.Session`. Every
+    result is written to a manifest as it happens, and datastreams the manifest says were already added are skipped,
+    so an interrupted or partly failed run can simply be run again.
+
+    Args:
+        path (str): The directory of files to add.
+        auth (tuple): The Fedora username and password.
+        fedora_uri (str): The Fedora base URI.
+        manifest (str): The path to the manifest CSV.
+        workers (int): The maximum number of uploads at once.
+    """
+
+    fieldnames = ["pid", "dsid", "file", "size", "status", "message"]
+
+    def __init__(
+        self,
+        path,
+        auth,
+        fedora_uri,
+        manifest="add_datastreams_manifest.csv",
+        workers=8,
+    ):
+        self.path = path
+        self.auth = auth
+        self.fedora_uri = fedora_uri
+        self.manifest_path = manifest
+        self.workers = workers
+        self.session = pooled_session(workers)
+
+    def __files(self):
+        manifest = os.path.abspath(self.manifest_path)
+        for root, directories, files in os.walk(self.path):
+            for file in files:
+                full_path = os.path.join(root, file)
+                if os.path.abspath(full_path) != manifest:
+                    pid = file.split("_")[0]
+                    dsid = file.split("_")[1].split(".")[0]
+                    yield pid, dsid, full_path
+
+    def __upload(self, upload):
+        pid, dsid, file = upload
+        row = {"pid": pid, "dsid": dsid, "file": file, "size": os.path.getsize(file)}
+        try:
+            fedora = FedoraObject(self.auth, self.fedora_uri, pid, self.session)
+            r = fedora.add_datastream(dsid, file)
+            if r.status_code in (200, 201):
+                return {**row, "status": "success"}
+            return {**row, "status": "failure", "message": f"{r.status_code} on {pid}."}
+        except (OSError, requests.RequestException) as e:
+            return {**row, "status": "failure", "message": str(e)}
+
+    def run(self):
+        """Add every datastream that hasn't been added yet.
+
+        Returns:
+            dict: How many datastreams were added, skipped and failed.
+        """
+        counts = {"success": 0, "skipped": 0, "failure": 0}
+        with Manifest(self.manifest_path, self.fieldnames, ["pid", "dsid"]) as manifest:
+            uploads = []
+            for pid, dsid, file in self.__files():
+                if manifest.succeeded(pid, dsid):
+                    counts["skipped"] += 1
+                else:
+                    uploads.append((pid, dsid, file))
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for row in tqdm(executor.map(self.__upload, uploads), total=len(uploads)):
+                    manifest.record(row)
+                    counts[row["status"]] += 1
+        return counts
+
+
+class VersionHarvester:
+    """Download every version of a datastream for many objects, resuming from whatever is already on disk.
+
+    Histories and version content are fetched by one bounded pool of threads that share a pooled
+    `requests.Session`. Version downloads are queued as soon as each object's history arrives. A version is skipped
+    when its file, named by its creation date, is already on disk with the size Fedora reports. Each download is
+    recorded in a manifest as it finishes.
+
+    Args:
+        pids (list): The objects to harvest.
+        dsid (str): The datastream to harvest.
+        directory (str): Where to write the versions.
+        auth (tuple): The Fedora username and password.
+        fedora_uri (str): The Fedora base URI.
+        manifest (str): The path to the manifest CSV. Defaults to `{dsid}_versions_manifest.csv` in `directory`.
+        workers (int): The maximum number of requests at once.
+    """
+
+    fieldnames = ["pid", "dsid", "version", "file", "size", "status", "message"]
+
+    def __init__(self, pids, dsid, directory, auth, fedora_uri, manifest=None, workers=8):
+        self.pids = pids
+        self.dsid = dsid
+        self.directory = directory
+        self.auth = auth
+        self.fedora_uri = fedora_uri
+        self.manifest_path = manifest or os.path.join(
+            directory, f"{dsid}_versions_manifest.csv"
+        )
+        self.workers = workers
+        self.session = pooled_session(workers)
+
+    def __fedora(self, pid):
+        return FedoraObject(self.auth, self.fedora_uri, pid, self.session)
+
+    @staticmethod
+    def __on_disk(path, version):
+        if not os.path.exists(path):
+            return False
+        return version["size"] == 0 or os.path.getsize(path) == version["size"]
+
+    def __download(self, pid, version, path):
+        row = {
+            "pid": pid,
+            "dsid": self.dsid,
+            "version": version["created"],
+            "file": path,
+        }
+        try:
+            status, size = self.__fedora(pid).download_datastream(
+                self.dsid, path, version["created"]
+            )
+        except (OSError, requests.RequestException) as e:
+            return {**row, "status": "failure", "message": str(e)}
+        if status != 200:
+            return {**row, "status": "failure", "message": f"{status} on {pid}."}
+        return {**row, "size": size, "status": "success"}
+
+    def run(self):
+        """Download every version that isn't on disk yet.
+
+        Returns:
+            dict: How many versions were downloaded, skipped and failed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        counts = {"success": 0, "skipped": 0, "failure": 0}
+        with Manifest(
+            self.manifest_path, self.fieldnames, ["pid", "dsid", "version"]
+        ) as manifest, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            histories = {
+                executor.submit(self.__fedora(pid).get_versions, self.dsid): pid
+                for pid in self.pids
+            }
+            downloads = []
+            for future in tqdm(
+                as_completed(histories), total=len(histories), desc="Histories"
+            ):
+                pid = histories[future]
+                try:
+                    versions = future.result()
+                except (ExpatError, KeyError, requests.RequestException) as e:
+                    manifest.record(
+                        {
+                            "pid": pid,
+                            "dsid": self.dsid,
+                            "status": "failure",
+                            "message": f"Could not read history: {e}",
+                        }
+                    )
+                    counts["failure"] += 1
+                    continue
+                for version in versions:
+                    path = self.__fedora(pid).version_path(
+                        self.dsid, self.directory, version
+                    )
+                    if self.__on_disk(path, version):
+                        counts["skipped"] += 1
+                    else:
+                        downloads.append(
+                            executor.submit(self.__download, pid, version, path)
+                        )
+            for future in tqdm(
+                as_completed(downloads), total=len(downloads), desc="Versions"
+            ):
+                row = future.result()
+                manifest.record(row)
+                counts[row["status"]] += 1
+        return counts
+
+
+def fetch_datastream_sizes(datastreams, auth, fedora_uri, workers=8):
+    """Look up the size of many datastreams from their Fedora datastream profiles.
+
+    Profiles are fetched several at a time.
+
+    Args:
+        datastreams (iterable): (pid, dsid) pairs.
+        auth (tuple): The Fedora username and password.
+        fedora_uri (str): The Fedora base URI.
+        workers (int): The maximum number of requests at once.
+
+    Returns:
+        dict: The size in bytes of each (pid, dsid). Datastreams whose profile couldn't
+            be read are left out.
+    """
+    session = pooled_session(workers)
+    datastreams = list(dict.fromkeys(datastreams))
+
+    def size(datastream):
+        pid, dsid = datastream
+        try:
+            fedora = FedoraObject(auth, fedora_uri, pid, session)
+            return datastream, fedora.get_datastream_profile(dsid)["size"]
+        except (ExpatError, KeyError, ValueError, requests.RequestException):
+            return datastream, None
+
+    sizes = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for datastream, found in tqdm(
+            executor.map(size, datastreams), total=len(datastreams), desc="Sizes"
+        ):
+            if found is not None:
+                sizes[datastream] = found
+    return sizes
+
+
+class DatastreamIndex:
+    """A local index of datastream profiles.
+
+    Sizes, MIME types and stored checksums can be looked up from it without touching
+    Fedora or downloading any content. Profiles are kept in a sqlite database with one
+    row per pid and datastream. `harvest` fills it by listing the datastreams of many
+    objects and fetching their profiles with a bounded pool of threads that share a
+    pooled `requests.Session`. Each object is recorded with the datastreams it was
+    indexed for, and is skipped on the next harvest if that covers what is asked for,
+    so an interrupted harvest can simply be run again. An object that is indexed again
+    loses the rows of datastreams it no longer has.
+
+    Args:
+        path (str): The path to the sqlite database. It is created if it doesn't
+            exist.
+
+    Examples:
+        >>> with DatastreamIndex("datastreams.db") as index:  # doctest: +SKIP
+        ...     index.harvest(["harp:1"], auth, "https://example.edu/fedora")
+        ...     index.get("harp:1", "OBJ")["size"]
+        {'indexed': 1, 'skipped': 0, 'failure': 0}
+        48213094
+
+    """
+
+    columns = [
+        "pid",
+        "dsid",
+        "label",
+        "control_group",
+        "created",
+        "size",
+        "mime",
+        "checksum_type",
+        "checksum",
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS datastreams ("
+            "pid TEXT, dsid TEXT, label TEXT, control_group TEXT, created TEXT, "
+            "size INTEGER, mime TEXT, checksum_type TEXT, checksum TEXT, "
+            "PRIMARY KEY (pid, dsid))"
+        )
+        # dsids is "" for an object whose every datastream was indexed, or the
+        # datastreams a harvest was limited to.
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "pid TEXT PRIMARY KEY, status TEXT, message TEXT, dsids TEXT)"
+        )
+        columns = self.connection.execute("PRAGMA table_info(objects)")
+        if "dsids" not in [row["name"] for row in columns]:
+            # Indexes made before dsids was kept don't say what was indexed, so those
+            # objects are indexed again.
+            self.connection.execute("ALTER TABLE objects ADD COLUMN dsids TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def get(self, pid, dsid):
+        """Get the indexed profile of a datastream, or None."""
+        row = self.connection.execute(
+            "SELECT * FROM datastreams WHERE pid = ? AND dsid = ?",
+            (pid.replace("info:fedora/", "").strip(), dsid),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def put(self, profile):
+        """Store a profile from FedoraObject.get_datastream_profile.
+
+        Any older profile of the same datastream is replaced.
+        """
+        placeholders = ", ".join("?" for _ in self.columns)
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO datastreams VALUES ({placeholders})",
+            [profile[column] for column in self.columns],
+        )
+        return
+
+    def __covered(self, pid):
+        row = self.connection.execute(
+            "SELECT status, dsids FROM objects WHERE pid = ?", (pid,)
+        ).fetchone()
+        if row is None or row["status"] != "success" or row["dsids"] is None:
+            return None
+        return row["dsids"]
+
+    def indexed(self, pid, dsids=None):
+        """Check whether every datastream of an object was indexed.
+
+        With `dsids`, check that at least those were.
+        """
+        covered = self.__covered(pid)
+        if covered is None:
+            return False
+        if covered == "":
+            return True
+        return dsids is not None and set(dsids) <= set(covered.split(" | "))
+
+    def __replace(self, pid, profiles, dsids):
+        # Drop the object's old rows first, so datastreams deleted since the last
+        # harvest don't linger.
+        if dsids is None:
+            self.connection.execute("DELETE FROM datastreams WHERE pid = ?", (pid,))
+        else:
+            placeholders = ", ".join("?" for _ in dsids)
+            self.connection.execute(
+                f"DELETE FROM datastreams WHERE pid = ? AND dsid IN ({placeholders})",
+                [pid, *dsids],
+            )
+        for profile in profiles:
+            self.put(profile)
+        covered = self.__covered(pid)
+        if dsids is None or covered == "":
+            return ""
+        already = set(covered.split(" | ")) if covered else set()
+        return " | ".join(sorted(set(dsids) | already))
+
+    def sizes(self):
+        """Get the size in bytes of every indexed (pid, dsid).
+
+        The sizes are in the form FileCurator.bundle takes.
+        """
+        return {
+            (row["pid"], row["dsid"]): row["size"]
+            for row in self.connection.execute(
+                "SELECT pid, dsid, size FROM datastreams"
+            )
+        }
+
+    def __profiles(self, pid, auth, fedora_uri, session, dsids):
+        fedora = FedoraObject(auth, fedora_uri, pid, session)
+        try:
+            wanted = [
+                dsid
+                for dsid in fedora.list_datastreams()
+                if dsids is None or dsid in dsids
+            ]
+            return (
+                fedora.pid,
+                [fedora.get_datastream_profile(dsid) for dsid in wanted],
+                "",
+            )
+        except (
+            etree.XMLSyntaxError,
+            ExpatError,
+            KeyError,
+            ValueError,
+            requests.RequestException,
+        ) as e:
+            return fedora.pid, [], str(e)
+
+    def harvest(self, pids, auth, fedora_uri, workers=8, dsids=None, refresh=False):
+        """Index the datastreams of many objects.
+
+        Args:
+            pids (iterable): The objects to index.
+            auth (tuple): The Fedora username and password.
+            fedora_uri (str): The Fedora base URI.
+            workers (int): The maximum number of objects to index at once.
+            dsids (list): Only index these datastreams. By default every datastream is
+                indexed.
+            refresh (bool): Index objects again even if they were already indexed.
+
+        Returns:
+            dict: How many objects were indexed, skipped and failed.
+        """
+        counts = {"indexed": 0, "skipped": 0, "failure": 0}
+        dsids = set(dsids) if dsids else None
+        pending = []
+        for pid in dict.fromkeys(
+            pid.replace("info:fedora/", "").strip() for pid in pids
+        ):
+            if pid and not refresh and self.indexed(pid, dsids):
+                counts["skipped"] += 1
+            elif pid:
+                pending.append(pid)
+        session = pooled_session(workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self.__profiles, pid, auth, fedora_uri, session, dsids)
+                for pid in pending
+            ]
+            for number, future in enumerate(
+                tqdm(as_completed(futures), total=len(futures), desc="Objects"), start=1
+            ):
+                pid, profiles, message = future.result()
+                status = "failure" if message else "success"
+                covered = None if message else self.__replace(pid, profiles, dsids)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)",
+                    (pid, status, message, covered),
+                )
+                counts["indexed" if status == "success" else "failure"] += 1
+                # Commit in batches so an interrupted harvest keeps most of what it
+                # fetched.
+                if number % 500 == 0:
+                    self.connection.commit()
+        self.connection.commit()
+        return counts
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+        return
+
+
 if __name__ == "__main__":
     import os
     x = FedoraObject(
@@ -1,2 +1,2 @@
-from .finder import FileOrganizer
-__all__ = [ "FileOrganizer" ]
\ No newline at end of file
+from .finder import FileOrganizer, RDFTypeRules
+__all__ = [ "FileOrganizer", "RDFTypeRules" ]
@@ -1,4 +1,7 @@
 import csv
+import yaml
+from functools import lru_cache
+from pathlib import Path
 from tqdm import tqdm
 from utk_exodus.risearch import ResourceIndexSearch
 
@@ -9,10 +12,12 @@ class FileOrganizer:
             csv,
             what_to_add=['filesets', 'attachments'],
             #old link - https://digital.lib.utk.edu/collections/islandora/object/
-            remote='https://esb.lib.utk.edu/islandora/object/'
+            remote='https://esb.lib.utk.edu/islandora/object/',
+            rdf_types=None
     ):
         self.original_csv = csv
         self.remote = remote
+        self.rdf_types = rdf_types if rdf_types is not None else default_rdf_type_rules()
         self.original_as_dict = self.__read()
         self.headers = self.__get_headers()
         self.new_csv_with_files = self.__add_files(what_to_add)
@@ -41,7 +46,7 @@ class FileOrganizer:
             'title': self.__get_filename_title(filename, preserve_and_obj, row),
             'abstract': f"{filename} for {row['source_identifier']}",
             'parents': f"{row['source_identifier'].replace('.xml', '')}_{filename}",
-            'rdf_type': RDFTypeGenerator(row['model']).find_file_types(filename, preserve_and_obj),
+            'rdf_type': self.rdf_types.find(row['model'], filename, preserve_and_obj),
             'file_language': ''
         }
         if parent != "":
@@ -73,7 +78,7 @@ class FileOrganizer:
             'title': self.__get_filename_title(filename, preserve_and_obj, row),
             'abstract': f"{filename} for {row['source_identifier']}",
             'parents': row['source_identifier'].replace('.xml', ''),
-            'rdf_type': RDFTypeGenerator(row['model']).find_file_types(filename, preserve_and_obj),
+            'rdf_type': self.rdf_types.find(row['model'], filename, preserve_and_obj),
             'file_language': ''
         }
         if parent != "":
@@ -111,25 +116,6 @@ class FileOrganizer:
         else:
             return dsid
 
-    @staticmethod
-    def __get_rdf_types_for_file(dsid, preserve_and_obj):
-        if dsid == "OBJ" and preserve_and_obj is False:
-            return "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile"
-        elif dsid == "OBJ":
-            return "http://pcdm.org/use#IntermediateFile"
-        elif dsid == "PRESERVE":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "POLICY":
-            return "http://pcdm.org/file-format-types#StructuredText"
-        elif dsid == "OCR":
-            return "http://pcdm.org/use#ExtractedText"
-        elif dsid == "HOCR":
-            return "http://pcdm.org/file-format-types#HTML"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
-
     def __add_files(self, what_to_add=['filesets', 'attachments']):
         new_csv_content = []
         for row in tqdm(self.original_as_dict):
@@ -244,141 +230,76 @@ class FileSetFinder:
         return [result for result in results if result not in self.universal_ignores]
 
 
-class RDFTypeGenerator:
-    def __init__(self, parent_type):
-        self.parent_type = parent_type
+class RDFTypeRules:
+    """Look up the rdf_type of a file from a table of rules.
 
-    def find_file_types(self, dsid, preserve_and_obj):
-        if self.parent_type == "Image":
-            return self.__get_rdf_types_for_file_on_an_image(dsid, preserve_and_obj)
-        elif self.parent_type == "Audio":
-            return self.__get_rdf_types_for_file_on_an_audio_work(dsid, preserve_and_obj)
-        elif self.parent_type == "Video":
-            return self.__get_rdf_types_for_file_on_a_video_work(dsid, preserve_and_obj)
-        elif self.parent_type == "Book":
-            return self.__get_rdf_types_for_file_on_a_book(dsid, preserve_and_obj)
-        elif self.parent_type == "Pdf":
-            return self.__get_rdf_types_for_file_on_a_pdf_work(dsid, preserve_and_obj)
-        elif self.parent_type == "Page":
-            return self.__get_rdf_types_for_file_on_a_pdf_work(dsid, preserve_and_obj)
-        elif self.parent_type == "CompoundObject":
-            return self.__get_rdf_types_for_file_on_a_compound_object(dsid)
-        else:
-            raise Exception(f"Parent type unknown: {self.parent_type}")
+    The rules come from a yml file like `config/rdf_types.yml` and are compiled into a single dict keyed by the work's
+    model, the file's DSID and whether the work has both a preservation file and an OBJ, so finding a type is one dict
+    lookup. A DSID without a rule gets its model's default.
 
-    @staticmethod
-    def __get_rdf_types_for_file_on_an_image(dsid, preserve_and_obj):
-        if dsid == "OBJ" and preserve_and_obj is False:
-            return "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile"
-        elif dsid == "OBJ":
-            return "http://pcdm.org/use#IntermediateFile"
-        elif dsid == "PRESERVE":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "POLICY":
-            return "http://pcdm.org/file-format-types#StructuredText"
-        elif dsid == "OCR":
-            return "http://pcdm.org/use#ExtractedText"
-        elif dsid == "HOCR":
-            return "http://pcdm.org/file-format-types#HTML"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
+    Args:
+        path_to_rules (str): The path to the yml file of rules.
 
-    @staticmethod
-    def __get_rdf_types_for_file_on_an_audio_work(dsid, preserve_and_obj):
-        if dsid == "OBJ" and preserve_and_obj is False:
-            return "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile"
-        elif dsid == "OBJ":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "PROXY_MP3":
-            return "http://pcdm.org/use#IntermediateFile"
-        elif dsid == "POLICY":
-            return "http://pcdm.org/file-format-types#StructuredText"
-        elif dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "TRANSCRIPT":
-            return "http://pcdm.org/use#Transcript"
-        elif dsid == "TRANSCRIPT-ES":
-            return "http://pcdm.org/use#Transcript"
-        elif dsid == "TN":
-            return "http://pcdm.org/use#ThumbnailImage"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
+    Examples:
+        >>> rules = RDFTypeRules()
+        >>> rules.find("Audio", "OBJ", True)
+        'http://pcdm.org/use#PreservationFile'
+        >>> rules.find("Audio", "JPG", True)
+        'http://pcdm.org/use#OriginalFile'
 
-    @staticmethod
-    def __get_rdf_types_for_file_on_a_video_work(dsid, preserve_and_obj):
-        if dsid == "OBJ" and preserve_and_obj is False:
-            return "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile"
-        elif dsid == "OBJ":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "MP4":
-            return "http://pcdm.org/use#IntermediateFile"
-        elif dsid == "POLICY":
-            return "http://pcdm.org/file-format-types#StructuredText"
-        elif dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "TRANSCRIPT":
-            return "http://pcdm.org/use#Transcript"
-        elif dsid == "TRANSCRIPT-ES":
-            return "http://pcdm.org/use#Transcript"
-        elif dsid == "TN":
-            return "http://pcdm.org/use#ThumbnailImage"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
+    """
 
-    @staticmethod
-    def __get_rdf_types_for_file_on_a_pdf_work(dsid, preserve_and_obj):
-        if dsid == "OBJ" and preserve_and_obj is False:
-            return "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile"
-        elif dsid == "PDFA":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "OBJ":
-            return "http://pcdm.org/use#IntermediateFile | http://pcdm.org/use#OriginalFile"
-        elif dsid == "POLICY":
-            return "http://pcdm.org/file-format-types#StructuredText"
-        elif dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "OCR":
-            return "http://pcdm.org/use#ExtractedText"
-        elif dsid == "HOCR":
-            return "http://pcdm.org/file-format-types#HTML"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
+    def __init__(self, path_to_rules=Path(__file__).parent / "../config/rdf_types.yml"):
+        with open(path_to_rules, "r") as rules_file:
+            self.types, self.defaults = self.__compile(yaml.safe_load(rules_file))
 
     @staticmethod
-    def __get_rdf_types_for_file_on_a_book(dsid, preserve_and_obj):
-        if dsid == "OBJ" and preserve_and_obj is False:
-            return "http://pcdm.org/use#PreservationFile | http://pcdm.org/use#IntermediateFile"
-        elif dsid == "OBJ":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "TRANSCRIPT":
-            return "http://pcdm.org/use#Transcript"
-        elif dsid == "OCR":
-            return "http://pcdm.org/use#ExtractedText"
-        elif dsid == "PDF":
-            return "http://pcdm.org/file-format-types#Document | http://pcdm.org/use#ServiceFile"
-        elif dsid == "ORIGINAL":
-            return "http://pcdm.org/file-format-types#Document | http://pcdm.org/use#ServiceFile | http://pcdm.org/use#OriginalFile"
-        elif dsid == "ORIGINAL_EDITED":
-            return "http://pcdm.org/file-format-types#Document | http://pcdm.org/use#ServiceFile"
-        elif dsid == "TEI":
-            return "http://pcdm.org/file-format-types#Markup"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
+    def __compile(rules):
+        types = {}
+        defaults = {}
+        for model, model_rules in rules.items():
+            defaults[model] = model_rules["default"]
+            for dsid, rdf_type in (model_rules.get("datastreams") or {}).items():
+                if isinstance(rdf_type, dict):
+                    types[(model, dsid, True)] = rdf_type["preserve_and_obj"]
+                    types[(model, dsid, False)] = rdf_type["otherwise"]
+                else:
+                    types[(model, dsid, True)] = rdf_type
+                    types[(model, dsid, False)] = rdf_type
+        return types, defaults
 
-    @staticmethod
-    def __get_rdf_types_for_file_on_a_compound_object(dsid):
-        if dsid == "MODS":
-            return "http://pcdm.org/file-format-types#Markup"
-        elif dsid == "AIP":
-            return "http://pcdm.org/use#PreservationFile"
-        elif dsid == "DIP":
-            return "http://pcdm.org/use#IntermediateFile"
-        else:
-            return "http://pcdm.org/use#OriginalFile"
+    def find(self, parent_type, dsid, preserve_and_obj=False):
+        """Find the rdf_type of a file.
+
+        Args:
+            parent_type (str): The model of the work the file belongs to.
+            dsid (str): The DSID of the file.
+            preserve_and_obj (bool): Whether the work has both a preservation file and an OBJ.
+
+        Returns:
+            str: The rdf_type, with multiple types separated by ` | `.
+        """
+        rdf_type = self.types.get((parent_type, dsid, preserve_and_obj is not False))
+        if rdf_type is not None:
+            return rdf_type
+        if parent_type not in self.defaults:
+            raise Exception(f"Parent type unknown: {parent_type}")
+        return self.defaults[parent_type]
+
+
+@lru_cache(maxsize=None)
+def default_rdf_type_rules():
+    """Get the RDFTypeRules from `config/rdf_types.yml`, compiled the first time they are needed and shared after."""
+    return RDFTypeRules()
+
+
+class RDFTypeGenerator:
+    def __init__(self, parent_type, rules=None):
+        self.parent_type = parent_type
+        self.rules = rules if rules is not None else default_rdf_type_rules()
+
+    def find_file_types(self, dsid, preserve_and_obj):
+        return self.rules.find(self.parent_type, dsid, preserve_and_obj)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,3 @@
+from .manifest import Manifest, RunManifest
+
+__all__ = ["Manifest", "RunManifest"]
@@ -0,0 +1,125 @@
+import csv
+import os
+import threading
+from datetime import datetime
+
+
+class Manifest:
+    """An append-only CSV of what a long running command has done, so a rerun can pick up where it stopped.
+
+    Rows are written and flushed as soon as they are recorded, so an interrupted run loses nothing it finished. When
+    the same key is recorded more than once, the last row wins. Recording is safe from several threads at once.
+
+    Args:
+        path (str): The path to the CSV. It is created if it doesn't exist.
+        fieldnames (list): The columns of the CSV. Must include `status`.
+        key (list): The columns that identify a row.
+
+    Examples:
+        >>> manifest = Manifest("manifest.csv", ["pid", "dsid", "status"], ["pid", "dsid"])  # doctest: +SKIP
+        >>> manifest.record({"pid": "harp:1", "dsid": "OBJ", "status": "success"})  # doctest: +SKIP
+        >>> manifest.succeeded("harp:1", "OBJ")  # doctest: +SKIP
+        True
+
+    """
+
+    def __init__(self, path, fieldnames, key):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.key = key
+        self.rows = self.__read()
+        self.lock = threading.Lock()
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction="ignore")
+        if is_new:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __read(self):
+        rows = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", newline="") as manifest:
+                for row in csv.DictReader(manifest):
+                    rows[tuple(row[field] for field in self.key)] = row
+        return rows
+
+    def get(self, *key):
+        """Get the last row recorded for a key, or None."""
+        return self.rows.get(tuple(str(value) for value in key))
+
+    def succeeded(self, *key):
+        row = self.get(*key)
+        return row is not None and row["status"] == "success"
+
+    def record(self, row):
+        """Append a row and flush it to disk."""
+        row = {field: row.get(field, "") for field in self.fieldnames}
+        with self.lock:
+            self.writer.writerow(row)
+            self.file.flush()
+            self.rows[tuple(str(row[field]) for field in self.key)] = row
+        return
+
+    def close(self):
+        self.file.close()
+        return
+
+
+class RunManifest(Manifest):
+    """A Manifest of the stages of a pipeline run and the files each one produced, so a run can resume after a failure.
+
+    A stage counts as complete only if its last row succeeded, was recorded for the same run, and every artifact it
+    listed still exists.
+
+    Args:
+        path (str): The path to the CSV. It is created if it doesn't exist.
+
+    Examples:
+        >>> with RunManifest("run_manifest.csv") as manifest:  # doctest: +SKIP
+        ...     manifest.record_stage("metadata", "collections:harp book utk_dc", ["new_set/tmp/works.csv"])
+        ...     manifest.completed("metadata", "collections:harp book utk_dc")
+        True
+
+    """
+
+    fieldnames = ["stage", "run", "status", "artifacts", "detail", "finished"]
+
+    def __init__(self, path):
+        super().__init__(path, self.fieldnames, ["stage"])
+
+    def artifacts(self, stage):
+        row = self.get(stage)
+        if row is None:
+            return []
+        return [artifact for artifact in row["artifacts"].split(" | ") if artifact != ""]
+
+    def completed(self, stage, run):
+        row = self.get(stage)
+        return (
+            row is not None
+            and row["status"] == "success"
+            and row["run"] == run
+            and all(os.path.exists(artifact) for artifact in self.artifacts(stage))
+        )
+
+    def record_stage(self, stage, run, artifacts=(), status="success", detail=""):
+        """Record how a stage finished and the files it produced."""
+        self.record(
+            {
+                "stage": stage,
+                "run": run,
+                "status": status,
+                "artifacts": " | ".join(str(artifact) for artifact in artifacts),
+                "detail": detail,
+                "finished": datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+        return
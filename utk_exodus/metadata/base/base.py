@@ -6,7 +6,8 @@ class BaseProperty:
     def __init__(self, path, namespaces):
         self.path = path
         self.namespaces = namespaces
-        self.root = etree.parse(path)
+        # Accept an already parsed tree so one record can be shared by every property.
+        self.root = path if isinstance(path, etree._ElementTree) else etree.parse(path)
         self.root_as_str = etree.tostring(self.root)
 
 
@@ -0,0 +1,15 @@
+from .cache import (
+    ExtractionCache,
+    hash_file,
+    hash_masked_record,
+    hash_record,
+    reads_masked_elements,
+)
+
+__all__ = [
+    "ExtractionCache",
+    "hash_file",
+    "hash_masked_record",
+    "hash_record",
+    "reads_masked_elements",
+]
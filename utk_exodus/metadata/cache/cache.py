@@ -0,0 +1,171 @@
+import copy
+import hashlib
+import json
+import sqlite3
+from lxml import etree
+from pathlib import Path
+
+
+def hash_file(path):
+    """Get the sha256 of a file's content.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hex digest.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def hash_record(source):
+    """Get the sha256 of a MODS record, whether it is a file or a tree read from a larger document.
+
+    Args:
+        source (str | lxml.etree._ElementTree): The path to the file or the parsed record.
+
+    Returns:
+        str: The hex digest.
+    """
+    if isinstance(source, etree._ElementTree):
+        return hashlib.sha256(etree.tostring(source)).hexdigest()
+    return hash_file(source)
+
+
+# The elements that tell otherwise identical records apart. They are left out of hash_masked_record.
+MASKED_ELEMENTS = etree.XPath(
+    "mods:identifier | mods:recordInfo/mods:recordIdentifier",
+    namespaces={"mods": "http://www.loc.gov/mods/v3"},
+)
+MASKED_XPATHS = ("mods:identifier", "mods:recordInfo/mods:recordIdentifier")
+
+
+def hash_masked_record(document):
+    """Get the sha256 of a MODS record's canonical form with its identifiers left out.
+
+    Records that differ only in their top-level mods:identifier and mods:recordInfo/mods:recordIdentifier elements,
+    like the page-level MODS of a book, get the same hash.
+
+    Args:
+        document (lxml.etree._ElementTree): The parsed record.
+
+    Returns:
+        str: The hex digest.
+    """
+    masked = copy.deepcopy(document.getroot())
+    for element in MASKED_ELEMENTS(masked):
+        element.getparent().remove(element)
+    return hashlib.sha256(etree.tostring(masked, method="c14n")).hexdigest()
+
+
+def reads_masked_elements(xpaths):
+    """Check whether any of a mapping row's xpaths read an element hash_masked_record leaves out.
+
+    Examples:
+        >>> reads_masked_elements(['mods:identifier[@type="local"]']), reads_masked_elements(["mods:titleInfo/mods:title"])
+        (True, False)
+
+    """
+    return any(
+        xpath.replace("/mods:mods/", "", 1).lstrip("/").startswith(MASKED_XPATHS)
+        for xpath in xpaths
+    )
+
+
+def code_version():
+    """Hash the source that decides what a record extracts to, so a code change invalidates cached rows.
+
+    Returns:
+        str: The hex digest.
+    """
+    package = Path(__file__).parent.parent.parent
+    sha256 = hashlib.sha256()
+    for source in sorted(
+        list((package / "metadata").rglob("*.py")) + [package / "risearch" / "risearch.py"]
+    ):
+        sha256.update(source.read_bytes())
+    return sha256.hexdigest()
+
+
+class ExtractionCache:
+    """Store the rows MetadataMapping extracts from each MODS file so reruns only extract what changed.
+
+    Entries are kept per source identifier in a sqlite database and are only reused when the MODS content hash, the
+    mapping config hash, and the code version all match what they were when the row was extracted.
+
+    Args:
+        path (str): The path to the sqlite database. It is created if it doesn't exist.
+        path_to_mapping (str): The path to the mapping config the rows are extracted with.
+    """
+
+    def __init__(self, path, path_to_mapping):
+        self.path = path
+        self.config_hash = hash_file(path_to_mapping)
+        self.code_version = code_version()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "source_identifier TEXT PRIMARY KEY, "
+            "content_hash TEXT, "
+            "config_hash TEXT, "
+            "code_version TEXT, "
+            "record TEXT)"
+        )
+        self.hits = 0
+        self.misses = 0
+        self.pending = 0
+
+    def get(self, source_identifier, content_hash):
+        """Get the cached record for a source identifier if it is still current.
+
+        Args:
+            source_identifier (str): The source identifier of the record.
+            content_hash (str): The sha256 of the MODS file now.
+
+        Returns:
+            dict: The cached record or None.
+        """
+        result = self.connection.execute(
+            "SELECT record FROM records WHERE source_identifier = ? AND content_hash = ? "
+            "AND config_hash = ? AND code_version = ?",
+            (source_identifier, content_hash, self.config_hash, self.code_version),
+        ).fetchone()
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(result[0])
+
+    def put(self, source_identifier, content_hash, record):
+        """Store the record for a source identifier, replacing any older entry.
+
+        Args:
+            source_identifier (str): The source identifier of the record.
+            content_hash (str): The sha256 of the MODS file the record was extracted from.
+            record (dict): The record to store. It must be serializable as JSON.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+            (
+                source_identifier,
+                content_hash,
+                self.config_hash,
+                self.code_version,
+                json.dumps(record),
+            ),
+        )
+        # Commit in batches so an interrupted run keeps most of what it extracted.
+        self.pending += 1
+        if self.pending >= 500:
+            self.connection.commit()
+            self.pending = 0
+        return
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+        return
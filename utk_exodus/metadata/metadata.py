@@ -1,8 +1,19 @@
 import yaml
+from lxml import etree
 import os
 import csv
 from tqdm import tqdm
-from .base import BaseProperty, StandardProperty, XMLtoDictProperty
+from .base import BaseProperty, StandardProperty
+from .cache import ExtractionCache, hash_masked_record, hash_record, reads_masked_elements
+from .profile import NullProfiler, PropertyProfiler
+from .reader import (
+    DEFAULT_EXCLUDE,
+    DEFAULT_INCLUDE,
+    is_archive,
+    iter_archive,
+    iter_mods_collection,
+    scan_directory,
+)
 from utk_exodus.risearch import ResourceIndexSearch
 
 
@@ -82,25 +93,68 @@ class TitleProperty(BaseProperty):
         return {"title": titles, "alternative_title": alternatives}
 
 
-class RoleAndNameProperty(XMLtoDictProperty):
-    def __init__(self, file):
-        super().__init__(file)
-        self.all_names = self.__find_all_names()
-
-    def __find_all_names(self):
-        if "mods:name" in self.doc["mods:mods"]:
-            all_names = self.doc["mods:mods"]["mods:name"]
-            if isinstance(all_names, list):
-                return all_names
-            elif isinstance(all_names, dict):
-                return [all_names]
-            elif isinstance(all_names, str):
-                return [all_names]
-            else:
-                return ["Problem"]
-        else:
-            return []
+class BaseNameProperty(BaseProperty):
+    """
+    Shared lookups over the top level `mods:name` elements for NameProperty and RoleAndNameProperty.
+
+    Text is stripped and empty text is ignored. A namePart with attributes only contributes its `@valueURI`.
+    """
+
+    NAMES = etree.XPath(
+        "/mods:mods/mods:name", namespaces={"mods": "http://www.loc.gov/mods/v3"}
+    )
+    ROLE_TERMS = etree.XPath(
+        "mods:role/mods:roleTerm", namespaces={"mods": "http://www.loc.gov/mods/v3"}
+    )
+    NAME_PARTS = etree.XPath(
+        "mods:namePart", namespaces={"mods": "http://www.loc.gov/mods/v3"}
+    )
+
+    def __init__(self, path, namespaces=None):
+        super().__init__(
+            path,
+            namespaces
+            or {
+                "mods": "http://www.loc.gov/mods/v3",
+                "xlink": "http://www.w3.org/1999/xlink",
+            },
+        )
+        self.all_names = self.NAMES(self.root)
 
+    @staticmethod
+    def _text(element):
+        text = "".join(
+            [element.text or ""] + [child.tail or "" for child in element]
+        ).strip()
+        return text or None
+
+    @classmethod
+    def _roles(cls, name):
+        return [
+            text.lower().replace(" ", "_")
+            for text in (cls._text(role_term) for role_term in cls.ROLE_TERMS(name))
+            if text is not None
+        ]
+
+    @classmethod
+    def _name_parts(cls, name):
+        """Get the names and URIs in the nameParts of a name.
+
+        Names are the text of nameParts without attributes. URIs are the `@valueURI` of nameParts that have one, or
+        the text of the name's only namePart if it is a URI.
+        """
+        parts = cls.NAME_PARTS(name)
+        texts = [
+            cls._text(part) for part in parts if not part.attrib and len(part) == 0
+        ]
+        texts = [text for text in texts if text is not None]
+        uris = [part.get("valueURI") for part in parts if "valueURI" in part.attrib]
+        if len(parts) == 1 and texts and texts[0].startswith("http"):
+            uris = texts
+        return [text for text in texts if not text.startswith("http")], uris
+
+
+class RoleAndNameProperty(BaseNameProperty):
     def find(self):
         """
         Find all names and roles in the XML file.
@@ -115,63 +169,20 @@ class RoleAndNameProperty(XMLtoDictProperty):
         """
         roles_and_names = {}
         for name in self.all_names:
-            local_roles = []
-            try:
-                local_roles.append(
-                    f"utk_{name['mods:role']['mods:roleTerm']['#text'].lower().replace(' ', '_')}"
-                )
-            except KeyError:
-                print(name)
-            # TODO: A name can have multiple roles
-            except TypeError:
-                for role in name["mods:role"]:
-                    local_roles.append(
-                        f"utk_{role['mods:roleTerm']['#text'].lower().replace(' ', '_')}"
-                    )
-            # TODO: Rework this.  It's not pretty but it works.
-            name_value = name["mods:namePart"]
-            for role in local_roles:
-                if isinstance(name_value, list):
-                    for part in name_value:
-                        if isinstance(part, dict) and part.get("mods:namePart"):
-                            if role not in roles_and_names:
-                                roles_and_names[role] = [part["mods:namePart"]]
-                            else:
-                                roles_and_names[role].append([part["mods:namePart"]])
-                        if isinstance(part, str) and not part.startswith("http"):
-                            if role not in roles_and_names:
-                                roles_and_names[role] = [part]
-                            else:
-                                roles_and_names[role].append(part)
-                elif role not in roles_and_names and not name_value.startswith("http"):
-                    roles_and_names[role] = [name_value]
-                elif not name_value.startswith("http"):
-                    roles_and_names[role].append(name_value)
+            texts, _ = self._name_parts(name)
+            for role in self._roles(name):
+                for text in texts:
+                    roles_and_names.setdefault(f"utk_{role}", []).append(text)
         return roles_and_names
 
 
-class NameProperty(XMLtoDictProperty):
+class NameProperty(BaseNameProperty):
     """
     Used for names.
-    """
 
-    def __init__(self, file):
-        super().__init__(file)
-        self.all_names = self.__find_all_names()
-
-    def __find_all_names(self):
-        if "mods:name" in self.doc["mods:mods"]:
-            all_names = self.doc["mods:mods"]["mods:name"]
-            if isinstance(all_names, list):
-                return all_names
-            elif isinstance(all_names, dict):
-                return [all_names]
-            elif isinstance(all_names, str):
-                return [all_names]
-            else:
-                return ["Problem"]
-        else:
-            return []
+    A name with a `@valueURI` maps its URI to each of its roles. A name without one maps the text of its nameParts to
+    `utk_` prefixed roles.
+    """
 
     def find(self):
         """
@@ -187,102 +198,19 @@ class NameProperty(XMLtoDictProperty):
         """
         roles_and_names = {}
         for name in self.all_names:
-            roles = []
-            local_roles = []
-            # This is a very convoluted way of fixing this but it worked so its staying for now
-            try:
-                if isinstance(name["mods:role"], list):
-                    for role in name["mods:role"]:
-                        if isinstance(role["mods:roleTerm"], list):
-                            for role_term in role["mods:roleTerm"]:
-                                if isinstance(role_term, dict) and "#text" in role_term:
-                                    roles.append(
-                                        role_term["#text"].lower().replace(" ", "_")
-                                    )
-                                    local_roles.append(
-                                        f"utk_{role_term['#text'].lower().replace(' ', '_')}"
-                                    )
-                                elif isinstance(role_term, str):
-                                    roles.append(role_term.lower().replace(" ", "_"))
-                                    local_roles.append(
-                                        f"utk_{role_term.lower().replace(' ', '_')}"
-                                    )
-                        elif isinstance(role["mods:roleTerm"], dict):
-                            if "#text" in role["mods:roleTerm"]:
-                                roles.append(
-                                    role["mods:roleTerm"]["#text"].lower().replace(" ", "_")
-                                )
-                                local_roles.append(
-                                    f"utk_{role['mods:roleTerm']['#text'].lower().replace(' ', '_')}"
-                                )
-                        elif isinstance(role["mods:roleTerm"], str):
-                            roles.append(
-                                role["mods:roleTerm"].lower().replace(" ", "_")
-                            )
-                            local_roles.append(
-                                f"utk_{role['mods:roleTerm'].lower().replace(' ', '_')}"
-                            )
-                else:
-                    if isinstance(name["mods:role"]["mods:roleTerm"], list):
-                        for role_term in name["mods:role"]["mods:roleTerm"]:
-                            if isinstance(role_term, dict) and "#text" in role_term:
-                                roles.append(
-                                    role_term["#text"].lower().replace(" ", "_")
-                                )
-                                local_roles.append(
-                                    f"utk_{role_term['#text'].lower().replace(' ', '_')}"
-                                )
-                            elif isinstance(role_term, str):
-                                roles.append(role_term.lower().replace(" ", "_"))
-                                local_roles.append(
-                                    f"utk_{role_term.lower().replace(' ', '_')}"
-                                )
-                    elif isinstance(name["mods:role"]["mods:roleTerm"], dict):
-                        roles.append(
-                            name["mods:role"]["mods:roleTerm"]["#text"]
-                            .lower()
-                            .replace(" ", "_")
-                        )
-                        local_roles.append(
-                            f"utk_{name['mods:role']['mods:roleTerm']['#text'].lower().replace(' ', '_')}"
-                        )
-                    elif isinstance(name["mods:role"]["mods:roleTerm"], str):
-                        roles.append(
-                            name["mods:role"]["mods:roleTerm"].lower().replace(" ", "_")
-                        )
-                        local_roles.append(
-                            f"utk_{name['mods:role']['mods:roleTerm'].lower().replace(' ', '_')}"
-                        )
-            except KeyError:
-                print(name)
-            # TODO: Rework this.  It's not pretty but it works.
-            name_value = name["mods:namePart"]
-            if "@valueURI" in name:
-                name_value = name["@valueURI"]
+            roles = self._roles(name)
+            if "valueURI" in name.attrib:
+                value = name.get("valueURI")
+                uris = [value] if value.startswith("http") else []
+                texts = [] if value.startswith("http") else [value]
+            else:
+                texts, uris = self._name_parts(name)
+            for role in roles:
+                for uri in uris:
+                    roles_and_names.setdefault(role, []).append(uri)
             for role in roles:
-                if isinstance(name_value, list):
-                    for part in name_value:
-                        if isinstance(part, dict) and "@valueURI" in part:
-                            if role not in roles_and_names:
-                                roles_and_names[role] = [part["@valueURI"]]
-                            else:
-                                roles_and_names[role].append([part["@valueURI"]])
-                elif role not in roles_and_names and name_value.startswith("http"):
-                    roles_and_names[role] = [name_value]
-                elif name_value.startswith("http"):
-                    roles_and_names[role].append(name_value)
-            for role in local_roles:
-                if isinstance(name_value, list):
-                    for part in name_value:
-                        if isinstance(part, str) and not part.startswith("http"):
-                            if role not in roles_and_names:
-                                roles_and_names[role] = [part]
-                            else:
-                                roles_and_names[role].append(part)
-                elif role not in roles_and_names and not name_value.startswith("http"):
-                    roles_and_names[role] = [name_value]
-                elif not name_value.startswith("http"):
-                    roles_and_names[role].append(name_value)
+                for text in texts:
+                    roles_and_names.setdefault(f"utk_{role}", []).append(text)
         return roles_and_names
 
 
@@ -1109,84 +1037,92 @@ class ExtentProperty(BaseProperty):
 
 
 class MetadataMapping:
-    def __init__(self, path_to_mapping, file_path, membership_details=None):
+    def __init__(
+        self,
+        path_to_mapping,
+        file_path,
+        membership_details=None,
+        cache=None,
+        profile=None,
+        include=DEFAULT_INCLUDE,
+        exclude=DEFAULT_EXCLUDE,
+        manifest=None,
+        dedupe=False,
+        model=None,
+    ):
         self.path = path_to_mapping
         self.membership_details = membership_details
         self.fieldnames = []
-        self.all_files = self.__get_all_files(file_path)
+        self.file_path = file_path
+        self.include = include
+        self.exclude = exclude
+        self.manifest = manifest
+        # Records from a directory or archive are UTK's, so their model, parents, pages and parts are looked up in the
+        # Resource Index. A modsCollection or OAI-PMH file is an export from another site whose pids aren't in it, so
+        # the model comes from `model` or the MODS itself and the records get no parents.
+        self.in_resource_index = bool(manifest) or os.path.isdir(file_path) or is_archive(file_path)
+        self.model = model
         self.mapping_data = yaml.safe_load(open(path_to_mapping, "r"))["mapping"]
         self.namespaces = {
             "mods": "http://www.loc.gov/mods/v3",
             "xlink": "http://www.w3.org/1999/xlink",
         }
+        self.cache = ExtractionCache(cache, path_to_mapping) if cache else None
+        self.profile = profile
+        self.profiler = PropertyProfiler() if profile else NullProfiler()
+        # With dedupe, the values of every mapping row are kept for each distinct record (ignoring identifiers) and
+        # reused for records identical to it. Rows that read identifiers are always extracted again.
+        self.dedupe = dedupe
+        self.distinct_records = {}
+        self.duplicates = 0
+        self.identifier_rows = {
+            index
+            for index, rdf_property in enumerate(self.mapping_data)
+            if "special" not in rdf_property
+            and reads_masked_elements(rdf_property["xpaths"])
+        }
         self.output_data = self.__execute(self.namespaces)
 
     @staticmethod
-    def __get_all_files(path):
-        all_files = []
-        for root, dirs, files in os.walk(path, topdown=False):
-            for name in files:
-                all_files.append(os.path.join(root, name))
-        return all_files
+    def __get_source_identifier(file):
+        return file.split("/")[-1].replace("_MODS.xml", "").replace(".xml", "")
+
+    def __get_records(self):
+        """Yield the source identifier and source of each record, where the source is a path or a parsed tree.
+
+        A directory is read as one MODS file per record, and its files are found as they are needed rather than all
+        up front. A zip or tar archive is read member by member without unpacking it. Any other file may be a
+        modsCollection or an OAI-PMH response, and its records are streamed out of it one at a time.
+        """
+        if self.manifest or os.path.isdir(self.file_path):
+            for file in scan_directory(
+                self.file_path, self.include, self.exclude, self.manifest
+            ):
+                yield self.__get_source_identifier(file), file
+        elif is_archive(self.file_path):
+            yield from iter_archive(self.file_path)
+        else:
+            yield from iter_mods_collection(
+                self.file_path,
+                default_identifier=self.__get_source_identifier(self.file_path),
+            )
 
     def __execute(self, namespaces):
         all_file_data = []
         all_pages = []
-        for file in tqdm(self.all_files):
-            # TODO: Ultimately, parents should be populated based on relationship.
-            model = self.__dereference_islandora_type(file)
-            output_data = {
-                "source_identifier": file.split("/")[-1]
-                .replace("_MODS.xml", "")
-                .replace(".xml", ""),
-                "model": model,
-                "sequence": "",
-                "remote_files": "",
-                "parents": " | ".join(
-                    ResourceIndexSearch().get_parent_collections(
-                        file.split("/")[-1].replace("_MODS.xml", "").replace(".xml", "")
-                    ),
-                ),
-                "has_work_type": self.__get_utk_ontology_value(model),
-                "primary_identifier": file.split("/")[-1]
-                .replace("_MODS.xml", "")
-                .replace(".xml", ""),
-            }
-            self.__dereference_islandora_type(file)
-            for rdf_property in self.mapping_data:
-                if "special" not in rdf_property:
-                    final_values = ""
-                    values = StandardProperty(file, namespaces).find(
-                        rdf_property["xpaths"]
-                    )
-                    if len(values) > 0:
-                        # TODO: Make delimeter configurable
-                        final_values = " | ".join(values)
-                    output_data[rdf_property["name"]] = final_values
-                else:
-                    special = self.__lookup_special_property(
-                        rdf_property["special"], file, namespaces, rdf_property["name"]
-                    )
-                    for k, v in special.items():
-                        # TODO: Make delimeter configurable
-                        if v != [[]]:
-                            try:
-                                output_data[k] = " | ".join(v)
-                            except TypeError:
-                                print(f"{TypeError}: {file}")
-            self.__find_unique_fieldnames(output_data)
-            all_file_data.append(output_data)
-        for item in all_file_data:
-            pages = self.look_for_pages(item)
-            parts = self.look_for_compound_parts(item)
-            for page in pages:
+        for source_identifier, source in tqdm(self.__get_records()):
+            record = self.__get_record(source_identifier, source, namespaces)
+            item = record["row"]
+            self.__find_unique_fieldnames(item)
+            all_file_data.append(item)
+            for page in record["pages"]:
                 new_page = item.copy()
                 new_page["source_identifier"] = page["pid"].replace("info:fedora/", "")
                 new_page["parents"] = item["source_identifier"]
                 new_page["model"] = "Page"
                 new_page["sequence"] = page["page"]
                 all_pages.append(new_page)
-            for part in parts:
+            for part in record["parts"]:
                 new_part = item.copy()
                 new_part["source_identifier"] = part["pid"].replace("info:fedora/", "")
                 new_part["parents"] = item["source_identifier"]
@@ -1195,16 +1131,136 @@ class MetadataMapping:
                 all_pages.append(new_part)
         for page in all_pages:
             all_file_data.append(page)
+        if self.cache is not None:
+            print(
+                f"Reused {self.cache.hits} cached records and extracted {self.cache.misses}."
+            )
+            self.cache.close()
+        if self.dedupe:
+            print(
+                f"Reused values from identical records for {self.duplicates} of "
+                f"{self.duplicates + len(self.distinct_records)} extracted records."
+            )
+        self.profiler.report(self.profile)
         return all_file_data
 
+    def __get_record(self, source_identifier, source, namespaces):
+        if self.cache is None:
+            return self.__extract(source_identifier, source, namespaces)
+        content_hash = hash_record(source)
+        if not self.in_resource_index and self.model:
+            # The model given for a file isn't in its MODS, so a different one must not reuse the cached row.
+            content_hash = f"{content_hash}:{self.model}"
+        record = self.cache.get(source_identifier, content_hash)
+        if record is None:
+            record = self.__extract(source_identifier, source, namespaces)
+            self.cache.put(source_identifier, content_hash, record)
+        return record
+
+    def __extract(self, source_identifier, source, namespaces):
+        with self.profiler.measure(("extract", "records")):
+            return self.__extract_record(source_identifier, source, namespaces)
+
+    def __extract_record(self, source_identifier, source, namespaces):
+        # Parse once and share the tree with every property instead of each one reading the file again.
+        document = (
+            source if isinstance(source, etree._ElementTree) else etree.parse(source)
+        )
+        if self.in_resource_index:
+            # TODO: Ultimately, parents should be populated based on relationship.
+            model = self.__dereference_islandora_type(source_identifier)
+            with self.profiler.measure(("risearch", "get_parent_collections")) as measurement:
+                parents = ResourceIndexSearch().get_parent_collections(source_identifier)
+                measurement.size = len(parents)
+        else:
+            model = self.__model_from_mods(document, namespaces)
+            parents = []
+        output_data = {
+            "source_identifier": source_identifier,
+            "model": model,
+            "sequence": "",
+            "remote_files": "",
+            "parents": " | ".join(parents),
+            "has_work_type": self.__get_utk_ontology_value(model),
+            "primary_identifier": source_identifier,
+        }
+        distinct = None
+        if self.dedupe:
+            with self.profiler.measure(("dedupe", "hash_masked_record")):
+                key = hash_masked_record(document)
+            distinct = self.distinct_records.get(key)
+            if distinct is None:
+                distinct = self.distinct_records[key] = {}
+            else:
+                self.duplicates += 1
+        for index, rdf_property in enumerate(self.mapping_data):
+            if distinct is not None and index in distinct:
+                output_data.update(distinct[index])
+                continue
+            values = self.__extract_row(
+                rdf_property, document, namespaces, source_identifier
+            )
+            if distinct is not None and index not in self.identifier_rows:
+                distinct[index] = values
+            output_data.update(values)
+        return {
+            "row": output_data,
+            "pages": self.look_for_pages(output_data),
+            "parts": self.look_for_compound_parts(output_data),
+        }
+
+    def __extract_row(self, rdf_property, document, namespaces, source_identifier):
+        output_data = {}
+        if "special" not in rdf_property:
+            final_values = ""
+            with self.profiler.measure(("mapping", rdf_property["name"])) as measurement:
+                values = StandardProperty(document, namespaces).find(
+                    rdf_property["xpaths"]
+                )
+                measurement.size = len(values)
+            if len(values) > 0:
+                # TODO: Make delimeter configurable
+                final_values = " | ".join(values)
+            output_data[rdf_property["name"]] = final_values
+        else:
+            with self.profiler.measure(
+                ("mapping", rdf_property["name"]),
+                ("special", rdf_property["special"]),
+            ) as measurement:
+                special = self.__lookup_special_property(
+                    rdf_property["special"],
+                    document,
+                    namespaces,
+                    rdf_property["name"],
+                )
+                measurement.size = sum(
+                    len(v) for v in special.values() if isinstance(v, list)
+                )
+            for k, v in special.items():
+                # TODO: Make delimeter configurable
+                if v != [[]]:
+                    try:
+                        output_data[k] = " | ".join(v)
+                    except TypeError:
+                        print(f"{TypeError}: {source_identifier}")
+        return output_data
+
     def look_for_pages(self, data):
-        if data["model"] == "Book":
-            return ResourceIndexSearch().find_pages_in_book(data["source_identifier"])
+        if self.in_resource_index and data["model"] == "Book":
+            with self.profiler.measure(("risearch", "find_pages_in_book")) as measurement:
+                pages = ResourceIndexSearch().find_pages_in_book(data["source_identifier"])
+                measurement.size = len(pages)
+            return pages
         return []
 
     def look_for_compound_parts(self, data):
-        if data["model"] == "CompoundObject":
-            return ResourceIndexSearch().get_compound_object_parts(data["source_identifier"])
+        if self.in_resource_index and data["model"] == "CompoundObject":
+            with self.profiler.measure(("risearch", "get_compound_object_parts")) as measurement:
+                parts = ResourceIndexSearch().get_compound_object_parts(
+                    data["source_identifier"]
+                )
+                measurement.size = len(parts)
+            return parts
         return []
 
     def __find_unique_fieldnames(self, data):
@@ -1213,7 +1269,7 @@ class MetadataMapping:
                 self.fieldnames.append(k)
         return
 
-    def __dereference_islandora_type(self, file):
+    def __dereference_islandora_type(self, source_identifier):
         islandora_types = {
             "info:fedora/islandora:sp-audioCModel": "Audio",
             "info:fedora/islandora:bookCModel": "Book",
@@ -1224,14 +1280,48 @@ class MetadataMapping:
             "info:fedora/islandora:sp_pdf": "Pdf",
             "info:fedora/islandora:sp_videoCModel": "Video",
         }
-        x = ResourceIndexSearch().get_islandora_work_type(
-            file.split("/")[-1]
-            .replace("_MODS.xml", "")
-            .replace(".xml", "")
-            .replace("_", ":")
-        )
+        with self.profiler.measure(("risearch", "get_islandora_work_type")) as measurement:
+            x = ResourceIndexSearch().get_islandora_work_type(
+                source_identifier.replace("_", ":")
+            )
+            measurement.size = 1
         return islandora_types[x]
 
+    def __model_from_mods(self, document, namespaces):
+        if self.model:
+            work_types = {
+                "audio": "Audio",
+                "book": "Book",
+                "compound": "CompoundObject",
+                "image": "Image",
+                "large_image": "Image",
+                "pdf": "Pdf",
+                "video": "Video",
+            }
+            return work_types[self.model.lower()]
+        resource_types = {
+            "cartographic": "Image",
+            "moving image": "Video",
+            "notated music": "Pdf",
+            "sound recording": "Audio",
+            "sound recording-musical": "Audio",
+            "sound recording-nonmusical": "Audio",
+            "still image": "Image",
+            "text": "Pdf",
+        }
+        genres = " ".join(
+            document.xpath("/mods:mods/mods:genre/text()", namespaces=namespaces)
+        ).lower()
+        for resource_type in document.xpath(
+            "/mods:mods/mods:typeOfResource/text()", namespaces=namespaces
+        ):
+            model = resource_types.get(resource_type.strip().lower())
+            if model == "Pdf" and "book" in genres:
+                return "Book"
+            if model is not None:
+                return model
+        return "Generic"
+
     @staticmethod
     def __get_utk_ontology_value(model):
         ontology_values = {
@@ -0,0 +1,3 @@
+from .profile import NullProfiler, PropertyProfiler
+
+__all__ = ["NullProfiler", "PropertyProfiler"]
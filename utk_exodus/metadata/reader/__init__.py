@@ -0,0 +1,17 @@
+from .reader import (
+    DEFAULT_EXCLUDE,
+    DEFAULT_INCLUDE,
+    is_archive,
+    iter_archive,
+    iter_mods_collection,
+    scan_directory,
+)
+
+__all__ = [
+    "DEFAULT_EXCLUDE",
+    "DEFAULT_INCLUDE",
+    "is_archive",
+    "iter_archive",
+    "iter_mods_collection",
+    "scan_directory",
+]
@@ -0,0 +1,221 @@
+import copy
+import os
+import re
+import tarfile
+import zipfile
+from fnmatch import translate
+from lxml import etree
+
+MODS = "http://www.loc.gov/mods/v3"
+OAI = "http://www.openarchives.org/OAI/2.0/"
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# `*.xml` takes in `*_MODS.xml` as well as bare `{pid}.xml` files. macOS resource forks are left out.
+DEFAULT_INCLUDE = ("*.xml",)
+DEFAULT_EXCLUDE = ("._*", "__MACOSX")
+
+PID = etree.XPath('mods:identifier[@type="pid"]', namespaces={"mods": MODS})
+RECORD_IDENTIFIER = etree.XPath(
+    "mods:recordInfo/mods:recordIdentifier", namespaces={"mods": MODS}
+)
+LOCAL_IDENTIFIER = etree.XPath(
+    'mods:identifier[@type="local"]', namespaces={"mods": MODS}
+)
+
+
+def source_identifier_for(mods, oai_identifier=None, position=0):
+    """Work out the source identifier of a MODS record that didn't come from its own file.
+
+    The OAI-PMH header identifier is used when there is one (`oai:digital.lib.utk.edu:harp_1` becomes `harp_1`).
+    Otherwise the record's pid, recordIdentifier, or local identifier is used, in that order, and failing all of those
+    its position in the file.
+
+    Args:
+        mods (lxml.etree._Element): The mods:mods element.
+        oai_identifier (str): The identifier from the record's OAI-PMH header, if any.
+        position (int): The position of the record in the file.
+
+    Returns:
+        str: The source identifier, with `:` replaced by `_` as in MODS file names.
+
+    Examples:
+        >>> mods = etree.fromstring('<mods xmlns="http://www.loc.gov/mods/v3"><identifier type="pid">egypt:224</identifier></mods>')
+        >>> source_identifier_for(mods)
+        'egypt_224'
+        >>> source_identifier_for(mods, oai_identifier="oai:digital.lib.utk.edu:harp_1")
+        'harp_1'
+
+    """
+    if oai_identifier:
+        identifier = oai_identifier.strip().split(":", 2)[-1]
+    else:
+        identifier = next(
+            (
+                element.text.strip()
+                for xpath in (PID, RECORD_IDENTIFIER, LOCAL_IDENTIFIER)
+                for element in xpath(mods)
+                if element.text and element.text.strip()
+            ),
+            f"record_{position}",
+        )
+    return identifier.replace(":", "_")
+
+
+def iter_mods_collection(source, default_identifier=None):
+    """Stream the MODS records out of a modsCollection document or an OAI-PMH response.
+
+    Records are read with iterparse and each one is copied into a standalone tree before it and everything parsed
+    before it is freed, so memory use doesn't grow with the size of the file. A file whose root is a single mods:mods
+    is read the same way and yielded with `default_identifier`.
+
+    Args:
+        source (str): The path to, or a binary file object of, the XML file.
+        default_identifier (str): The source identifier to use if the file is a single MODS record.
+
+    Yields:
+        tuple: The source identifier and an lxml.etree._ElementTree of each record.
+    """
+    oai_identifier = None
+    position = 0
+    for event, element in etree.iterparse(
+        source,
+        events=("end",),
+        tag=(f"{{{MODS}}}mods", f"{{{OAI}}}header"),
+        huge_tree=True,
+        remove_blank_text=False,
+    ):
+        if element.tag == f"{{{OAI}}}header":
+            identifier = element.find(f"{{{OAI}}}identifier")
+            oai_identifier = identifier.text if identifier is not None else None
+            continue
+        position += 1
+        if element.getparent() is None and default_identifier:
+            source_identifier = default_identifier
+        else:
+            source_identifier = source_identifier_for(element, oai_identifier, position)
+        oai_identifier = None
+        yield source_identifier, etree.ElementTree(copy.deepcopy(element))
+        element.clear()
+        for ancestor in [element] + list(element.iterancestors()):
+            while ancestor.getprevious() is not None:
+                del ancestor.getparent()[0]
+
+
+def is_archive(path):
+    """Check whether a path names a zip or tar archive by its extension.
+
+    Examples:
+        >>> is_archive("batch.tar.gz"), is_archive("harp_1_MODS.xml")
+        (True, False)
+
+    """
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _wanted(name):
+    base = name.split("/")[-1]
+    return (
+        name.lower().endswith(".xml")
+        and not base.startswith("._")
+        and "__MACOSX/" not in name
+    )
+
+
+def iter_archive(path):
+    """Stream the MODS records out of a zip or tar archive without unpacking it.
+
+    Tar archives, compressed or not, are read as a stream, so members are parsed as they are decompressed. Every `.xml`
+    member is read with `iter_mods_collection`, so a member may be a single MODS record or a whole modsCollection. A
+    single record gets its source identifier from the member name the same way a file in a directory does.
+
+    Args:
+        path (str): The path to the archive.
+
+    Yields:
+        tuple: The source identifier and an lxml.etree._ElementTree of each record.
+    """
+    if str(path).lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if not member.is_dir() and _wanted(member.filename):
+                    with archive.open(member) as xml:
+                        yield from iter_mods_collection(
+                            xml, default_identifier=_member_identifier(member.filename)
+                        )
+    else:
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and _wanted(member.name):
+                    xml = archive.extractfile(member)
+                    yield from iter_mods_collection(
+                        xml, default_identifier=_member_identifier(member.name)
+                    )
+
+
+def _member_identifier(name):
+    return name.split("/")[-1].replace("_MODS.xml", "").replace(".xml", "")
+
+
+def _compile(patterns):
+    # One regex for all the patterns, so each entry is matched once instead of once per pattern.
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{translate(pattern)})" for pattern in patterns))
+
+
+def _matches(name, relative, compiled):
+    return compiled is not None and (
+        compiled.match(name) is not None or compiled.match(relative) is not None
+    )
+
+
+def scan_directory(path, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE, manifest=None):
+    """Yield the metadata files in a directory and its subdirectories, in a stable order, as they are found.
+
+    The directory is read with os.scandir, which gets each entry's type along with its name, so no extra stat call is
+    made per file. Entries are sorted by name within each directory and subdirectories are read where they fall in
+    that order, so the same tree is always read in the same order. Patterns are matched against both a file's name and
+    its path relative to `path`. A directory whose name matches an exclude pattern isn't entered.
+
+    With `manifest`, the files are read from it instead of walking `path`: one path per line, relative to `path`
+    unless absolute, with blank lines and lines starting with `#` skipped. Listed files are yielded in the manifest's
+    order and aren't filtered.
+
+    Args:
+        path (str): The directory to scan.
+        include (tuple): Glob patterns a file must match one of. Empty takes in every file.
+        exclude (tuple): Glob patterns of files and directories to leave out.
+        manifest (str): Optional: the path to a file listing the files to read instead.
+
+    Yields:
+        str: The path to each file.
+
+    Examples:
+        >>> [os.path.basename(file) for file in scan_directory("tests/fixtures/collections")]
+        ['modsCollection.xml', 'oai_list_records.xml']
+
+    """
+    if manifest:
+        with open(manifest, "r") as listing:
+            for line in listing:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line if os.path.isabs(line) else os.path.join(path, line)
+        return
+    yield from _scan(path, "", _compile(include), _compile(exclude))
+
+
+def _scan(path, relative, include, exclude):
+    with os.scandir(os.path.join(path, relative)) as scan:
+        entries = sorted(scan, key=lambda entry: entry.name)
+    for entry in entries:
+        entry_relative = os.path.join(relative, entry.name)
+        if _matches(entry.name, entry_relative, exclude):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from _scan(path, entry_relative, include, exclude)
+        elif entry.is_file() and (
+            include is None or _matches(entry.name, entry_relative, include)
+        ):
+            yield entry.path
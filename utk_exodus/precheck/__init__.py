@@ -0,0 +1,3 @@
+from .precheck import RemoteFileCheck
+
+__all__ = ["RemoteFileCheck"]
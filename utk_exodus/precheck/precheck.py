@@ -0,0 +1,182 @@
+import csv
+import os
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from tqdm import tqdm
+from utk_exodus.fedora import pooled_session
+
+
+class RemoteFileCheck:
+    """Check that every remote_files URL in an import sheet can be fetched before the sheet goes to Bulkrax.
+
+    Each distinct URL gets a HEAD request, and a one byte ranged GET when the server won't answer HEAD or doesn't say
+    how big the file is, so no file is downloaded. Requests are made by a bounded pool of threads that share one
+    pooled `requests.Session`. A URL fails when it can't be reached, answers with an error status, or points to an
+    empty file.
+
+    Args:
+        path (str): An import sheet, or a directory of them.
+        output (str): The directory to write the report and failure sheets to.
+        workers (int): The maximum number of requests at once.
+        timeout (float): Seconds to wait for each request.
+
+    Examples:
+        >>> check = RemoteFileCheck("import.csv", "precheck")  # doctest: +SKIP
+        >>> check.run()  # doctest: +SKIP
+        {'checked': 1400, 'failed': 3, 'failure_sheets': ['precheck/import_failed.csv']}
+
+    """
+
+    fieldnames = ["url", "status", "content_length", "latency_ms", "method", "ok", "message"]
+
+    def __init__(self, path, output, workers=16, timeout=30):
+        self.path = path
+        self.output = output
+        self.workers = workers
+        self.timeout = timeout
+        self.sheets = self.__find_sheets(path, output)
+        self.session = pooled_session(workers)
+
+    @staticmethod
+    def __find_sheets(path, output):
+        if os.path.isfile(path):
+            return [path]
+        # Skip anything under the output directory so a rerun doesn't check its own report and failure sheets.
+        output = os.path.abspath(output)
+        return sorted(
+            os.path.join(root, filename)
+            for root, directories, files in os.walk(path)
+            if os.path.commonpath([os.path.abspath(root), output]) != output
+            for filename in files
+            if filename.endswith(".csv")
+        )
+
+    @staticmethod
+    def urls_in(row):
+        """Get the URLs in a row's remote_files, which may hold several separated by `|`.
+
+        Examples:
+            >>> RemoteFileCheck.urls_in({"remote_files": "https://a.edu/1 | https://a.edu/2"})
+            ['https://a.edu/1', 'https://a.edu/2']
+
+        """
+        return [url.strip() for url in (row.get("remote_files") or "").split("|") if url.strip()]
+
+    def __rows(self, sheet):
+        with open(sheet, "r", newline="") as csvfile:
+            yield from csv.DictReader(csvfile)
+
+    def __urls(self):
+        urls = {}
+        for sheet in self.sheets:
+            for row in self.__rows(sheet):
+                for url in self.urls_in(row):
+                    urls[url] = None
+        return list(urls)
+
+    def __request(self, method, url):
+        headers = {"Range": "bytes=0-0"} if method == "GET" else {}
+        with self.session.request(
+            method, url, headers=headers, allow_redirects=True, stream=True, timeout=self.timeout
+        ) as response:
+            return response.status_code, self.__length(response)
+
+    @staticmethod
+    def __length(response):
+        # A ranged GET reports the full size after the slash in Content-Range, e.g. `bytes 0-0/48213094`.
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+            return int(content_range.rsplit("/", 1)[1])
+        if response.status_code == 200 and response.headers.get("Content-Length", "").isdigit():
+            return int(response.headers["Content-Length"])
+        return None
+
+    def check_url(self, url):
+        """Check one URL.
+
+        Returns:
+            dict: The status code, content length, latency and verdict for the URL.
+        """
+        start = perf_counter()
+        method = "HEAD"
+        try:
+            status, length = self.__request(method, url)
+            if status in (405, 501) or (status < 400 and length is None):
+                method = "GET"
+                status, length = self.__request(method, url)
+        except requests.RequestException as e:
+            return {
+                "url": url,
+                "status": "",
+                "content_length": "",
+                "latency_ms": round((perf_counter() - start) * 1000, 1),
+                "method": method,
+                "ok": False,
+                "message": str(e),
+            }
+        message = ""
+        if status >= 400:
+            message = f"{status} on {url}."
+        elif length == 0:
+            message = f"{url} is empty."
+        return {
+            "url": url,
+            "status": status,
+            "content_length": "" if length is None else length,
+            "latency_ms": round((perf_counter() - start) * 1000, 1),
+            "method": method,
+            "ok": not message,
+            "message": message,
+        }
+
+    def __failure_sheet(self, sheet, failed):
+        # Failed rows keep the columns and order of the sheet they came from, so the sheet can be fixed and resubmitted.
+        # Sheets in a directory are written under the same subdirectories, so sheets with the same name don't collide.
+        relative = os.path.basename(sheet) if os.path.isfile(self.path) else os.path.relpath(sheet, self.path)
+        name = os.path.splitext(os.path.basename(relative))[0]
+        filename = os.path.join(self.output, os.path.dirname(relative), f"{name}_failed.csv")
+        failures = None
+        try:
+            with open(sheet, "r", newline="") as original:
+                reader = csv.DictReader(original)
+                for row in reader:
+                    if any(url in failed for url in self.urls_in(row)):
+                        if failures is None:
+                            os.makedirs(os.path.dirname(filename), exist_ok=True)
+                            failures = open(filename, "w", newline="")
+                            writer = csv.DictWriter(failures, fieldnames=reader.fieldnames)
+                            writer.writeheader()
+                        writer.writerow(row)
+        finally:
+            if failures is not None:
+                failures.close()
+        return filename if failures is not None else None
+
+    def run(self):
+        """Check every URL and write `remote_files_report.csv` and a `{sheet}_failed.csv` for each sheet with failures.
+
+        When `path` is a directory, each failure sheet is written under the sheet's subdirectory of it.
+
+        Returns:
+            dict: How many URLs were checked and failed, and the failure sheets written.
+        """
+        os.makedirs(self.output, exist_ok=True)
+        urls = self.__urls()
+        failed = set()
+        with open(
+            os.path.join(self.output, "remote_files_report.csv"), "w", newline=""
+        ) as report, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            writer = csv.DictWriter(report, fieldnames=self.fieldnames)
+            writer.writeheader()
+            for result in tqdm(executor.map(self.check_url, urls), total=len(urls)):
+                writer.writerow(result)
+                if not result["ok"]:
+                    failed.add(result["url"])
+        failure_sheets = []
+        if failed:
+            for sheet in self.sheets:
+                filename = self.__failure_sheet(sheet, failed)
+                if filename is not None:
+                    failure_sheets.append(filename)
+        return {"checked": len(urls), "failed": len(failed), "failure_sheets": failure_sheets}
@@ -0,0 +1,3 @@
+from .replay import Recorder, Replayer, ReplayServer
+
+__all__ = ["Recorder", "Replayer", "ReplayServer"]
@@ -0,0 +1,412 @@
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
+
+# Credentials and cookies never go in the archive. Framing and Date/Server headers are set again by the replay server.
+UNRECORDED_HEADERS = {
+    "authorization",
+    "proxy-authorization",
+    "www-authenticate",
+    "proxy-authenticate",
+    "set-cookie",
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "date",
+    "server",
+}
+
+
+def recorded_headers(headers, decoded=True):
+    """Get the response headers worth replaying, as a list of name and value pairs.
+
+    Content-Encoding is left out when the recorded body was decoded, since the body is stored as the caller read it.
+
+    Examples:
+        >>> recorded_headers({"Location": "/b", "Set-Cookie": "session=1", "Content-Encoding": "gzip"})
+        [['Location', '/b']]
+
+    """
+    return [
+        [name, value]
+        for name, value in headers.items()
+        if name.lower() not in UNRECORDED_HEADERS
+        and not (decoded and name.lower() == "content-encoding")
+    ]
+
+
+class _Tee:
+    """Stand in for a streamed response's `raw`, copying the body to a spooled file as the caller reads it.
+
+    The exchange is added to the archive when the body has been read to the end or the response is closed, so a large
+    download is never held in memory while recording.
+    """
+
+    def __init__(self, raw, finish):
+        self.raw = raw
+        self.finish = finish
+        self.body = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        self.digest = hashlib.sha256()
+        self.decoded = True
+        self.finished = False
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __write(self, chunk, decode_content):
+        if chunk:
+            self.body.write(chunk)
+            self.digest.update(chunk)
+            # Left unset, urllib3 falls back to the response's own setting, which requests leaves off.
+            if decode_content is None:
+                decode_content = self.raw.decode_content
+            self.decoded = self.decoded and bool(decode_content)
+
+    def stream(self, amt=2**16, decode_content=None):
+        for chunk in self.raw.stream(amt, decode_content=decode_content):
+            self.__write(chunk, decode_content)
+            yield chunk
+        self.done(complete=True)
+
+    def read(self, amt=None, decode_content=None, **kwargs):
+        chunk = self.raw.read(amt, decode_content=decode_content, **kwargs)
+        self.__write(chunk, decode_content)
+        if not chunk and amt != 0:
+            self.done(complete=True)
+        return chunk
+
+    def close(self):
+        self.done(complete=False)
+        return self.raw.close()
+
+    def done(self, complete):
+        if self.finished:
+            return
+        self.finished = True
+        self.body.seek(0)
+        self.finish(self.body, self.digest.hexdigest(), self.decoded, complete)
+        self.body.close()
+
+
+class Recorder:
+    """Record every HTTP request made through `requests` during a run into a compact archive.
+
+    The archive is a zip file with an `index.jsonl` of method, url, status and response headers for each exchange, and
+    one deflated body per distinct response, so a datastream fetched many times is only stored once. Streamed bodies
+    are copied to the archive as the caller reads them. If a streamed response is closed before its body is read to
+    the end, only what was read is stored and the exchange is marked incomplete. Request headers, cookies and
+    authentication headers are never recorded, so credentials don't end up in the archive.
+
+    Args:
+        archive (str): The path to the zip file to write.
+
+    Examples:
+        >>> with Recorder("run.zip"):  # doctest: +SKIP
+        ...     ResourceIndexSearch().get_parent_collections("harp:1")
+
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.exchanges = []
+        self.bodies = set()
+        self.streams = set()
+        self.lock = threading.Lock()
+        self.zip = None
+        self.original_send = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        """Open the archive and start capturing requests."""
+        self.zip = zipfile.ZipFile(self.archive, "w", compression=zipfile.ZIP_DEFLATED)
+        self.original_send = HTTPAdapter.send
+        recorder = self
+
+        def send(adapter, request, **kwargs):
+            response = recorder.original_send(adapter, request, **kwargs)
+            if kwargs.get("stream"):
+                recorder.tee(request.method, request.url, response)
+            else:
+                recorder.add(
+                    request.method,
+                    request.url,
+                    response.status_code,
+                    recorded_headers(response.headers),
+                    response.content,
+                )
+            return response
+
+        HTTPAdapter.send = send
+        return self
+
+    def tee(self, method, url, response):
+        """Record a streamed response once its body has been read or it is closed."""
+        headers = dict(response.headers)
+
+        def finish(body, digest, decoded, complete):
+            with self.lock:
+                self.streams.discard(tee)
+            self.add(
+                method,
+                url,
+                response.status_code,
+                recorded_headers(headers, decoded),
+                body,
+                digest=digest,
+                complete=complete,
+            )
+
+        tee = _Tee(response.raw, finish)
+        with self.lock:
+            self.streams.add(tee)
+        response.raw = tee
+        return
+
+    def add(self, method, url, status, headers, body, digest=None, complete=True):
+        """Add one exchange to the archive.
+
+        Args:
+            method (str): The request method.
+            url (str): The request URL.
+            status (int): The response status code.
+            headers (list): The response headers to replay, as name and value pairs.
+            body (bytes): The response body, or a file object to copy it from.
+            digest (str): The sha256 of a body given as a file object.
+            complete (bool): Whether the body was read to the end.
+        """
+        if isinstance(body, bytes):
+            digest = hashlib.sha256(body).hexdigest()
+        with self.lock:
+            if digest not in self.bodies:
+                if isinstance(body, bytes):
+                    self.zip.writestr(f"bodies/{digest}", body)
+                else:
+                    with self.zip.open(f"bodies/{digest}", "w", force_zip64=True) as member:
+                        shutil.copyfileobj(body, member)
+                self.bodies.add(digest)
+            self.exchanges.append(
+                {
+                    "method": method,
+                    "url": url,
+                    "status": status,
+                    "headers": headers,
+                    "body": digest,
+                    "complete": complete,
+                }
+            )
+
+    def stop(self):
+        """Stop capturing requests and write the index."""
+        if self.original_send is not None:
+            HTTPAdapter.send = self.original_send
+            self.original_send = None
+        with self.lock:
+            streams = list(self.streams)
+        for stream in streams:
+            stream.done(complete=False)
+        with self.lock:
+            self.zip.writestr(
+                "index.jsonl",
+                "".join(json.dumps(exchange) + "\n" for exchange in self.exchanges),
+            )
+            self.zip.close()
+        print(f"Recorded {len(self.exchanges)} requests to {self.archive}.")
+        return
+
+
+class ReplayServer:
+    """Serve the exchanges in a Recorder archive from a local HTTP server.
+
+    The original URL is carried in the path, so `https://esb.lib.utk.edu/fedora/risearch?query=...` is requested as
+    `http://127.0.0.1:{port}/https/esb.lib.utk.edu/fedora/risearch?query=...`. When the same request was made more
+    than once while recording, the responses are replayed in the order they were recorded and the last one is repeated
+    after that. Requests that weren't recorded get a 404.
+
+    Args:
+        archive (str): The path to the zip file written by Recorder.
+        latency (float): Seconds to wait before answering each request.
+        bandwidth (int): Bytes per second to send response bodies at. None sends them as fast as possible.
+        host (str): The interface to listen on.
+        port (int): The port to listen on. 0 picks a free one.
+    """
+
+    def __init__(self, archive, latency=0.0, bandwidth=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.zip = zipfile.ZipFile(archive)
+        self.exchanges = defaultdict(list)
+        for line in self.zip.read("index.jsonl").decode("utf-8").splitlines():
+            exchange = json.loads(line)
+            self.exchanges[(exchange["method"], exchange["url"])].append(exchange)
+        self.served = defaultdict(int)
+        self.misses = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.__handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def lookup(self, method, url):
+        """Get the next recorded exchange and its body for a request, or None if it wasn't recorded."""
+        key = (method, url)
+        with self.lock:
+            exchanges = self.exchanges.get(key)
+            if not exchanges:
+                self.misses.append(key)
+                return None
+            exchange = exchanges[min(self.served[key], len(exchanges) - 1)]
+            self.served[key] += 1
+            body = self.zip.read(f"bodies/{exchange['body']}")
+        return exchange, body
+
+    @staticmethod
+    def headers(exchange):
+        """Get the headers to send for an exchange. Archives recorded before headers were kept only have Content-Type."""
+        if "headers" in exchange:
+            return exchange["headers"]
+        if exchange.get("content_type"):
+            return [["Content-Type", exchange["content_type"]]]
+        return []
+
+    def __handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def __answer(self):
+                scheme, _, rest = self.path.lstrip("/").partition("/")
+                length = int(self.headers.get("Content-Length", 0))
+                if length:
+                    self.rfile.read(length)
+                found = replay.lookup(self.command, f"{scheme}://{rest}")
+                if replay.latency:
+                    time.sleep(replay.latency)
+                if found is None:
+                    self.send_error(404, "Request was not recorded")
+                    return
+                exchange, body = found
+                self.send_response(exchange["status"])
+                length = None
+                for name, value in replay.headers(exchange):
+                    if name.lower() == "content-length":
+                        length = value
+                    else:
+                        self.send_header(name, value)
+                complete = exchange.get("complete", True)
+                # A HEAD, or a body the recorded run stopped reading early, is answered with the recorded length.
+                # Otherwise the length is that of the stored body.
+                if self.command != "HEAD" and complete:
+                    length = str(len(body))
+                if length is not None:
+                    self.send_header("Content-Length", length)
+                if not complete:
+                    self.send_header("Connection", "close")
+                    self.close_connection = True
+                self.end_headers()
+                if self.command != "HEAD":
+                    replay.throttle(self.wfile, body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = __answer
+
+            def log_message(self, format, *args):
+                return
+
+        return Handler
+
+    def throttle(self, stream, body):
+        """Write a body to a stream no faster than the configured bandwidth."""
+        if not self.bandwidth:
+            stream.write(body)
+            return
+        chunk_size = max(1, min(65536, self.bandwidth // 10))
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start : start + chunk_size]
+            stream.write(chunk)
+            time.sleep(len(chunk) / self.bandwidth)
+        return
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.zip.close()
+        return
+
+
+class Replayer:
+    """Answer every request made through `requests` from a Recorder archive instead of the live services.
+
+    Starts a ReplayServer in a background thread and rewrites outgoing requests to it, so the code under test still
+    makes real HTTP round trips and the effect of batching and concurrency can be measured offline.
+
+    Args:
+        archive (str): The path to the zip file written by Recorder.
+        latency (float): Seconds to wait before answering each request.
+        bandwidth (int): Bytes per second to send response bodies at. None sends them as fast as possible.
+
+    Examples:
+        >>> with Replayer("run.zip", latency=0.05):  # doctest: +SKIP
+        ...     ResourceIndexSearch().get_parent_collections("harp:1")
+        ['collections:harp']
+
+    """
+
+    def __init__(self, archive, latency=0.0, bandwidth=None):
+        self.server = ReplayServer(archive, latency=latency, bandwidth=bandwidth)
+        self.original_send = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        """Start the server and send every request to it."""
+        self.server.start()
+        self.original_send = HTTPAdapter.send
+        replayer = self
+
+        def send(adapter, request, **kwargs):
+            url = request.url
+            scheme, _, rest = url.partition("://")
+            request.url = f"{replayer.server.url}/{scheme}/{rest}"
+            kwargs["proxies"] = {}
+            response = replayer.original_send(adapter, request, **kwargs)
+            # Relative redirects are resolved against the response URL, so it has to be the original one.
+            request.url = response.url = url
+            return response
+
+        HTTPAdapter.send = send
+        return self
+
+    def stop(self):
+        """Restore live requests and stop the server."""
+        if self.original_send is not None:
+            HTTPAdapter.send = self.original_send
+            self.original_send = None
+        self.server.stop()
+        if self.server.misses:
+            print(f"{len(self.server.misses)} requests were not in the archive.")
+        return
@@ -1,3 +1,3 @@
-from .restrict import Restrictions, RestrictionsSheet
+from .restrict import PolicyIndex, Restrictions, RestrictionsSheet, evaluate_policies
 
-__all__ = ["Restrictions", "RestrictionsSheet"]
+__all__ = ["PolicyIndex", "Restrictions", "RestrictionsSheet", "evaluate_policies"]
@@ -1,55 +1,124 @@
-import xml.etree.ElementTree as ET
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
 from tqdm import tqdm
 import os
 
 
+XACML_NAMESPACES = {"xacml": "urn:oasis:names:tc:xacml:1.0:policy"}
+
+# Compiled once per process so a whole directory of policies can be evaluated without recompiling the same queries.
+RESTRICTED_DATASTREAMS = etree.XPath(
+    './/xacml:Rule[@RuleId="deny-dsid-mime"]//xacml:Resource/descendant::xacml:AttributeValue[1]',
+    namespaces=XACML_NAMESPACES,
+)
+USERS_WITH_ACCESS = etree.XPath(
+    './/xacml:Rule[@RuleId="deny-access-functions"]'
+    '//xacml:Condition[@FunctionId="urn:oasis:names:tc:xacml:1.0:function:not"]'
+    '//xacml:Apply[@FunctionId="urn:oasis:names:tc:xacml:1.0:function:string-at-least-one-member-of"]'
+    "/descendant::xacml:AttributeValue[1]",
+    namespaces=XACML_NAMESPACES,
+)
+
+
+def parse_policy(policy):
+    """Parse a POLICY from a path, a file-like object, or the raw bytes of a response.
+
+    Args:
+        policy (str | bytes | file): The policy to parse.
+
+    Returns:
+        lxml.etree._Element: The root of the policy.
+    """
+    if isinstance(policy, (bytes, bytearray)):
+        return etree.fromstring(bytes(policy))
+    return etree.parse(policy).getroot()
+
+
+def read_policy(policy):
+    """Parse a single POLICY and return its restricted datastreams and users with access.
+
+    Args:
+        policy (str | bytes | file): The path to the POLICY file, a file-like object, or its bytes.
+
+    Returns:
+        tuple: The restricted datastreams and the users with access.
+
+    Examples:
+        >>> read_policy("tests/fixtures/voloh_10_POLICY.xml")
+        (['DEED_OF_GIFT', 'CONSENT_FORM'], [])
+    """
+    root = parse_policy(policy)
+    return (
+        [value.text for value in RESTRICTED_DATASTREAMS(root)],
+        [value.text for value in USERS_WITH_ACCESS(root)],
+    )
+
+
+def evaluate_policies(policies, workers=None):
+    """Evaluate many policies in memory.
+
+    Args:
+        policies (dict): A mapping of pid to the POLICY as a path, a file-like object, or bytes.
+        workers (int): Optional number of processes to parse with. File-like objects can't be sent to other
+            processes, so only use this with paths or bytes.
+
+    Returns:
+        dict: A mapping of pid to restrictions in the same shape as `Restrictions.get()`.
+
+    Examples:
+        >>> with open("tests/fixtures/bass_10900_POLICY.xml", "rb") as policy:
+        ...     evaluate_policies({"bass:10900": policy.read()})
+        {'bass:10900': {'work_restricted': True, 'restricted_datastreams': []}}
+    """
+    pids = list(policies.keys())
+    values = [policies[pid] for pid in pids]
+    if workers and workers > 1 and len(values) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    read_policy,
+                    values,
+                    chunksize=max(1, len(values) // (workers * 4)),
+                )
+            )
+    else:
+        results = [read_policy(value) for value in values]
+    return {
+        pid: {
+            "work_restricted": len(users) > 0,
+            "restricted_datastreams": restricted_datastreams,
+        }
+        for pid, (restricted_datastreams, users) in zip(pids, results)
+    }
+
+
 class Restrictions:
+    """Evaluate a XACML POLICY.
+
+    Args:
+        policy (str | bytes | file): The path to the POLICY file, a file-like object, or the raw bytes of a POLICY
+            datastream so it can be read straight from a response without a temporary file.
+    """
+
     def __init__(self, policy):
         self.policy = policy
-        self.ns = {"xacml": "urn:oasis:names:tc:xacml:1.0:policy"}
-        self.root = self.__parse(policy)
-
-    @staticmethod
-    def __parse(policy):
-        tree = ET.parse(policy)
-        return tree.getroot()
+        self.ns = XACML_NAMESPACES
+        self.root = parse_policy(policy)
 
     def find_rules(self):
         rules = []
-        for rule in self.root.findall(".//xacml:Rule", self.ns):
+        for rule in self.root.iterfind(".//xacml:Rule", self.ns):
             rule_id = rule.get("RuleId")
             effect = rule.get("Effect")
             rules.append((rule_id, effect))
         return rules
 
     def find_restricted_datastreams(self):
-        restricted_datastreams = []
-        for rule in self.root.findall(
-            './/xacml:Rule[@RuleId="deny-dsid-mime"]', self.ns
-        ):
-            for resource in rule.findall(".//xacml:Resource", self.ns):
-                dsid = resource.find(".//xacml:AttributeValue", self.ns).text
-                restricted_datastreams.append(dsid)
-        return restricted_datastreams
+        return [value.text for value in RESTRICTED_DATASTREAMS(self.root)]
 
     def find_objects_only_accessible_by_certain_users(self):
-        users_with_access = []
-        for rule in self.root.findall(
-            './/xacml:Rule[@RuleId="deny-access-functions"]', self.ns
-        ):
-            for condition in rule.findall(
-                './/xacml:Condition[@FunctionId="urn:oasis:names:tc:xacml:1.0:function:not"]',
-                self.ns,
-            ):
-                for apply in condition.findall(
-                    './/xacml:Apply[@FunctionId="urn:oasis:names:tc:xacml:1.0:function:string-at-least-one-member-of"]',
-                    self.ns,
-                ):
-                    users_with_access.append(
-                        apply.find(".//xacml:AttributeValue", self.ns).text
-                    )
-        return users_with_access
+        return [value.text for value in USERS_WITH_ACCESS(self.root)]
 
     def determine_if_work_restricted(self):
         if len(self.find_objects_only_accessible_by_certain_users()) > 0:
@@ -63,10 +132,168 @@ class Restrictions:
         }
 
 
+class PolicyIndex:
+    """Index a directory of downloaded POLICY files by pid.
+
+    Each `{pid}_POLICY.xml` in the directory is parsed once and stored in a compact CSV table alongside its size
+    and modification time. Later builds only reparse files that are new or have changed since they were indexed.
+
+    Args:
+        policies_location (str): The directory of downloaded POLICY files.
+        index_file (str): Where to persist the index. Defaults to `policy_index.csv` inside `policies_location`.
+        workers (int): The number of processes to parse with. Defaults to the number of CPUs.
+    """
+
+    fieldnames = [
+        "pid",
+        "mtime",
+        "size",
+        "work_restricted",
+        "restricted_datastreams",
+        "users",
+    ]
+    suffix = "_POLICY.xml"
+
+    def __init__(self, policies_location, index_file=None, workers=None):
+        self.policies_location = policies_location
+        self.index_file = index_file or os.path.join(
+            policies_location, "policy_index.csv"
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.entries = self.__load()
+
+    def __load(self):
+        entries = {}
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", newline="") as csvfile:
+                for row in csv.DictReader(csvfile):
+                    entries[row["pid"]] = {
+                        "mtime": int(row["mtime"]),
+                        "size": int(row["size"]),
+                        "work_restricted": row["work_restricted"] == "True",
+                        "restricted_datastreams": self.__split(
+                            row["restricted_datastreams"]
+                        ),
+                        "users": self.__split(row["users"]),
+                    }
+        return entries
+
+    @staticmethod
+    def __split(value):
+        return [item for item in value.split(" | ") if item != ""]
+
+    def __find_policies(self):
+        policies = {}
+        if not os.path.isdir(self.policies_location):
+            return policies
+        with os.scandir(self.policies_location) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    policies[entry.name[: -len(self.suffix)]] = entry
+        return policies
+
+    def build(self):
+        """Parse new or changed policies, drop policies that no longer exist, and persist the index.
+
+        Returns:
+            PolicyIndex: The index, so calls can be chained.
+        """
+        policies = self.__find_policies()
+        stale = []
+        for pid, entry in policies.items():
+            stat = entry.stat()
+            current = self.entries.get(pid)
+            if (
+                current is None
+                or current["mtime"] != stat.st_mtime_ns
+                or current["size"] != stat.st_size
+            ):
+                stale.append((pid, entry.path, stat))
+        for pid in [pid for pid in self.entries if pid not in policies]:
+            del self.entries[pid]
+        paths = [path for pid, path, stat in stale]
+        if self.workers and self.workers > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(
+                    tqdm(
+                        executor.map(
+                            read_policy,
+                            paths,
+                            chunksize=max(1, len(paths) // (self.workers * 4)),
+                        ),
+                        total=len(paths),
+                    )
+                )
+        else:
+            results = [read_policy(path) for path in paths]
+        for (pid, path, stat), (restricted_datastreams, users) in zip(stale, results):
+            self.add(pid, restricted_datastreams, users, stat.st_mtime_ns, stat.st_size)
+        if len(stale) > 0 or not os.path.exists(self.index_file):
+            self.write()
+        return self
+
+    def add(self, pid, restricted_datastreams, users, mtime=0, size=0):
+        """Add or replace the entry for a pid.
+
+        Args:
+            pid (str): The pid the policy belongs to.
+            restricted_datastreams (list): The restricted datastreams from the policy.
+            users (list): The users with access from the policy.
+            mtime (int): The modification time of the policy file in nanoseconds, if there is one.
+            size (int): The size of the policy file, if there is one.
+        """
+        self.entries[pid.replace("info:fedora/", "").strip()] = {
+            "mtime": mtime,
+            "size": size,
+            "work_restricted": len(users) > 0,
+            "restricted_datastreams": restricted_datastreams,
+            "users": users,
+        }
+        return
+
+    def get(self, pid):
+        """Get the restrictions for a pid in the same shape as `Restrictions.get()`.
+
+        Args:
+            pid (str): The pid to look up.
+
+        Returns:
+            dict: The restrictions for the pid or None if the pid has no policy.
+        """
+        entry = self.entries.get(pid.replace("info:fedora/", "").strip())
+        if entry is None:
+            return None
+        return {
+            "work_restricted": entry["work_restricted"],
+            "restricted_datastreams": entry["restricted_datastreams"],
+        }
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+        with open(self.index_file, "w", newline="") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
+            writer.writeheader()
+            for pid, entry in sorted(self.entries.items()):
+                writer.writerow(
+                    {
+                        "pid": pid,
+                        "mtime": entry["mtime"],
+                        "size": entry["size"],
+                        "work_restricted": entry["work_restricted"],
+                        "restricted_datastreams": " | ".join(
+                            entry["restricted_datastreams"]
+                        ),
+                        "users": " | ".join(entry["users"]),
+                    }
+                )
+        return
+
+
 class RestrictionsSheet:
-    def __init__(self, original_sheet, policies_location):
+    def __init__(self, original_sheet, policies_location, policy_index=None):
         self.original_sheet = original_sheet
         self.policies_location = policies_location
+        self.policy_index = policy_index or PolicyIndex(policies_location).build()
         self.original_as_dict = self.__read(original_sheet)
         self.headers = self.__get_headers()
         self.rows_with_visibility = self.add_visibility()
@@ -93,10 +320,8 @@ class RestrictionsSheet:
             visibility = "open"
             if len(row["source_identifier"].split("_")) > 1:
                 datastream = row["source_identifier"].split("_")[1]
-            if os.path.exists(f"{self.policies_location}/{pid}_POLICY.xml"):
-                restrictions = Restrictions(
-                    f"{self.policies_location}/{pid}_POLICY.xml"
-                ).get()
+            restrictions = self.policy_index.get(pid)
+            if restrictions is not None:
                 if restrictions["work_restricted"]:
                     visibility = "restricted"
                 elif datastream in restrictions["restricted_datastreams"]: